@@ -91,6 +91,8 @@
         'views/payment_views.xml',
         'views/event_views.xml',
         'views/tag_views.xml',
+        'views/region_views.xml',
+        'views/route_timing_views.xml',
         'views/procurement_plan_views.xml',
         'views/compliance_profile_views.xml',
         'views/compliance_task_views.xml',
@@ -111,7 +113,13 @@
         'data/base_data.xml',
         'data/project_type_data.xml',
         'data/sequences.xml',
+        'data/region_data.xml',
         'data/compliance_cron.xml',
+        'data/public_stats_cron.xml',
+        'data/project_similarity_cron.xml',
+        'data/open_data_cron.xml',
+        'data/route_timing_cron.xml',
+        'data/document_upload_cron.xml',
         'data/compliance_mail_templates.xml',
         'demo/enhanced_demo_data.xml',
     ],
@@ -126,18 +134,26 @@
         'web.assets_frontend': [
             'sama_promis/static/css/promispublic_modern.css',
             'sama_promis/static/js/promispublic_modern.js',
+            'sama_promis/static/js/public_stats_live.js',
         ],
     },
     'test': [
         'tests/test_installation.py',
         'tests/test_models.py',
+        'tests/test_citizen_notification.py',
+        'tests/test_open_data.py',
         'tests/test_payment.py',
         'tests/test_phase2_features.py',
         'tests/test_controllers.py',
+        'tests/test_document_upload.py',
         'tests/test_micromodules.py',
         # Public portal tests disabled - to be developed later
         # 'tests/test_public_portal.py',
         # 'tests/test_controller_routes.py',  # Not in manifest but exists
+        'tests/test_project_follower.py',
+        'tests/test_project_similarity.py',
+        'tests/test_public_statistics.py',
+        'tests/test_route_timing.py',
         'tests/test_qr_codes.py',
         'tests/test_workflows.py',
     ],
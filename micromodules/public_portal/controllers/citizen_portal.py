@@ -8,15 +8,28 @@ Affiche toute l'activité liée à l'utilisateur dans un style moderne.
 """
 
 from odoo import http, fields
+from odoo.exceptions import ValidationError
 from odoo.http import request
-from datetime import datetime, timedelta
+from datetime import timedelta
+from werkzeug.http import parse_content_range_header
 import json
 
+from .http_cache import conditional_response
+from .instrumentation import instrument_routes
 
+# Projets suivis affichés sur la page citoyenne
+FOLLOWED_PROJECTS_LIMIT = 12
+
+# Entrées de l'activité récente
+ACTIVITY_LIMIT = 20
+
+
+@instrument_routes
 class CitizenPortalController(http.Controller):
     """Contrôleur pour la page citoyenne SAMA PROMIS ET MOI."""
 
     @http.route(['/promispublic/citizen'], type='http', auth="public", website=True)
+    @conditional_response('projects', 'followers', 'snapshot')
     def citizen_portal(self, **kw):
         """
         Page principale "SAMA PROMIS ET MOI".
@@ -45,14 +58,15 @@ class CitizenPortalController(http.Controller):
             ('create_date', '>=', fields.Datetime.now() - timedelta(days=30))
         ], limit=6, order='create_date desc')
         
+        # Projets les plus suivis (compteur indexé)
         popular_projects = Project.search([
             ('state', 'in', ['approved', 'in_progress', 'completed']),
-            ('priority', 'in', ['high', 'urgent'])
-        ], limit=6, order='total_budget desc')
+        ], limit=6, order='follower_count desc, total_budget desc')
         
-        # Statistiques générales
-        total_projects = Project.search_count([('state', 'in', ['approved', 'in_progress', 'completed'])])
-        total_budget = sum(Project.search([('state', 'in', ['approved', 'in_progress', 'completed'])]).mapped('total_budget'))
+        # Statistiques générales (instantané public)
+        snapshot = request.env['sama.promis.public.stats'].sudo().get_snapshot()
+        total_projects = snapshot['total_projects']
+        total_budget = snapshot['total_budget']
         
         # Projets par région (pour engagement citoyen)
         regions_data = {}
@@ -105,27 +119,31 @@ class CitizenPortalController(http.Controller):
         # Supprimer les doublons
         user_projects = list(set(user_projects))
         
-        # Projets suivis (simulation - à implémenter avec un modèle de suivi)
-        followed_projects = Project.search([
-            ('state', 'in', ['approved', 'in_progress', 'completed'])
-        ], limit=5, order='create_date desc')
+        # Projets suivis, du plus récemment suivi au plus ancien
+        Follower = request.env['sama.promis.project.follower'].sudo()
+        followed_projects = Follower.get_followed_projects(user.partner_id.id, limit=FOLLOWED_PROJECTS_LIMIT)
+        followed_count = Follower.get_followed_count(user.partner_id.id)
         
         # Activité récente de l'utilisateur
         recent_activity = self._get_user_recent_activity(user)
         
         # Notifications pour l'utilisateur
-        notifications = self._get_user_notifications(user)
+        try:
+            notifications_page = int(kw.get('notifications_page', 1))
+        except (TypeError, ValueError):
+            notifications_page = 1
+        notifications = self._get_user_notifications(user, notifications_page)
         
         # Statistiques personnalisées
         user_stats = {
             'my_projects': len(user_projects),
-            'followed_projects': len(followed_projects),
+            'followed_projects': followed_count,
             'total_budget_involved': sum(p.total_budget for p in user_projects),
             'active_projects': len([p for p in user_projects if p.state == 'in_progress']),
         }
         
         # Projets recommandés (basés sur l'activité de l'utilisateur)
-        recommended_projects = self._get_recommended_projects(user, user_projects)
+        recommended_projects = self._get_recommended_projects(user, user_projects, followed_projects)
         
         values = {
             'is_authenticated': True,
@@ -142,82 +160,53 @@ class CitizenPortalController(http.Controller):
         
         return request.render('sama_promis.citizen_portal_authenticated', values)
 
-    def _get_user_recent_activity(self, user):
-        """Récupère l'activité récente de l'utilisateur."""
-        # Simulation d'activité - à implémenter avec un système de logs
-        activities = [
-            {
-                'type': 'project_view',
-                'title': 'Consultation de projet',
-                'description': 'Vous avez consulté le projet "Développement Rural"',
-                'date': datetime.now() - timedelta(hours=2),
-                'icon': 'fa-eye'
-            },
-            {
-                'type': 'project_follow',
-                'title': 'Suivi de projet',
-                'description': 'Vous suivez maintenant le projet "Education Numérique"',
-                'date': datetime.now() - timedelta(days=1),
-                'icon': 'fa-heart'
-            },
-            {
-                'type': 'notification',
-                'title': 'Nouvelle notification',
-                'description': 'Mise à jour sur le projet "Santé Communautaire"',
-                'date': datetime.now() - timedelta(days=2),
-                'icon': 'fa-bell'
-            }
-        ]
-        return activities
-
-    def _get_user_notifications(self, user):
-        """Récupère les notifications pour l'utilisateur."""
-        # Simulation de notifications - à implémenter avec un système de notifications
-        notifications = [
-            {
-                'type': 'info',
-                'title': 'Nouveau projet disponible',
-                'message': 'Un nouveau projet dans votre région est maintenant disponible.',
-                'date': datetime.now() - timedelta(hours=6),
-                'read': False
-            },
-            {
-                'type': 'success',
-                'title': 'Projet terminé avec succès',
-                'message': 'Le projet "Infrastructure Rurale" a été terminé avec succès.',
-                'date': datetime.now() - timedelta(days=3),
-                'read': True
-            },
-            {
-                'type': 'warning',
-                'title': 'Mise à jour requise',
-                'message': 'Veuillez mettre à jour vos informations de profil.',
-                'date': datetime.now() - timedelta(days=7),
-                'read': False
-            }
-        ]
-        return notifications
-
-    def _get_recommended_projects(self, user, user_projects):
-        """Récupère les projets recommandés pour l'utilisateur."""
-        Project = request.env['sama.promis.project'].sudo()
+    def _get_user_recent_activity(self, user, limit=ACTIVITY_LIMIT):
+        """
+        Activité récente de l'utilisateur: projets suivis et notifications reçues.
         
-        # Recommandations basées sur les types de projets de l'utilisateur
-        user_project_types = list(set(p.project_type for p in user_projects))
+        Deux lectures limitées et indexées par partenaire, fusionnées par date.
+        """
+        partner = user.partner_id
+        Follower = request.env['sama.promis.project.follower'].sudo()
+        activities = [{
+            'type': 'project_follow',
+            'title': 'Suivi de projet',
+            'description': f'Vous suivez maintenant le projet "{follow.project_id.name}"',
+            'date': follow.create_date,
+            'icon': 'fa-heart',
+        } for follow in Follower.search([('partner_id', '=', partner.id)], limit=limit)]
+        
+        inbox = request.env['sama.promis.citizen.notification'].get_inbox(partner.id, page_size=limit)
+        activities += [{
+            'type': 'notification',
+            'title': notification['title'],
+            'description': notification['message'],
+            'date': notification['date'],
+            'icon': notification['icon'],
+        } for notification in inbox['notifications']]
+        
+        return sorted(activities, key=lambda activity: activity['date'], reverse=True)[:limit]
+
+    def _get_user_notifications(self, user, page=1):
+        """Page de la boîte de notifications de l'utilisateur."""
+        return request.env['sama.promis.citizen.notification'].get_inbox(user.partner_id.id, page=page)
+
+    def _get_recommended_projects(self, user, user_projects, followed_projects=None):
+        """Récupère les projets recommandés pour l'utilisateur (hors projets déjà suivis)."""
+        Project = request.env['sama.promis.project'].sudo()
+        followed_ids = followed_projects.ids if followed_projects else []
         
-        recommended = Project.search([
-            ('state', 'in', ['approved', 'in_progress']),
-            ('project_type', 'in', user_project_types),
-            ('id', 'not in', [p.id for p in user_projects])
-        ], limit=4, order='create_date desc')
+        # Voisins précalculés des projets de l'utilisateur et de ceux qu'il suit (index de similarité)
+        recommended = request.env['sama.promis.project.similarity'].get_neighbours(
+            [p.id for p in user_projects] + followed_ids, limit=4
+        ).filtered(lambda p: p.state in ('approved', 'in_progress'))
         
-        # Si pas assez de recommandations, ajouter des projets populaires
+        # Si pas assez de recommandations, ajouter les projets les plus suivis
         if len(recommended) < 4:
             additional = Project.search([
                 ('state', 'in', ['approved', 'in_progress']),
-                ('priority', 'in', ['high', 'urgent']),
-                ('id', 'not in', [p.id for p in user_projects] + recommended.ids)
-            ], limit=4 - len(recommended), order='total_budget desc')
+                ('id', 'not in', [p.id for p in user_projects] + followed_ids + recommended.ids)
+            ], limit=4 - len(recommended), order='follower_count desc, total_budget desc')
             recommended = recommended + additional
         
         return recommended
@@ -227,16 +216,16 @@ class CitizenPortalController(http.Controller):
     def follow_project(self, project_id, **kw):
         """Permet à un utilisateur de suivre un projet."""
         Project = request.env['sama.promis.project'].sudo()
-        project = Project.browse(project_id)
+        project = Project.search(Project._get_public_domain() + [('id', '=', project_id)])
         
-        if not project.exists():
+        if not project:
             return {'success': False, 'message': 'Projet non trouvé'}
         
-        # Ici, implémenter la logique de suivi
-        # Pour l'instant, simulation
+        request.env['sama.promis.project.follower'].sudo().follow(request.env.user.partner_id.id, project.ids)
         return {
             'success': True, 
-            'message': f'Vous suivez maintenant le projet "{project.name}"'
+            'message': f'Vous suivez maintenant le projet "{project.name}"',
+            'follower_count': project.follower_count,
         }
 
     @http.route(['/promispublic/citizen/unfollow/<int:project_id>'], 
@@ -249,18 +238,26 @@ class CitizenPortalController(http.Controller):
         if not project.exists():
             return {'success': False, 'message': 'Projet non trouvé'}
         
-        # Ici, implémenter la logique de désuivi
+        request.env['sama.promis.project.follower'].sudo().unfollow(request.env.user.partner_id.id, project.ids)
         return {
             'success': True, 
-            'message': f'Vous ne suivez plus le projet "{project.name}"'
+            'message': f'Vous ne suivez plus le projet "{project.name}"',
+            'follower_count': project.follower_count,
         }
 
     @http.route(['/promispublic/citizen/notifications/mark_read'], 
                 type='json', auth="user", website=True)
     def mark_notifications_read(self, notification_ids=None, **kw):
-        """Marque les notifications comme lues."""
-        # Ici, implémenter la logique de marquage des notifications
-        return {'success': True, 'message': 'Notifications marquées comme lues'}
+        """Marque les notifications comme lues (toutes si `notification_ids` est absent)."""
+        Notification = request.env['sama.promis.citizen.notification']
+        partner_id = request.env.user.partner_id.id
+        marked = Notification.mark_read(partner_id, notification_ids)
+        return {
+            'success': True,
+            'message': 'Notifications marquées comme lues',
+            'marked': marked,
+            'unread_count': Notification.get_unread_count(partner_id),
+        }
 
     @http.route(['/promispublic/citizen/profile'], 
                 type='http', auth="user", website=True)
@@ -297,28 +294,12 @@ class CitizenPortalController(http.Controller):
     @http.route(['/promispublic/citizen/api/stats'], 
                 type='json', auth="user", website=True)
     def get_citizen_stats(self, **kw):
-        """API pour récupérer les statistiques du citoyen."""
-        user = request.env.user
-        Project = request.env['sama.promis.project'].sudo()
-        
-        # Projets liés à l'utilisateur
-        user_projects = []
-        if user.partner_id:
-            user_projects = Project.search([
-                '|',
-                ('partner_id', '=', user.partner_id.id),
-                ('implementing_partner_ids', 'in', [user.partner_id.id])
-            ])
-        
-        stats = {
-            'my_projects': len(user_projects),
-            'active_projects': len([p for p in user_projects if p.state == 'in_progress']),
-            'completed_projects': len([p for p in user_projects if p.state == 'completed']),
-            'total_budget': sum(p.total_budget for p in user_projects),
-            'notifications_count': 3,  # Simulation
-            'following_count': 5,  # Simulation
-        }
-        
+        """API pour récupérer les statistiques du citoyen (cache par partenaire)."""
+        partner = request.env.user.partner_id
+        stats = partner.get_promis_citizen_stats()
+        # Hors cache: la distribution des notifications ne passe pas par les écritures ORM;
+        # le compteur est lu sur l'index partiel des notifications non lues
+        stats['notifications_count'] = request.env['sama.promis.citizen.notification'].get_unread_count(partner.id)
         return stats
 
     # =========================================================================
@@ -328,7 +309,7 @@ class CitizenPortalController(http.Controller):
     @http.route(['/my/promis', '/my/promis/page/<int:page>'], 
                 type='http', auth='user', website=True)
     def requestor_portal_dashboard(self, page=1, **kw):
-        """Main requestor portal dashboard."""
+        """Main requestor portal dashboard (figures aggregated per model)."""
         user = request.env.user
         
         # Check portal access
@@ -339,89 +320,13 @@ class CitizenPortalController(http.Controller):
         if not partner:
             return request.not_found()
         
-        Project = request.env['sama.promis.project'].sudo()
-        Contract = request.env['sama.promis.contract'].sudo()
-        ComplianceTask = request.env['sama.promis.compliance.task'].sudo()
-        Payment = request.env['sama.promis.payment'].sudo()
-        
-        # Get user's projects
-        projects = Project.search([
-            '|', '|',
-            ('partner_id', '=', partner.id),
-            ('implementing_partner_ids', 'in', [partner.id]),
-            ('donor_id', '=', partner.id)
-        ])
-        
-        # Get user's contracts
-        contracts = Contract.search([
-            ('contractor_id', '=', partner.id)
-        ])
-        
-        # Get user's compliance tasks
-        compliance_tasks = ComplianceTask.search([
-            ('responsible_id', '=', partner.id)
-        ])
-        
-        # Get user's payments
-        payments = Payment.search([
-            ('beneficiary_id', '=', partner.id)
-        ])
-        
-        # Calculate statistics
-        stats = {
-            'total_projects': len(projects),
-            'active_projects': len(projects.filtered(lambda p: p.state == 'in_progress')),
-            'total_contracts': len(contracts),
-            'active_contracts': len(contracts.filtered(lambda c: c.state in ['draft', 'in_progress'])),
-            'pending_tasks': len(compliance_tasks.filtered(lambda t: t.state in ['pending', 'in_progress'])),
-            'overdue_tasks': len(compliance_tasks.filtered(lambda t: t.state == 'overdue')),
-            'total_received': sum(payments.filtered(lambda p: p.state == 'paid').mapped('amount')),
-            'pending_payments': sum(payments.filtered(lambda p: p.state in ['pending', 'approved']).mapped('amount')),
-        }
-        
-        # Recent activity
-        recent_activity = []
-        
-        # Add recent projects
-        for project in projects.sorted('create_date', reverse=True)[:3]:
-            recent_activity.append({
-                'type': 'project',
-                'title': f'Projet: {project.name}',
-                'date': project.create_date,
-                'icon': 'fa-project-diagram',
-                'url': f'/my/promis/projects'
-            })
-        
-        # Add recent payments
-        for payment in payments.sorted('payment_date', reverse=True)[:3]:
-            recent_activity.append({
-                'type': 'payment',
-                'title': f'Paiement: {payment.amount} FCFA',
-                'date': payment.payment_date,
-                'icon': 'fa-money-bill',
-                'url': f'/my/promis/payments'
-            })
-        
-        # Sort by date
-        recent_activity = sorted(recent_activity, key=lambda x: x['date'], reverse=True)[:10]
-        
-        # Upcoming deadlines
-        upcoming_deadlines = compliance_tasks.filtered(
-            lambda t: t.deadline and t.deadline >= fields.Date.today() and t.state != 'completed'
-        ).sorted('deadline')[:5]
-        
-        values = {
-            'user': user,
-            'partner': partner,
-            'projects': projects[:6],
-            'contracts': contracts[:6],
-            'compliance_tasks': compliance_tasks[:6],
-            'payments': payments[:6],
-            'stats': stats,
-            'recent_activity': recent_activity,
-            'upcoming_deadlines': upcoming_deadlines,
-            'page_title': 'Mon Portail PROMIS',
-        }
+        # Grouped figures and limited, ordered reads: constant query count
+        values = dict(
+            partner.get_promis_portal_dashboard(user),
+            user=user,
+            partner=partner,
+            page_title='Mon Portail PROMIS',
+        )
         
         return request.render('sama_promis.requestor_portal_dashboard', values)
 
@@ -572,40 +477,101 @@ class CitizenPortalController(http.Controller):
         
         return request.render('sama_promis.requestor_payments', values)
 
+    def _get_requestor_task(self, task_id):
+        """Compliance task of the current user, or an empty recordset."""
+        try:
+            task = request.env['sama.promis.compliance.task'].sudo().browse(int(task_id))
+        except (TypeError, ValueError):
+            return request.env['sama.promis.compliance.task']
+        if not task.exists() or task.responsible_id != request.env.user:
+            return request.env['sama.promis.compliance.task']
+        return task
+
+    def _get_upload_session(self, upload_id):
+        """Upload session of the current user, or an empty recordset."""
+        return request.env['sama.promis.document.upload'].sudo().search([
+            ('token', '=', upload_id),
+            ('user_id', '=', request.env.uid),
+        ], limit=1)
+
     @http.route(['/my/promis/upload'], type='http', auth='user', methods=['POST'], csrf=True)
     def requestor_upload_document(self, **kw):
-        """Handle document upload for compliance tasks."""
-        user = request.env.user
-        partner = user.partner_id
-        
-        if not partner:
-            return request.redirect('/my/promis')
-        
+        """Handle a single-request document upload for compliance tasks (form post)."""
         task_id = kw.get('task_id')
         uploaded_file = kw.get('file')
         
         if not task_id or not uploaded_file:
             return request.redirect('/my/promis/compliance?error=missing_data')
         
-        ComplianceTask = request.env['sama.promis.compliance.task'].sudo()
-        task = ComplianceTask.browse(int(task_id))
-        
-        if not task.exists() or task.responsible_id != partner:
+        task = self._get_requestor_task(task_id)
+        if not task:
             return request.redirect('/my/promis/compliance?error=unauthorized')
         
-        # Save the file as attachment
-        Attachment = request.env['ir.attachment'].sudo()
-        attachment = Attachment.create({
-            'name': uploaded_file.filename,
-            'datas': uploaded_file.read(),
-            'res_model': 'sama.promis.compliance.task',
-            'res_id': task.id,
-        })
+        # Streamed to the filestore in blocks, hashed on the way, deduplicated by checksum
+        try:
+            request.env['sama.promis.document.upload'].upload_stream(
+                task, uploaded_file.filename, uploaded_file.stream, uploaded_file.mimetype)
+        except ValidationError:
+            return request.redirect('/my/promis/compliance?error=invalid_file')
         
-        # Send notification to admin
-        # TODO: Implement notification system
-        
-        return request.redirect(f'/my/promis/compliance?success=uploaded')
+        return request.redirect('/my/promis/compliance?success=uploaded')
+
+    @http.route(['/my/promis/upload/start'], type='json', auth='user')
+    def requestor_upload_start(self, task_id=None, filename=None, size=None, checksum=None, mimetype=None, **kw):
+        """
+        Open a resumable chunked upload.
+
+        The client then sends the file in chunks of at most `chunk_size`
+        bytes to `/my/promis/upload/<upload_id>`, starting at `offset`.
+        The optional `checksum` (SHA-1) is checked against the received file.
+        """
+        task = self._get_requestor_task(task_id)
+        if not task:
+            return {'error': 'unauthorized'}
+        if not filename or not isinstance(size, int):
+            return {'error': 'missing_data'}
+        try:
+            session = request.env['sama.promis.document.upload'].start_upload(
+                task, filename, size, checksum=checksum, mimetype=mimetype)
+        except ValidationError as error:
+            return {'error': 'invalid_file', 'message': str(error)}
+        return session.get_status()
+
+    @http.route(['/my/promis/upload/<string:upload_id>'], type='http', auth='user', methods=['GET'])
+    def requestor_upload_status(self, upload_id, **kw):
+        """Current offset of an upload, to resume it after an interruption."""
+        session = self._get_upload_session(upload_id)
+        if not session:
+            return request.make_json_response({'error': 'not_found'}, status=404)
+        return request.make_json_response(session.get_status())
+
+    @http.route(['/my/promis/upload/<string:upload_id>'], type='http', auth='user', methods=['POST'], csrf=True)
+    def requestor_upload_chunk(self, upload_id, offset=None, **kw):
+        """
+        Receive one chunk of an upload (raw request body).
+
+        The chunk position comes from the `Content-Range: bytes start-end/total`
+        header, or from the `offset` query parameter. A chunk that does not
+        start at the current offset is rejected with 409 and the offset to
+        resume from.
+        """
+        session = self._get_upload_session(upload_id)
+        if not session:
+            return request.make_json_response({'error': 'not_found'}, status=404)
+        
+        httprequest = request.httprequest
+        length = httprequest.content_length or 0
+        content_range = parse_content_range_header(httprequest.headers.get('Content-Range'))
+        try:
+            start = content_range.start if content_range else int(offset)
+        except (TypeError, ValueError):
+            return request.make_json_response({'error': 'missing_offset'}, status=400)
+        
+        try:
+            accepted = session.write_chunk(start, httprequest.stream, length)
+        except ValidationError as error:
+            return request.make_json_response({'error': 'invalid_chunk', 'message': str(error)}, status=413)
+        return request.make_json_response(session.get_status(), status=200 if accepted else 409)
 
     @http.route(['/my/promis/notifications'], type='http', auth='user', website=True)
     def requestor_notifications(self, **kw):
@@ -718,28 +684,10 @@ class CitizenPortalController(http.Controller):
         if not partner:
             return {}
         
-        Project = request.env['sama.promis.project'].sudo()
-        Contract = request.env['sama.promis.contract'].sudo()
-        ComplianceTask = request.env['sama.promis.compliance.task'].sudo()
-        Payment = request.env['sama.promis.payment'].sudo()
-        
-        projects = Project.search([
-            '|', '|',
-            ('partner_id', '=', partner.id),
-            ('implementing_partner_ids', 'in', [partner.id]),
-            ('donor_id', '=', partner.id)
-        ])
-        
-        contracts = Contract.search([('contractor_id', '=', partner.id)])
-        tasks = ComplianceTask.search([('responsible_id', '=', partner.id)])
-        payments = Payment.search([('beneficiary_id', '=', partner.id)])
-        
+        stats = partner.get_promis_portal_stats(user)
         return {
-            'total_projects': len(projects),
-            'active_projects': len(projects.filtered(lambda p: p.state == 'in_progress')),
-            'total_contracts': len(contracts),
-            'pending_tasks': len(tasks.filtered(lambda t: t.state in ['pending', 'in_progress'])),
-            'total_received': sum(payments.filtered(lambda p: p.state == 'paid').mapped('amount')),
+            key: stats[key]
+            for key in ('total_projects', 'active_projects', 'total_contracts', 'pending_tasks', 'total_received')
         }
 
     @http.route(['/my/promis/api/notifications'], type='json', auth='user')
@@ -751,30 +699,20 @@ class CitizenPortalController(http.Controller):
         if not partner:
             return {'count': 0, 'notifications': []}
         
-        # TODO: Implement actual notification system
-        # For now, return mock data
-        notifications = [
-            {
-                'id': 1,
-                'type': 'info',
-                'title': 'Nouvelle tâche de conformité',
-                'message': 'Une nouvelle tâche vous a été assignée',
-                'date': fields.Datetime.now().isoformat(),
-                'read': False
-            },
-            {
-                'id': 2,
-                'type': 'success',
-                'title': 'Paiement effectué',
-                'message': 'Un paiement a été effectué sur votre compte',
-                'date': fields.Datetime.now().isoformat(),
-                'read': False
-            }
-        ]
+        # Citizen notification inbox of the partner
+        try:
+            page = int(kw.get('page', 1))
+        except (TypeError, ValueError):
+            page = 1
+        inbox = request.env['sama.promis.citizen.notification'].get_inbox(partner.id, page=page)
         
         return {
-            'count': len([n for n in notifications if not n['read']]),
-            'notifications': notifications
+            'count': inbox['unread_count'],
+            'has_more': inbox['has_more'],
+            'notifications': [
+                dict(notification, date=fields.Datetime.to_string(notification['date']))
+                for notification in inbox['notifications']
+            ],
         }
 
     @http.route(['/my/promis/api/tasks'], type='json', auth='user')
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS Public Portal - Réponses Conditionnelles
+====================================================
+
+ETag des pages et API publiques, dérivés des versions des jeux de données
+publiés (voir `sama.promis.public.stats`).
+
+Un client (navigateur, CDN, script de polling) qui renvoie l'ETag reçu dans
+`If-None-Match` obtient un `304 Not Modified` sans qu'aucune requête ORM ne
+soit exécutée: seule la lecture des compteurs de modifications est faite.
+
+Les mêmes versions composent les clés `t-cache` des fragments QWeb.
+"""
+
+import functools
+import hashlib
+from datetime import date
+
+from odoo.http import request
+
+from odoo.addons.sama_promis.models.open_data import PUBLIC_OPEN_DATA, read_open_data_version
+from odoo.addons.sama_promis.models.public_stats import (
+    PUBLIC_SNAPSHOT, read_public_data_versions, read_public_snapshot_version,
+)
+
+
+def public_data_stamp(datasets):
+    """
+    Empreinte des données publiées utilisées par une réponse.
+
+    Combine le jour (dates relatives, progression des projets) et la
+    version de chaque jeu de données. Les réponses servies depuis
+    l'instantané public déclarent aussi `PUBLIC_SNAPSHOT`: le compteur d'un
+    jeu de données change dès le commit, l'instantané seulement après son
+    recalcul par le cron. De même, `PUBLIC_OPEN_DATA` suit les fichiers
+    Open Data générés plutôt que leurs données sources.
+
+    Args:
+        datasets (tuple): Jeux de données concernés
+
+    Returns:
+        str: Empreinte lisible, ex. "2025-01-31|funding:4,projects:12,snapshot:57@1706700000"
+    """
+    versions = read_public_data_versions(request.env.cr, list(datasets))
+    if PUBLIC_SNAPSHOT in datasets:
+        versions[PUBLIC_SNAPSHOT] = read_public_snapshot_version(request.env.cr)
+    if PUBLIC_OPEN_DATA in datasets:
+        versions[PUBLIC_OPEN_DATA] = read_open_data_version(request.env.cr)
+    return '%s|%s' % (
+        date.today().isoformat(),
+        ','.join('%s:%s' % (dataset, versions.get(dataset, 0)) for dataset in sorted(datasets)),
+    )
+
+
+def fragment_cache_key(datasets, **params):
+    """
+    Clé `t-cache` des blocs QWeb coûteux du portail public.
+
+    Les fragments rendus sont conservés dans le cache des templates
+    `ir.qweb` (LRU borné, propre à chaque worker); une nouvelle version
+    des données produit une nouvelle clé, l'ancienne entrée est évincée.
+
+    Args:
+        datasets (tuple): Jeux de données affichés par le bloc
+        **params: Identifiants et filtres qui déterminent le contenu
+
+    Returns:
+        tuple: Clé hachable
+    """
+    website = getattr(request, 'website', None)
+    return (
+        public_data_stamp(datasets),
+        request.env.context.get('lang') or '',
+        website.id if website else None,
+        tuple(sorted((key, str(value)) for key, value in params.items())),
+    )
+
+
+def public_etag(datasets):
+    """
+    Calcule l'ETag fort de la requête courante.
+
+    La clé couvre l'URL et ses paramètres, la langue, le site web, le jour
+    (dates relatives comme "événements à venir") et la version de chaque
+    jeu de données utilisé par la route.
+
+    Args:
+        datasets (tuple): Jeux de données dont dépend la réponse
+
+    Returns:
+        str: Empreinte (sans guillemets)
+    """
+    httprequest = request.httprequest
+    website = getattr(request, 'website', None)
+    key = '\n'.join([
+        httprequest.path,
+        '&'.join('%s=%s' % item for item in sorted(httprequest.args.items(multi=True))),
+        request.env.context.get('lang') or '',
+        str(website.id if website else ''),
+        public_data_stamp(datasets),
+    ])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _cache_headers(etag, cache_control):
+    return [
+        ('ETag', '"%s"' % etag),
+        ('Cache-Control', cache_control),
+    ]
+
+
+# Pages HTML: jeton CSRF lié à la session, pas de stockage par un cache partagé
+PAGE_CACHE_CONTROL = 'private, no-cache'
+# API JSON / exports: identiques pour tous les visiteurs anonymes
+API_CACHE_CONTROL = 'public, no-cache'
+
+
+def conditional_response(*datasets, cache_control=PAGE_CACHE_CONTROL):
+    """
+    Décorateur de route publique: ETag + réponse 304 sur `If-None-Match`.
+
+    À placer sous `@http.route`. Seules les requêtes GET/HEAD des visiteurs
+    anonymes sont concernées: les pages d'un utilisateur connecté peuvent
+    contenir des données personnelles non couvertes par les versions.
+
+    Args:
+        datasets: Jeux de données dont dépend la réponse
+        cache_control (str): En-tête Cache-Control (revalidation systématique)
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, *args, **kw):
+            httprequest = request.httprequest
+            if request.session.uid or httprequest.method not in ('GET', 'HEAD'):
+                return handler(self, *args, **kw)
+
+            etag = public_etag(datasets)
+            headers = _cache_headers(etag, cache_control)
+            if httprequest.if_none_match.contains(etag):
+                return request.make_response(b'', headers=headers, status=304)
+
+            response = handler(self, *args, **kw)
+            if getattr(response, 'status_code', None) == 200:
+                response.headers.update(headers)
+            return response
+        return wrapper
+    return decorator
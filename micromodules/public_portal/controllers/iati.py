@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS Public Portal - Flux d'Activités IATI
+=================================================
+
+Flux XML des projets publics au format des activités IATI (norme 2.03),
+demandé par les bailleurs (Banque Mondiale, UE, AFD...): projets, sources
+de financement (engagements et fonds reçus) et décaissements.
+
+Le document est écrit au fil de l'eau par un `XMLGenerator`, un lot de
+projets à la fois: la mémoire utilisée ne dépend pas de la taille du
+portefeuille. Le filtre `modified_since` permet une collecte incrémentale.
+"""
+
+import io
+from xml.sax.saxutils import XMLGenerator
+
+from odoo import fields
+from odoo.tools import html2plaintext
+
+IATI_VERSION = '2.03'
+
+# Projets lus par lot
+IATI_BATCH_SIZE = 200
+
+IATI_PROJECT_FIELDS = [
+    'reference', 'name', 'description', 'state', 'start_date', 'end_date', 'total_budget',
+    'currency_id', 'donor_id', 'partner_id', 'region', 'write_date',
+]
+
+# Statut d'activité IATI (ActivityStatus) par état de projet
+IATI_ACTIVITY_STATUS = {
+    'approved': '1',     # Pipeline/identification
+    'in_progress': '2',  # Implementation
+    'completed': '3',    # Finalisation
+}
+
+# Rôles des organisations participantes (OrganisationRole)
+IATI_ROLE_FUNDING = '1'
+IATI_ROLE_IMPLEMENTING = '4'
+
+# Types de transaction (TransactionType)
+IATI_TRANSACTION_INCOMING_FUNDS = '1'
+IATI_TRANSACTION_DISBURSEMENT = '3'
+IATI_TRANSACTION_INCOMING_COMMITMENT = '11'
+
+
+def iati_domain(Project, modified_since=None, **filters):
+    """
+    Domaine des projets du flux.
+
+    Args:
+        Project: Modèle `sama.promis.project`
+        modified_since (datetime): Ne retenir que les projets modifiés depuis
+            cette date, y compris par leurs financements ou paiements
+        **filters: Filtres habituels du portail
+
+    Returns:
+        list: Domaine de recherche
+    """
+    domain = Project._get_public_domain(**filters)
+    if modified_since:
+        domain += [
+            '|', '|',
+            ('write_date', '>=', modified_since),
+            ('funding_source_ids', 'any', [('write_date', '>=', modified_since)]),
+            ('payment_ids', 'any', [('write_date', '>=', modified_since)]),
+        ]
+    return domain
+
+
+def _iso_date(value):
+    return value.isoformat() if value else None
+
+
+class _ActivityWriter:
+    """Écriture SAX des éléments IATI dans un tampon vidé après chaque lot."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.xml = XMLGenerator(self.buffer, encoding='utf-8', short_empty_elements=True)
+
+    def flush(self):
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def start(self, name, **attrs):
+        self.xml.startElement(name, {key.replace('_', '-'): str(value) for key, value in attrs.items()
+                                     if value not in (None, False, '')})
+
+    def end(self, name):
+        self.xml.endElement(name)
+
+    def element(self, name, text=None, **attrs):
+        self.start(name, **attrs)
+        if text is not None:
+            self.xml.characters(str(text))
+        self.end(name)
+
+    def narrative(self, name, text, **attrs):
+        if not text:
+            return
+        self.start(name, **attrs)
+        self.element('narrative', text)
+        self.end(name)
+
+    def value(self, amount, currency, value_date):
+        self.element('value', amount or 0.0, currency=currency, value_date=_iso_date(value_date))
+
+    def transaction(self, code, transaction_date, amount, currency, provider=None):
+        self.start('transaction')
+        self.element('transaction-type', code=code)
+        self.element('transaction-date', iso_date=_iso_date(transaction_date))
+        self.value(amount, currency, transaction_date)
+        if provider:
+            self.narrative('provider-org', provider)
+        self.end('transaction')
+
+
+def iter_iati_xml(env, batches):
+    """
+    Génère le document `iati-activities` (octets UTF-8), lot par lot.
+
+    Pour chaque lot de projets, les sources de financement et les paiements
+    sont lus en une requête chacun.
+
+    Args:
+        env: Environnement (superutilisateur)
+        batches (iterable): Lots de lignes `search_read` des projets
+            (champs `IATI_PROJECT_FIELDS`)
+    """
+    company = env.company
+    company_currency = company.currency_id.name
+    country_code = company.country_id.code or 'SN'
+    writer = _ActivityWriter()
+
+    writer.xml.startDocument()
+    writer.start('iati-activities', version=IATI_VERSION,
+                 generated_datetime=fields.Datetime.now().isoformat() + 'Z')
+    yield writer.flush()
+
+    for rows in batches:
+        project_ids = [row['id'] for row in rows]
+        sources = {}
+        for source in env['sama.promis.project.funding.source'].search_read(
+            [('project_id', 'in', project_ids), ('state', '!=', 'cancelled')],
+            ['project_id', 'partner_id', 'amount', 'currency_id', 'state', 'commitment_date', 'received_date',
+             'write_date'],
+            order='sequence, id',
+        ):
+            sources.setdefault(source['project_id'][0], []).append(source)
+        payments = {}
+        for payment in env['sama.promis.payment.request'].search_read(
+            [('project_id', 'in', project_ids), ('state', 'in', ('approved', 'paid'))],
+            ['project_id', 'amount', 'currency_id', 'payment_date', 'request_date', 'write_date'],
+            order='request_date, id',
+        ):
+            payments.setdefault(payment['project_id'][0], []).append(payment)
+
+        for row in rows:
+            project_sources = sources.get(row['id'], [])
+            project_payments = payments.get(row['id'], [])
+            currency = row['currency_id'][1] if row['currency_id'] else company_currency
+            last_updated = max(
+                [row['write_date']] + [line['write_date'] for line in project_sources + project_payments]
+            )
+
+            writer.start('iati-activity', last_updated_datetime=last_updated.isoformat() + 'Z',
+                         default_currency=currency)
+            writer.element('iati-identifier', row['reference'] or 'SAMA-PROMIS-%s' % row['id'])
+            writer.narrative('reporting-org', company.name, ref=company.company_registry or company.vat, type='10')
+            writer.narrative('title', row['name'])
+            writer.narrative('description', html2plaintext(row['description'] or '').strip(), type='1')
+
+            funders = [row['donor_id'][1]] if row['donor_id'] else []
+            for source in project_sources:
+                if source['partner_id'] and source['partner_id'][1] not in funders:
+                    funders.append(source['partner_id'][1])
+            for funder in funders:
+                writer.narrative('participating-org', funder, role=IATI_ROLE_FUNDING)
+            if row['partner_id']:
+                writer.narrative('participating-org', row['partner_id'][1], role=IATI_ROLE_IMPLEMENTING)
+
+            writer.element('activity-status', code=IATI_ACTIVITY_STATUS.get(row['state'], '2'))
+            writer.element('activity-date', type='1', iso_date=_iso_date(row['start_date']))
+            writer.element('activity-date', type='3', iso_date=_iso_date(row['end_date']))
+            writer.element('recipient-country', code=country_code, percentage='100')
+            if row['region']:
+                writer.start('location')
+                writer.narrative('name', row['region'])
+                writer.end('location')
+
+            if row['start_date'] and row['end_date']:
+                writer.start('budget', type='1', status='2')
+                writer.element('period-start', iso_date=_iso_date(row['start_date']))
+                writer.element('period-end', iso_date=_iso_date(row['end_date']))
+                writer.value(row['total_budget'], currency, row['start_date'])
+                writer.end('budget')
+
+            for source in project_sources:
+                source_currency = source['currency_id'][1] if source['currency_id'] else currency
+                provider = source['partner_id'][1] if source['partner_id'] else None
+                if source['state'] == 'received' and source['received_date']:
+                    writer.transaction(IATI_TRANSACTION_INCOMING_FUNDS, source['received_date'],
+                                       source['amount'], source_currency, provider)
+                elif source['commitment_date']:
+                    writer.transaction(IATI_TRANSACTION_INCOMING_COMMITMENT, source['commitment_date'],
+                                       source['amount'], source_currency, provider)
+            for payment in project_payments:
+                writer.transaction(IATI_TRANSACTION_DISBURSEMENT, payment['payment_date'] or payment['request_date'],
+                                   payment['amount'],
+                                   payment['currency_id'][1] if payment['currency_id'] else currency)
+            writer.end('iati-activity')
+        yield writer.flush()
+
+    writer.end('iati-activities')
+    writer.xml.endDocument()
+    yield writer.flush() + b'\n'
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS Public Portal - Instrumentation des Routes
+======================================================
+
+Mesure, route par route, du coût des requêtes du portail: nombre de
+requêtes SQL, temps SQL, temps Python (rendu QWeb compris) et taille de
+la réponse.
+
+Désactivée par défaut; activée par le paramètre système
+`sama_promis.route_instrumentation`. Désactivée, elle ne coûte qu'une
+lecture du cache des paramètres par requête.
+
+Les mesures sont renvoyées dans l'en-tête `Server-Timing` et cumulées en
+mémoire, puis fusionnées toutes les `ROUTE_TIMING_FLUSH_INTERVAL`
+secondes dans l'histogramme horaire `sama.promis.route.timing`.
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+
+from odoo import api, fields, SUPERUSER_ID
+from odoo.http import request, Response
+from odoo.tools import str2bool
+
+from odoo.addons.sama_promis.models.route_timing import ROUTE_TIMING_SUM_FIELDS, route_timing_bucket
+
+_logger = logging.getLogger(__name__)
+
+# Paramètre système activant l'instrumentation
+ROUTE_TIMING_PARAM = 'sama_promis.route_instrumentation'
+
+# Intervalle minimal entre deux écritures des mesures en base (secondes)
+ROUTE_TIMING_FLUSH_INTERVAL = 30
+
+# Mesures en attente d'écriture: {base: {(route, heure): cumul}}
+_pending = {}
+_pending_lock = threading.Lock()
+# Dernière écriture par base
+_last_flush = {}
+
+
+def _instrumentation_enabled():
+    # get_param est mis en cache par l'ORM: pas de requête SQL
+    return str2bool(request.env['ir.config_parameter'].sudo().get_param(ROUTE_TIMING_PARAM, 'False'), False)
+
+
+def _response_size(result):
+    """Taille (octets) de la réponse rendue; 0 si elle est diffusée sans longueur connue."""
+    if isinstance(result, Response):
+        if result.is_streamed:
+            return result.content_length or 0
+        return len(result.get_data())
+    if isinstance(result, (str, bytes)):
+        return len(result)
+    # Routes JSON-RPC: résultat sérialisé par le dispatcher
+    return len(json.dumps(result, default=str))
+
+
+def _server_timing(query_count, sql_time, python_time, size):
+    return 'sql;dur=%.1f;desc="%d queries", app;dur=%.1f, total;dur=%.1f, bytes;desc="%d"' % (
+        sql_time, query_count, python_time, sql_time + python_time, size,
+    )
+
+
+def _record(route, path, duration, sql_time, query_count, size):
+    """Cumule une mesure et écrit les mesures en attente si l'intervalle est écoulé."""
+    dbname = request.env.cr.dbname
+    period_start = fields.Datetime.now().replace(minute=0, second=0, microsecond=0)
+    with _pending_lock:
+        pending = _pending.setdefault(dbname, {})
+        sample = pending.get((route, period_start))
+        if sample is None:
+            sample = pending[(route, period_start)] = dict.fromkeys(ROUTE_TIMING_SUM_FIELDS, 0)
+            sample.update(path=path, max_duration=0.0)
+        sample['request_count'] += 1
+        sample['query_count'] += query_count
+        sample['duration'] += duration
+        sample['sql_time'] += sql_time
+        sample['python_time'] += duration - sql_time
+        sample['response_bytes'] += size
+        sample[route_timing_bucket(duration)] += 1
+        sample['max_duration'] = max(sample['max_duration'], duration)
+
+        now = time.monotonic()
+        if now - _last_flush.setdefault(dbname, now) < ROUTE_TIMING_FLUSH_INTERVAL:
+            return
+        _last_flush[dbname] = now
+        samples = _pending.pop(dbname)
+
+    # Curseur distinct: l'écriture ne dépend pas de la transaction de la requête
+    try:
+        with request.env.registry.cursor() as cr:
+            api.Environment(cr, SUPERUSER_ID, {})['sama.promis.route.timing']._merge_samples(samples)
+    except Exception:
+        _logger.warning("Impossible d'enregistrer les mesures des routes", exc_info=True)
+
+
+def _instrument(handler, route, path):
+    @functools.wraps(handler)
+    def wrapper(self, *args, **kw):
+        if not _instrumentation_enabled():
+            return handler(self, *args, **kw)
+
+        # Compteurs SQL du thread, remis à zéro par Odoo à chaque requête HTTP
+        thread = threading.current_thread()
+        queries_before = getattr(thread, 'query_count', 0)
+        sql_before = getattr(thread, 'query_time', 0.0)
+        started = time.perf_counter()
+
+        result = handler(self, *args, **kw)
+        if isinstance(result, Response) and result.is_qweb:
+            # Le rendu du gabarit fait partie du coût de la route
+            result.flatten()
+
+        duration = (time.perf_counter() - started) * 1000
+        query_count = getattr(thread, 'query_count', 0) - queries_before
+        sql_time = min((getattr(thread, 'query_time', 0.0) - sql_before) * 1000, duration)
+        size = _response_size(result)
+
+        header = _server_timing(query_count, sql_time, duration - sql_time, size)
+        if isinstance(result, Response):
+            result.headers['Server-Timing'] = header
+        else:
+            request.future_response.headers['Server-Timing'] = header
+        _record(route, path, duration, sql_time, query_count, size)
+        return result
+    return wrapper
+
+
+def instrument_routes(controller_class):
+    """
+    Décorateur de classe: instrumente toutes les routes d'un contrôleur.
+
+    Chaque méthode portant `@http.route` est enveloppée; l'enveloppe
+    conserve les attributs de routage lus par Odoo.
+    """
+    for name, method in list(vars(controller_class).items()):
+        routing = getattr(method, 'original_routing', None)
+        if routing is None:
+            continue
+        path = (routing.get('routes') or [''])[0]
+        setattr(controller_class, name, _instrument(method, '%s.%s' % (controller_class.__name__, name), path))
+    return controller_class
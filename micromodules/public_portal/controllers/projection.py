@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS Public Portal - Projection des Champs
+=================================================
+
+Sélection des champs renvoyés par les API JSON publiques (`fields=`).
+
+Chaque ressource publie une liste blanche de clés JSON, chacune associée
+au champ du modèle qui l'alimente: seules les colonnes nécessaires aux
+clés demandées sont lues (`search_read` / `read`), les noms des relations
+étant résolus en une lecture groupée par l'ORM.
+"""
+
+
+def _text(value):
+    return value or ''
+
+
+def _relation_name(value):
+    return value[1] if value else ''
+
+
+def _relation_id(value):
+    return value[0] if value else None
+
+
+def _iso_date(value):
+    return value.isoformat() if value else ''
+
+
+def _state_class(state):
+    return 'success' if state == 'completed' else 'info' if state == 'in_progress' else 'warning'
+
+
+# Mise en forme particulière: libellé de la valeur d'un champ de sélection
+SELECTION_LABEL = 'selection_label'
+
+
+def parse_fields(value, allowed, default):
+    """
+    Clés demandées par le paramètre `fields` (liste séparée par des virgules).
+
+    Args:
+        value (str): Valeur du paramètre (vide: clés par défaut)
+        allowed (iterable): Clés autorisées
+        default (iterable): Clés renvoyées sans paramètre
+
+    Returns:
+        list: Clés demandées, sans doublon, dans l'ordre donné
+
+    Raises:
+        ValueError: Clé hors de la liste blanche
+    """
+    if not value:
+        return list(default)
+    keys = list(dict.fromkeys(key.strip() for key in value.split(',') if key.strip()))
+    unknown = [key for key in keys if key not in allowed]
+    if unknown or not keys:
+        raise ValueError("Unknown fields: %s" % ', '.join(unknown))
+    return keys
+
+
+class FieldProjection:
+    """Liste blanche des clés JSON d'une ressource et des champs qui les alimentent."""
+
+    def __init__(self, spec, default):
+        """
+        Args:
+            spec (dict): {clé JSON: (champ du modèle, mise en forme ou None)}
+            default (list): Clés renvoyées sans paramètre `fields`
+        """
+        self.spec = spec
+        self.default = default
+
+    def parse(self, value):
+        """Clés demandées; lève ValueError pour une clé inconnue."""
+        return parse_fields(value, self.spec, self.default)
+
+    def read_fields(self, keys):
+        """Champs du modèle à lire pour produire `keys`."""
+        # Une liste vide ferait lire tous les champs
+        return sorted({self.spec[key][0] for key in keys}) or ['id']
+
+    def project(self, Model, rows, keys):
+        """
+        Met en forme des lignes `search_read` selon les clés demandées.
+
+        Args:
+            Model: Modèle lu (libellés des champs de sélection)
+            rows (list): Lignes lues avec `read_fields(keys)`
+            keys (list): Clés demandées
+        """
+        labels = {
+            field_name: dict(Model._fields[field_name]._description_selection(Model.env))
+            for key in keys
+            for field_name, formatter in [self.spec[key]]
+            if formatter == SELECTION_LABEL
+        }
+        items = []
+        for row in rows:
+            item = {}
+            for key in keys:
+                field_name, formatter = self.spec[key]
+                value = row[field_name]
+                if formatter == SELECTION_LABEL:
+                    value = labels[field_name].get(value, value)
+                elif formatter:
+                    value = formatter(value)
+                item[key] = value
+            items.append(item)
+        return items
+
+
+# Projets publics (API projets, recherche, zoom de la carte)
+PROJECT_PROJECTION = FieldProjection(
+    {
+        'id': ('id', None),
+        'name': ('name', None),
+        'code': ('reference', _text),
+        'reference': ('reference', _text),
+        'type': ('project_type', None),
+        'type_label': ('project_type', SELECTION_LABEL),
+        'state': ('state', None),
+        'state_label': ('state', SELECTION_LABEL),
+        'state_class': ('state', _state_class),
+        'budget': ('total_budget', None),
+        'progress': ('progress_percentage', None),
+        'donor': ('donor_id', _relation_name),
+        'donor_id': ('donor_id', _relation_id),
+        'region': ('region', _text),
+        'region_id': ('region_id', _relation_id),
+        'start_date': ('start_date', _iso_date),
+        'end_date': ('end_date', _iso_date),
+    },
+    default=[
+        'id', 'name', 'code', 'reference', 'type', 'state', 'state_label', 'state_class',
+        'budget', 'progress', 'donor', 'region', 'start_date', 'end_date',
+    ],
+)
+
+# Projets de la liste d'une région (zoom de la carte)
+MAP_PROJECT_DEFAULT = ['id', 'name', 'reference', 'state', 'budget', 'progress']
+
+# Propriétés des entités régionales de la carte
+MAP_REGION_PROPERTIES = ['code', 'name', 'project_count', 'total_budget', 'states', 'top_projects']
+
+# Clés des périodes de la timeline (`budget` active la somme des budgets)
+TIMELINE_BUCKET_KEYS = ['start', 'label', 'count', 'budget']
@@ -7,17 +7,131 @@ Contrôleur pour le dashboard public avec cartes, filtres et navigation moderne.
 Inspiré de SAMA ETAT avec les fonctionnalités spécifiques à SAMA PROMIS.
 """
 
-from odoo import http, fields
+from odoo import http, fields, api, SUPERUSER_ID
 from odoo.http import request
+from odoo.tools import lazy
 from datetime import datetime, timedelta
+import base64
+import binascii
+import csv
+import io
 import json
+import zlib
 
+from .http_cache import conditional_response, fragment_cache_key, API_CACHE_CONTROL
+from .single_flight import single_flight
+from .instrumentation import instrument_routes
+from .iati import IATI_BATCH_SIZE, IATI_PROJECT_FIELDS, iati_domain, iter_iati_xml
+from .projection import (
+    PROJECT_PROJECTION, MAP_PROJECT_DEFAULT, MAP_REGION_PROPERTIES, TIMELINE_BUCKET_KEYS, parse_fields,
+)
+from .typeahead import typeahead_registry
 
+# Nombre de projets lus par lot lors des exports
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_FIELDS = [
+    'reference', 'name', 'project_type', 'state', 'total_budget',
+    'donor_id', 'region', 'start_date', 'end_date',
+]
+
+# Filtres de l'export dynamique (formats CSV et JSON)
+EXPORT_FILTER_KEYS = ('project_type', 'donor_id', 'state', 'region', 'search', 'q')
+
+# Formats acceptés par /promispublic/export (ndjson: fichier Open Data complet)
+EXPORT_FORMATS = ('csv', 'json', 'ndjson')
+
+
+# Pagination de l'API projets
+API_MAX_PAGE_SIZE = 100
+
+
+def _encode_cursor(row):
+    """Curseur opaque de la page suivante: clé de tri du dernier projet lu."""
+    key = json.dumps({'id': row['id']})
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    """Décode un curseur de pagination; lève ValueError s'il est invalide."""
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))['id'])
+    except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error) as e:
+        raise ValueError("Invalid cursor: %s" % cursor) from e
+
+
+# Sections disponibles dans /promispublic/api/bundle
+BUNDLE_SECTIONS = ('stats', 'charts', 'timeline', 'map')
+
+
+def _iter_public_batches(Project, domain, field_names, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Parcourt les projets d'un domaine par lots (`search_read`, ordre des ids).
+    
+    Le cache ORM est vidé après chaque lot: la mémoire reste bornée.
+    """
+    last_id = 0
+    while True:
+        rows = Project.search_read(
+            domain + [('id', '>', last_id)],
+            field_names,
+            order='id',
+            limit=batch_size,
+        )
+        if not rows:
+            return
+        last_id = rows[-1]['id']
+        yield rows
+        Project.env.invalidate_all()
+
+
+def _region_feature(entry, properties=MAP_REGION_PROPERTIES):
+    """Entité GeoJSON (Point au centroïde) d'un agrégat régional."""
+    region = entry['region']
+    values = {
+        'code': region.code,
+        'name': region.name,
+        'project_count': entry['project_count'],
+        'total_budget': entry['total_budget'],
+        'states': entry['states'],
+        'top_projects': entry['top_projects'],
+    }
+    return {
+        'type': 'Feature',
+        'id': region.code,
+        'geometry': {
+            'type': 'Point',
+            'coordinates': [region.longitude, region.latitude],
+        },
+        'properties': {key: values[key] for key in properties},
+    }
+
+
+def _invalid_fields_response(allowed):
+    """Réponse 400 d'un paramètre `fields` hors de la liste blanche."""
+    return request.make_json_response({
+        'error': 'Paramètre fields invalide',
+        'allowed_fields': list(allowed),
+    }, status=400)
+
+
+def _gzip_stream(chunks):
+    """Compresse un flux d'octets au format gzip, morceau par morceau."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@instrument_routes
 class PromisPublicController(http.Controller):
     """Contrôleur pour le dashboard public PROMISPUBLIC."""
 
     @http.route(['/promispublic', '/promispublic/page/<int:page>'], 
                 type='http', auth="public", website=True)
+    @conditional_response('projects', 'funding', 'procurement', 'compliance', 'calls', 'events', 'snapshot')
     def promispublic_dashboard(self, page=1, **kw):
         """
         Dashboard public principal "PROMISPUBLIC".
@@ -34,118 +148,27 @@ class PromisPublicController(http.Controller):
         ProcurementPlan = request.env['sama.promis.procurement.plan'].sudo()
         CallForProposal = request.env['sama.promis.call.for.proposal'].sudo()
         Event = request.env['sama.promis.event'].sudo()
-        ComplianceTask = request.env['sama.promis.compliance.task'].sudo()
-        FundingSource = request.env['sama.promis.project.funding.source'].sudo()
-        
-        # Construction du domaine de recherche
-        domain = [('state', 'in', ['approved', 'in_progress', 'completed'])]  # Projets publics
-        
-        # Application des filtres
-        project_type = kw.get('project_type')
-        if project_type:
-            domain.append(('project_type', '=', project_type))
+        PublicStats = request.env['sama.promis.public.stats'].sudo()
         
-        donor_id = kw.get('donor_id')
-        if donor_id:
-            try:
-                domain.append(('donor_id', '=', int(donor_id)))
-            except ValueError:
-                pass
+        # Construction du domaine de recherche (projets publics + filtres)
+        domain = Project._get_public_domain(**kw)
         
-        state = kw.get('state')
-        if state:
-            domain.append(('state', '=', state))
+        # Statistiques globales (agrégation SQL groupée)
+        stats = Project.get_public_statistics(domain)
+        total_projects = stats['total_projects']
+        total_budget = stats['total_budget']
+        spent_budget = stats['spent_budget']
         
-        region = kw.get('region')
-        if region:
-            domain.append(('region', 'ilike', region))
-        
-        # Recherche textuelle
-        search = kw.get('search')
-        if search:
-            domain.extend([
-                '|', '|', '|',
-                ('name', 'ilike', search),
-                ('description', 'ilike', search),
-                ('objectives', 'ilike', search),
-                ('partner_id.name', 'ilike', search)
-            ])
-        
-        # Statistiques globales
-        total_projects = Project.search_count(domain)
-        all_projects = Project.search(domain)
-        
-        # Calcul des métriques
-        total_budget = sum(all_projects.mapped('total_budget'))
-        spent_budget = sum(all_projects.mapped('spent_amount'))
-        active_projects = len(all_projects.filtered(lambda p: p.state == 'in_progress'))
-        completed_projects = len(all_projects.filtered(lambda p: p.state == 'completed'))
-        
-        # Statistiques supplémentaires pour procurement, calls, events
-        procurement_plans = ProcurementPlan.search([('state', 'in', ['validated', 'in_execution', 'completed'])])
-        active_procurements = len(procurement_plans.filtered(lambda p: p.state == 'in_execution'))
-        
-        calls_for_proposals = CallForProposal.search([('state', 'in', ['open', 'evaluation'])])
-        open_calls = len(calls_for_proposals.filtered(lambda c: c.state == 'open'))
-        
-        upcoming_events = Event.search([('event_date', '>=', fields.Datetime.now())])
-        events_count = len(upcoming_events)
-        
-        # Compliance statistics
-        compliance_tasks = ComplianceTask.search([])
-        total_compliance = len(compliance_tasks)
-        completed_compliance = len(compliance_tasks.filtered(lambda t: t.state == 'completed'))
-        compliance_rate = (completed_compliance / total_compliance * 100) if total_compliance > 0 else 0
-        
-        # Funding sources breakdown
-        funding_sources = FundingSource.search([('project_id', 'in', all_projects.ids)])
-        international_funding = sum(funding_sources.filtered(lambda f: f.funding_origin == 'international').mapped('amount'))
-        local_funding = sum(funding_sources.filtered(lambda f: f.funding_origin == 'local').mapped('amount'))
-        
-        # Budget utilization by region
-        region_stats = {}
-        for region_name in set(all_projects.mapped('region')):
-            if region_name:
-                region_projects = all_projects.filtered(lambda p: p.region == region_name)
-                region_stats[region_name] = {
-                    'count': len(region_projects),
-                    'budget': sum(region_projects.mapped('total_budget'))
-                }
-        
-        # Statistiques par état
-        state_stats = {}
-        for state_value, state_label in Project._fields['state'].selection:
-            if state_value in ['approved', 'in_progress', 'completed']:
-                count = len(all_projects.filtered(lambda p: p.state == state_value))
-                state_stats[state_value] = {
-                    'label': state_label,
-                    'count': count,
-                    'percentage': (count / total_projects * 100) if total_projects > 0 else 0
-                }
-        
-        # Statistiques par type
-        type_stats = {}
-        for type_value, type_label in Project._fields['project_type'].selection:
-            count = len(all_projects.filtered(lambda p: p.project_type == type_value))
-            type_stats[type_value] = {
-                'label': type_label,
-                'count': count,
-                'percentage': (count / total_projects * 100) if total_projects > 0 else 0
-            }
+        # Indicateurs globaux précalculés (instantané public)
+        snapshot = PublicStats.get_snapshot()
         
-        # Statistiques par bailleur
-        donor_stats = []
-        donors = all_projects.mapped('donor_id')
-        for donor in donors:
-            donor_projects = all_projects.filtered(lambda p: p.donor_id == donor)
-            donor_budget = sum(donor_projects.mapped('total_budget'))
-            donor_stats.append({
-                'donor': donor,
-                'project_count': len(donor_projects),
-                'total_budget': donor_budget,
-                'percentage': (donor_budget / total_budget * 100) if total_budget > 0 else 0
-            })
-        donor_stats = sorted(donor_stats, key=lambda x: x['total_budget'], reverse=True)[:5]
+        # Éléments mis en avant pour procurement, calls, events
+        procurement_plans = ProcurementPlan.search(
+            [('state', 'in', ['validated', 'in_execution', 'completed'])], limit=6
+        )
+        calls_for_proposals = CallForProposal.search([('state', 'in', ['open', 'evaluation'])], limit=6)
+        upcoming_events = Event.search([('event_date', '>=', fields.Datetime.now())], limit=6)
+        events_count = Event.search_count([('event_date', '>=', fields.Datetime.now())])
         
         # Pagination
         page_size = 12
@@ -174,8 +197,7 @@ class PromisPublicController(http.Controller):
             'completed': 'Terminé'
         }
         donors = Partner.search([('is_donor', '=', True)], order='name')
-        regions = list(set(all_projects.mapped('region'))) if all_projects else []
-        regions = [r for r in regions if r]  # Supprimer les valeurs vides
+        regions = list(stats['by_region'])
         
         # Projets récents et en vedette
         recent_projects = Project.search(
@@ -202,24 +224,24 @@ class PromisPublicController(http.Controller):
             # Statistiques
             'total_budget': total_budget,
             'spent_budget': spent_budget,
-            'budget_utilization': (spent_budget / total_budget * 100) if total_budget > 0 else 0,
-            'active_projects': active_projects,
-            'completed_projects': completed_projects,
-            'state_stats': state_stats,
-            'type_stats': type_stats,
-            'donor_stats': donor_stats,
+            'budget_utilization': stats['budget_utilization'],
+            'active_projects': stats['active_projects'],
+            'completed_projects': stats['completed_projects'],
+            'state_stats': stats['by_state'],
+            'type_stats': stats['by_type'],
+            'donor_stats': stats['by_donor'],
             
             # Statistiques supplémentaires
-            'procurement_plans': procurement_plans[:6],  # Top 6 for display
-            'active_procurements': active_procurements,
-            'calls_for_proposals': calls_for_proposals[:6],
-            'open_calls': open_calls,
-            'upcoming_events': upcoming_events[:6],
+            'procurement_plans': procurement_plans,
+            'active_procurements': snapshot['active_procurements'],
+            'calls_for_proposals': calls_for_proposals,
+            'open_calls': snapshot['open_calls'],
+            'upcoming_events': upcoming_events,
             'events_count': events_count,
-            'compliance_rate': compliance_rate,
-            'international_funding': international_funding,
-            'local_funding': local_funding,
-            'region_stats': region_stats,
+            'compliance_rate': snapshot['compliance_rate'],
+            'international_funding': stats['funding_by_origin']['international'],
+            'local_funding': stats['funding_by_origin']['local'],
+            'region_stats': stats['by_region'],
             
             # Projets spéciaux
             'recent_projects': recent_projects,
@@ -231,6 +253,8 @@ class PromisPublicController(http.Controller):
             'donors': donors,
             'regions': regions,
             'current_filters': kw,
+            # Cartes filtrées: pas de mise à jour en direct par les compteurs globaux
+            'is_filtered': domain != Project._get_public_domain(),
             
             # Configuration
             'company_name': company_name,
@@ -238,63 +262,47 @@ class PromisPublicController(http.Controller):
             
             # Métadonnées
             'last_update': datetime.now().strftime('%d/%m/%Y à %H:%M'),
+            # Le fragment 'stats' affiche aussi des indicateurs de l'instantané
+            'fragment_key': fragment_cache_key(
+                ('projects', 'funding', 'procurement', 'compliance', 'calls', 'events', 'snapshot'), page=page, **kw
+            ),
         }
         
         return request.render('sama_promis.promispublic_dashboard', values)
 
     @http.route(['/promispublic/project/<model("sama.promis.project"):project>'], 
                 type='http', auth="public", website=True)
+    @conditional_response('projects', 'funding', 'procurement', 'compliance', 'contracts', 'payments', 'similarity')
     def project_detail(self, project, **kw):
         """Page de détail d'un projet."""
         if not project or project.state not in ['approved', 'in_progress', 'completed']:
             return request.not_found()
         
-        # Projets similaires
-        similar_projects = request.env['sama.promis.project'].sudo().search([
-            ('id', '!=', project.id),
-            ('project_type', '=', project.project_type),
-            ('state', 'in', ['approved', 'in_progress', 'completed']),
-        ], limit=4)
-        
-        # Funding sources breakdown
-        funding_sources = project.funding_source_ids
-        
-        # Procurement plans linked to project
-        procurement_plans = request.env['sama.promis.procurement.plan'].sudo().search([
-            ('project_id', '=', project.id),
-            ('state', 'in', ['validated', 'in_execution', 'completed'])
-        ])
-        
-        # Compliance tasks
-        compliance_tasks = request.env['sama.promis.compliance.task'].sudo().search([
-            ('project_id', '=', project.id)
-        ])
-        
-        # Contracts linked to project
-        contracts = request.env['sama.promis.contract'].sudo().search([
-            ('project_id', '=', project.id)
-        ])
-        
-        # Payments linked to project
-        payments = request.env['sama.promis.payment'].sudo().search([
-            ('project_id', '=', project.id)
-        ])
-        
+        try:
+            payments_page = max(int(kw.get('payments_page', 1)), 1)
+            tasks_page = max(int(kw.get('tasks_page', 1)), 1)
+        except (TypeError, ValueError):
+            payments_page = tasks_page = 1
+
         values = {
             'project': project,
-            'similar_projects': similar_projects,
-            'funding_sources': funding_sources,
-            'procurement_plans': procurement_plans,
-            'compliance_tasks': compliance_tasks,
-            'contracts': contracts,
-            'payments': payments,
+            # Jeux liés chargés en un nombre fixe de requêtes, listes longues paginées;
+            # évalué seulement si le fragment n'est pas déjà en cache
+            'detail': lazy(lambda: project.sudo().get_public_detail(
+                payments_page=payments_page, tasks_page=tasks_page
+            )),
             'company_name': request.env.company.name or "SAMA ETAT",
+            'fragment_key': fragment_cache_key(
+                ('projects', 'funding', 'procurement', 'compliance', 'contracts', 'payments', 'similarity'),
+                project=project.id, payments_page=payments_page, tasks_page=tasks_page,
+            ),
         }
         
         return request.render('sama_promis.project_detail_public', values)
 
     @http.route(['/promispublic/donor/<model("res.partner"):donor>'], 
                 type='http', auth="public", website=True)
+    @conditional_response('projects')
     def donor_detail(self, donor, **kw):
         """Page de détail d'un bailleur."""
         if not donor or not donor.is_donor:
@@ -319,80 +327,120 @@ class PromisPublicController(http.Controller):
             'active_projects': active_projects,
             'completed_projects': completed_projects,
             'company_name': request.env.company.name or "SAMA ETAT",
+            'fragment_key': fragment_cache_key(('projects',), donor=donor.id),
         }
         
         return request.render('sama_promis.donor_detail_public', values)
 
-    @http.route(['/promispublic/api/stats'], type='json', auth="public")
+    @http.route(['/promispublic/api/stats'], type='http', auth="public", methods=['GET'])
+    @conditional_response('projects', 'snapshot', cache_control=API_CACHE_CONTROL)
+    @single_flight('projects', 'snapshot')
     def get_statistics(self, **kw):
         """API pour récupérer les statistiques en JSON."""
-        Project = request.env['sama.promis.project'].sudo()
-        
-        # Projets publics
-        domain = [('state', 'in', ['approved', 'in_progress', 'completed'])]
-        projects = Project.search(domain)
+        return request.make_json_response(self._get_statistics_data())
+
+    def _get_statistics_data(self):
+        """Statistiques globales, lues dans l'instantané public."""
+        snapshot = request.env['sama.promis.public.stats'].sudo().get_snapshot()
+        breakdown = snapshot.get('project_breakdown') or {}
         
-        # Statistiques de base
-        stats = {
-            'total_projects': len(projects),
-            'active_projects': len(projects.filtered(lambda p: p.state == 'in_progress')),
-            'completed_projects': len(projects.filtered(lambda p: p.state == 'completed')),
-            'total_budget': sum(projects.mapped('total_budget')),
-            'spent_budget': sum(projects.mapped('spent_amount')),
+        return {
+            'total_projects': snapshot['total_projects'],
+            'active_projects': snapshot['active_projects'],
+            'completed_projects': snapshot['completed_projects'],
+            'total_budget': snapshot['total_budget'],
+            'spent_budget': snapshot['spent_budget'],
+            'by_type': breakdown.get('by_type', {}),
+            'by_state': breakdown.get('by_state', {}),
         }
+
+    @http.route(['/promispublic/api/bundle'], type='http', auth="public", methods=['GET'])
+    @conditional_response('projects', 'snapshot', cache_control=API_CACHE_CONTROL)
+    @single_flight('projects', 'snapshot')
+    def get_dashboard_bundle(self, sections=None, **kw):
+        """
+        Données du dashboard en un seul appel.
+        
+        `sections` (liste séparée par des virgules, par défaut toutes) choisit
+        parmi stats, charts, timeline et map. Les statistiques viennent de
+        l'instantané public, les graphiques, la timeline et la carte
+        d'agrégats en base.
+        """
+        requested = [
+            section for section in (sections.split(',') if sections else BUNDLE_SECTIONS)
+            if section in BUNDLE_SECTIONS
+        ]
+        data = {}
+        
+        if 'stats' in requested:
+            data['stats'] = self._get_statistics_data()
         
-        # Statistiques par type
-        stats['by_type'] = {}
-        for ptype, label in Project._fields['project_type'].selection:
-            count = len(projects.filtered(lambda p: p.project_type == ptype))
-            stats['by_type'][ptype] = {'label': label, 'count': count}
+        if 'charts' in requested:
+            data['charts'] = self._get_bundle_charts()
         
-        # Statistiques par état
-        stats['by_state'] = {}
-        for state in ['approved', 'in_progress', 'completed']:
-            count = len(projects.filtered(lambda p: p.state == state))
-            label = dict(Project._fields['state'].selection)[state]
-            stats['by_state'][state] = {'label': label, 'count': count}
+        if 'timeline' in requested:
+            Project = request.env['sama.promis.project'].sudo()
+            data['timeline'] = Project.get_public_timeline(with_budget=True)
         
-        return stats
+        if 'map' in requested:
+            Project = request.env['sama.promis.project'].sudo()
+            data['map'] = self._get_map_geojson(Project._get_public_domain())
+        
+        return request.make_json_response(data)
 
-    @http.route(['/promispublic/api/projects'], type='json', auth="public")
-    def get_projects_data(self, **kw):
-        """API pour récupérer les données des projets avec pagination et filtres."""
-        Project = request.env['sama.promis.project'].sudo()
+    def _get_bundle_charts(self):
+        """
+        Calcule les données des graphiques par requêtes groupées: types et
+        bailleurs comme `/promispublic/api/charts`, créations mensuelles
+        par la requête de la timeline.
         
-        # Base domain
-        domain = [('state', 'in', ['approved', 'in_progress', 'completed'])]
+        Returns:
+            dict: Graphiques project_types, budget_by_donor et timeline
+        """
+        Project = request.env['sama.promis.project'].sudo()
+        stats = Project.get_public_statistics(donor_limit=5)
+        type_counts = [(entry['label'], entry['count']) for entry in stats['by_type'].values() if entry['count'] > 0]
+        months = Project.get_public_timeline(date_field='create_date', granularity='month')
+        return {
+            'project_types': {
+                'labels': [t[0] for t in type_counts],
+                'values': [t[1] for t in type_counts],
+            },
+            'budget_by_donor': {
+                'labels': [d['donor'].name for d in stats['by_donor']],
+                'values': [d['total_budget'] for d in stats['by_donor']],
+            },
+            'timeline': {
+                'labels': [month['label'] for month in months],
+                'values': [month['count'] for month in months],
+            },
+        }
+
+    @http.route(['/promispublic/api/projects'], type='http', auth="public", methods=['GET'])
+    @conditional_response('projects', cache_control=API_CACHE_CONTROL)
+    def get_projects_data(self, **kw):
+        """
+        API pour récupérer les données des projets avec pagination et filtres.
         
-        # Apply filters from query parameters
-        project_type = kw.get('project_type')
-        if project_type:
-            domain.append(('project_type', '=', project_type))
+        Pagination par curseur: `next_cursor` de la réponse est transmis tel
+        quel dans `cursor` pour obtenir la page suivante, à coût constant
+        quelle que soit la profondeur. Les projets sont triés du plus récent
+        au plus ancien par identifiant (attribué dans l'ordre de création).
+        `page` reste accepté (pagination par décalage). Le total n'est calculé que sur demande: `count=exact` ou
+        `count=estimate` (estimation du planificateur).
         
-        donor_id = kw.get('donor_id')
-        if donor_id:
-            try:
-                domain.append(('donor_id', '=', int(donor_id)))
-            except (ValueError, TypeError):
-                pass
+        `fields=id,name,budget` restreint les clés renvoyées (et les colonnes
+        lues) à la liste blanche de `PROJECT_PROJECTION`.
+        """
+        Project = request.env['sama.promis.project'].sudo()
         
-        state = kw.get('state')
-        if state:
-            domain.append(('state', '=', state))
+        try:
+            keys = PROJECT_PROJECTION.parse(kw.get('fields'))
+        except ValueError:
+            return _invalid_fields_response(PROJECT_PROJECTION.spec)
         
-        region = kw.get('region')
-        if region:
-            domain.append(('region', 'ilike', region))
-        
-        search_term = kw.get('search') or kw.get('q')
-        if search_term:
-            domain.extend([
-                '|', '|', '|',
-                ('name', 'ilike', search_term),
-                ('description', 'ilike', search_term),
-                ('objectives', 'ilike', search_term),
-                ('partner_id.name', 'ilike', search_term)
-            ])
+        # Base domain with filters from query parameters
+        domain = Project._get_public_domain(**kw)
         
         # Pagination parameters
         try:
@@ -400,172 +448,290 @@ class PromisPublicController(http.Controller):
         except (ValueError, TypeError):
             page = 1
         
-        page_size = 12
-        offset = (page - 1) * page_size
-        
-        # Get total count
-        total_count = Project.search_count(domain)
+        try:
+            page_size = min(max(int(kw.get('limit', 12)), 1), API_MAX_PAGE_SIZE)
+        except (ValueError, TypeError):
+            page_size = 12
         
-        # Get projects for current page
-        projects = Project.search(
-            domain, 
-            limit=page_size, 
-            offset=offset, 
-            order='create_date desc'
+        offset = 0
+        cursor = kw.get('cursor')
+        if cursor:
+            try:
+                last_id = _decode_cursor(cursor)
+            except ValueError:
+                return request.make_json_response({'error': 'Curseur invalide'}, status=400)
+            domain = domain + [('id', '<', last_id)]
+        else:
+            offset = (max(page, 1) - 1) * page_size
+        
+        # Une ligne de plus que la page pour savoir s'il en reste
+        rows = Project.search_read(
+            domain,
+            PROJECT_PROJECTION.read_fields(keys),
+            limit=page_size + 1,
+            offset=offset,
+            order='id desc'
         )
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        projects_data = PROJECT_PROJECTION.project(Project, rows, keys)
         
-        # Build projects data
-        projects_data = []
-        for project in projects:
-            # Get state label
-            state_label = dict(Project._fields['state'].selection).get(project.state, project.state)
-            state_class = 'success' if project.state == 'completed' else 'info' if project.state == 'in_progress' else 'warning'
-            
-            projects_data.append({
-                'id': project.id,
-                'name': project.name,
-                'code': project.reference or '',
-                'reference': project.reference or '',
-                'type': project.project_type,
-                'state': project.state,
-                'state_label': state_label,
-                'state_class': state_class,
-                'budget': project.total_budget,
-                'progress': project.progress_percentage,
-                'donor': project.donor_id.name if project.donor_id else '',
-                'region': project.region or '',
-                'start_date': project.start_date.strftime('%Y-%m-%d') if project.start_date else '',
-                'end_date': project.end_date.strftime('%Y-%m-%d') if project.end_date else '',
-            })
-        
-        # Calculate if there are more pages
-        has_more = (offset + page_size) < total_count
-        
-        return {
+        data = {
             'projects': projects_data,
             'has_more': has_more,
-            'total': total_count,
+            'next_cursor': _encode_cursor(rows[-1]) if has_more else None,
             'page': page,
             'page_size': page_size
         }
+        
+        count_mode = kw.get('count')
+        if count_mode == 'exact':
+            data['total'] = Project.search_count(Project._get_public_domain(**kw))
+        elif count_mode == 'estimate':
+            data['total'] = Project.get_public_count_estimate(Project._get_public_domain(**kw))
+            data['total_estimated'] = True
+        
+        return request.make_json_response(data)
 
-    @http.route(['/promispublic/search'], type='json', auth="public")
+    @http.route(['/promispublic/search'], type='http', auth="public", methods=['GET'])
+    @conditional_response('projects', cache_control=API_CACHE_CONTROL)
     def search_projects(self, **kw):
-        """Recherche avancée de projets - retourne JSON pour AJAX."""
+        """
+        Recherche avancée de projets - retourne JSON pour AJAX.
+        
+        Accepte `fields=` comme l'API projets.
+        """
         search_term = kw.get('q', '')
         
         if not search_term or len(search_term) < 2:
-            return {'projects': [], 'total': 0}
+            return request.make_json_response({'projects': [], 'total': 0})
         
         Project = request.env['sama.promis.project'].sudo()
         
-        # Build search domain
-        domain = [
-            ('state', 'in', ['approved', 'in_progress', 'completed']),
-            '|', '|', '|',
-            ('name', 'ilike', search_term),
-            ('description', 'ilike', search_term),
-            ('objectives', 'ilike', search_term),
-            ('partner_id.name', 'ilike', search_term)
-        ]
-        
-        # Search projects
-        projects = Project.search(domain, limit=20, order='create_date desc')
+        try:
+            keys = PROJECT_PROJECTION.parse(kw.get('fields'))
+        except ValueError:
+            return _invalid_fields_response(PROJECT_PROJECTION.spec)
         
-        # Build response data
-        projects_data = []
-        for project in projects:
-            state_label = dict(Project._fields['state'].selection).get(project.state, project.state)
-            state_class = 'success' if project.state == 'completed' else 'info' if project.state == 'in_progress' else 'warning'
-            
-            projects_data.append({
-                'id': project.id,
-                'name': project.name,
-                'code': project.reference or '',
-                'reference': project.reference or '',
-                'type': project.project_type,
-                'state': project.state,
-                'state_label': state_label,
-                'state_class': state_class,
-                'budget': project.total_budget,
-                'progress': project.progress_percentage,
-                'donor': project.donor_id.name if project.donor_id else '',
-                'region': project.region or '',
-            })
+        # Recherche plein texte, triée par pertinence; lecture groupée des colonnes demandées
+        projects = Project.search_public_ranked(search_term, limit=20)
+        rows = projects.read(PROJECT_PROJECTION.read_fields(keys))
+        projects_data = PROJECT_PROJECTION.project(Project, rows, keys)
         
-        return {
+        return request.make_json_response({
             'projects': projects_data,
             'total': len(projects_data)
-        }
+        })
+
+    @http.route(['/promispublic/search/suggest'], type='http', auth="public", methods=['GET'])
+    def search_suggestions(self, q='', **kw):
+        """
+        Suggestions d'autocomplétion pendant la saisie.
+        
+        Servies par l'index de préfixes en mémoire du worker; la recherche
+        complète (`/promispublic/search`) n'est lancée qu'à la validation.
+        """
+        if len(q.strip()) < 2:
+            return request.make_json_response({'suggestions': []})
+        
+        index = typeahead_registry.get_index(request.env(su=True))
+        return request.make_json_response({'suggestions': index.suggest(q)})
 
     @http.route(['/promispublic/export'], type='http', auth="public")
-    def export_projects(self, format='csv', **kw):
-        """Export des données de projets."""
-        Project = request.env['sama.promis.project'].sudo()
+    @conditional_response('projects', cache_control=API_CACHE_CONTROL)
+    def export_projects(self, format='csv', compress=None, **kw):
+        """
+        Export des données de projets.
         
-        domain = [('state', 'in', ['approved', 'in_progress', 'completed'])]
-        projects = Project.search(domain)
-        
-        if format == 'json':
-            # Export JSON
-            data = []
-            for project in projects:
-                data.append({
-                    'reference': project.reference,
-                    'name': project.name,
-                    'type': project.project_type,
-                    'state': project.state,
-                    'budget': project.total_budget,
-                    'donor': project.donor_id.name if project.donor_id else '',
-                    'region': project.region or '',
-                })
-            
-            response = request.make_response(
-                json.dumps(data, indent=2, ensure_ascii=False),
-                headers=[
-                    ('Content-Type', 'application/json'),
-                    ('Content-Disposition', 'attachment; filename="projets_sama_promis.json"')
-                ]
-            )
-            return response
+        Le fichier est produit par lots et envoyé au fil de l'eau: la
+        mémoire utilisée ne dépend pas du nombre de projets exportés.
+        `compress=gzip` renvoie le même contenu compressé.
         
-        # Export CSV par défaut
-        import csv
-        import io
+        `format=ndjson` n'existe que pour l'export complet: il redirige vers
+        le fichier Open Data pré-généré (voir `/promispublic/opendata`). Les
+        exports CSV et JSON gardent toujours leurs colonnes libellées.
+        """
+        if format not in EXPORT_FORMATS:
+            return request.make_json_response({
+                'error': 'Format d\'export invalide',
+                'allowed_formats': list(EXPORT_FORMATS),
+            }, status=400)
+        filters = {key: kw[key] for key in EXPORT_FILTER_KEYS if kw.get(key)}
+        if format == 'ndjson':
+            if filters:
+                return request.make_json_response({
+                    'error': 'Le format ndjson ne prend pas de filtres',
+                }, status=400)
+            dump = request.env['sama.promis.open.data'].sudo().search([
+                ('dataset', '=', 'projects'), ('file_format', '=', 'ndjson'), ('attachment_id', '!=', False),
+            ], limit=1)
+            if not dump:
+                return request.make_json_response({
+                    'error': 'Fichier ndjson pas encore généré',
+                }, status=400)
+            return request.redirect('/promispublic/opendata/%s?v=%s' % (dump.filename, dump.checksum[:12]))
+        
+        chunks = self._export_projects_stream(format, filters)
+        filename = 'projets_sama_promis.%s' % format
+        content_type = 'application/json' if format == 'json' else 'text/csv'
+        
+        if compress == 'gzip':
+            chunks = _gzip_stream(chunks)
+            filename += '.gz'
+            content_type = 'application/gzip'
+        
+        return request.make_response(
+            chunks,
+            headers=[
+                ('Content-Type', content_type),
+                ('Content-Disposition', 'attachment; filename="%s"' % filename)
+            ]
+        )
+
+    def _export_projects_stream(self, export_format, filters=None):
+        """
+        Générateur du contenu de l'export (octets UTF-8), lot par lot.
         
+        Le générateur est consommé après la fin de la requête: il ouvre son
+        propre curseur.
+        """
+        registry = request.env.registry
+        context = dict(request.env.context)
+        
+        def generate():
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, context)
+                Project = env['sama.promis.project']
+                type_labels = dict(Project._fields['project_type'].selection)
+                state_labels = dict(Project._fields['state'].selection)
+                domain = Project._get_public_domain(**(filters or {}))
+                
+                if export_format == 'json':
+                    yield b'['
+                else:
+                    # En-têtes
+                    yield self._export_csv_chunk([[
+                        'Référence', 'Nom', 'Type', 'État', 'Budget',
+                        'Bailleur', 'Région', 'Date Début', 'Date Fin'
+                    ]])
+                
+                separator = '\n'
+                for rows in _iter_public_batches(Project, domain, EXPORT_FIELDS):
+                    if export_format == 'json':
+                        items = [json.dumps({
+                            'reference': row['reference'],
+                            'name': row['name'],
+                            'type': row['project_type'],
+                            'state': row['state'],
+                            'budget': row['total_budget'],
+                            'donor': row['donor_id'][1] if row['donor_id'] else '',
+                            'region': row['region'] or '',
+                        }, ensure_ascii=False) for row in rows]
+                        yield (separator + ',\n'.join(items)).encode('utf-8')
+                        separator = ',\n'
+                    else:
+                        yield self._export_csv_chunk([
+                            row['reference'] or '',
+                            row['name'] or '',
+                            type_labels.get(row['project_type'], ''),
+                            state_labels.get(row['state'], ''),
+                            row['total_budget'] or 0,
+                            row['donor_id'][1] if row['donor_id'] else '',
+                            row['region'] or '',
+                            row['start_date'].strftime('%d/%m/%Y') if row['start_date'] else '',
+                            row['end_date'].strftime('%d/%m/%Y') if row['end_date'] else '',
+                        ] for row in rows)
+                
+                if export_format == 'json':
+                    yield b'\n]\n'
+        
+        return generate()
+
+    @staticmethod
+    def _export_csv_chunk(rows):
+        """Encode un lot de lignes CSV."""
         output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # En-têtes
-        writer.writerow([
-            'Référence', 'Nom', 'Type', 'État', 'Budget', 
-            'Bailleur', 'Région', 'Date Début', 'Date Fin'
-        ])
-        
-        # Données
-        for project in projects:
-            writer.writerow([
-                project.reference or '',
-                project.name or '',
-                dict(Project._fields['project_type'].selection).get(project.project_type, ''),
-                dict(Project._fields['state'].selection).get(project.state, ''),
-                project.total_budget or 0,
-                project.donor_id.name if project.donor_id else '',
-                project.region or '',
-                project.start_date.strftime('%d/%m/%Y') if project.start_date else '',
-                project.end_date.strftime('%d/%m/%Y') if project.end_date else '',
-            ])
-        
-        response = request.make_response(
-            output.getvalue(),
+        csv.writer(output).writerows(rows)
+        return output.getvalue().encode('utf-8')
+
+    @http.route(['/promispublic/iati', '/promispublic/iati.xml'], type='http', auth='public', methods=['GET'])
+    @conditional_response('projects', 'funding', 'payments', cache_control=API_CACHE_CONTROL)
+    def iati_activities(self, modified_since=None, compress=None, **kw):
+        """
+        Flux XML des activités au format IATI, écrit au fil de l'eau.
+        
+        `modified_since` (AAAA-MM-JJ ou AAAA-MM-JJ HH:MM:SS, UTC) limite le
+        flux aux projets modifiés depuis, y compris par leurs financements
+        ou paiements; les filtres habituels du portail s'appliquent.
+        `compress=gzip` renvoie le flux compressé.
+        """
+        try:
+            since = fields.Datetime.to_datetime(modified_since) if modified_since else None
+        except ValueError:
+            return request.make_json_response({'error': 'Paramètre modified_since invalide'}, status=400)
+        
+        filters = {key: kw[key] for key in EXPORT_FILTER_KEYS if kw.get(key)}
+        registry = request.env.registry
+        context = dict(request.env.context)
+        
+        def generate():
+            # Consommé après la fin de la requête: curseur propre au flux
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, context)
+                Project = env['sama.promis.project']
+                batches = _iter_public_batches(
+                    Project, iati_domain(Project, since, **filters), IATI_PROJECT_FIELDS, IATI_BATCH_SIZE
+                )
+                yield from iter_iati_xml(env, batches)
+        
+        chunks = generate()
+        filename = 'iati_activities_sama_promis.xml'
+        content_type = 'application/xml; charset=utf-8'
+        if compress == 'gzip':
+            chunks = _gzip_stream(chunks)
+            filename += '.gz'
+            content_type = 'application/gzip'
+        
+        return request.make_response(
+            chunks,
             headers=[
-                ('Content-Type', 'text/csv'),
-                ('Content-Disposition', 'attachment; filename="projets_sama_promis.csv"')
+                ('Content-Type', content_type),
+                ('Content-Disposition', 'inline; filename="%s"' % filename),
             ]
         )
-        return response
+
+    @http.route(['/promispublic/opendata'], type='http', auth='public', methods=['GET'])
+    @conditional_response('open_data', cache_control=API_CACHE_CONTROL)
+    def open_data_manifest(self, **kw):
+        """Manifeste des fichiers Open Data: taille, lignes et SHA-256 de chaque fichier."""
+        return request.make_json_response({
+            'files': request.env['sama.promis.open.data'].sudo().get_manifest(),
+        })
+
+    @http.route(['/promispublic/opendata/<string:filename>'], type='http', auth='public', methods=['GET'])
+    def open_data_file(self, filename, v=None, **kw):
+        """
+        Téléchargement d'un fichier Open Data depuis le filestore.
+        
+        Le fichier est envoyé tel quel (X-Sendfile / wrapper de fichier),
+        avec ETag et requêtes conditionnelles; l'URL versionnée du
+        manifeste (`v=`) est mise en cache comme immuable.
+        """
+        dump = request.env['sama.promis.open.data'].sudo().search([
+            ('filename', '=', filename), ('attachment_id', '!=', False),
+        ], limit=1)
+        if not dump:
+            return request.not_found()
+        
+        stream = request.env['ir.binary']._get_stream_from(dump.attachment_id)
+        stream.download_name = dump.filename
+        return stream.get_response(
+            as_attachment=True,
+            immutable=bool(v) and dump.checksum.startswith(v),
+        )
 
     @http.route(['/promispublic/procurement'], type='http', auth='public', website=True)
+    @conditional_response('procurement')
     def procurement_opportunities(self, **kw):
         """Liste des opportunités de passation de marchés."""
         ProcurementPlan = request.env['sama.promis.procurement.plan'].sudo()
@@ -588,6 +754,7 @@ class PromisPublicController(http.Controller):
 
     @http.route(['/promispublic/procurement/<model("sama.promis.procurement.plan"):plan>'], 
                 type='http', auth='public', website=True)
+    @conditional_response('procurement', 'projects')
     def procurement_detail(self, plan, **kw):
         """Page de détail d'un plan de passation."""
         if not plan or plan.state not in ['validated', 'in_execution', 'completed']:
@@ -601,6 +768,7 @@ class PromisPublicController(http.Controller):
         return request.render('sama_promis.procurement_detail_public', values)
 
     @http.route(['/promispublic/calls'], type='http', auth='public', website=True)
+    @conditional_response('calls')
     def calls_for_proposals(self, **kw):
         """Liste des appels à propositions."""
         CallForProposal = request.env['sama.promis.call.for.proposal'].sudo()
@@ -623,6 +791,7 @@ class PromisPublicController(http.Controller):
 
     @http.route(['/promispublic/call/<model("sama.promis.call.for.proposal"):call>'], 
                 type='http', auth='public', website=True)
+    @conditional_response('calls')
     def call_detail(self, call, **kw):
         """Page de détail d'un appel à propositions."""
         if not call:
@@ -636,6 +805,7 @@ class PromisPublicController(http.Controller):
         return request.render('sama_promis.call_detail_public', values)
 
     @http.route(['/promispublic/events'], type='http', auth='public', website=True)
+    @conditional_response('events')
     def events_list(self, **kw):
         """Liste des événements."""
         Event = request.env['sama.promis.event'].sudo()
@@ -658,6 +828,7 @@ class PromisPublicController(http.Controller):
 
     @http.route(['/promispublic/event/<model("sama.promis.event"):event>'], 
                 type='http', auth='public', website=True)
+    @conditional_response('events')
     def event_detail(self, event, **kw):
         """Page de détail d'un événement."""
         if not event:
@@ -671,139 +842,185 @@ class PromisPublicController(http.Controller):
         return request.render('sama_promis.event_detail_public', values)
 
     @http.route(['/promispublic/funding'], type='http', auth='public', website=True)
+    @conditional_response('projects', 'funding', 'snapshot')
     def funding_overview(self, **kw):
         """Vue d'ensemble des financements."""
         FundingSource = request.env['sama.promis.project.funding.source'].sudo()
-        Project = request.env['sama.promis.project'].sudo()
         
-        # Projets publics
-        projects = Project.search([('state', 'in', ['approved', 'in_progress', 'completed'])])
-        funding_sources = FundingSource.search([('project_id', 'in', projects.ids)])
-        
-        # Statistiques
-        international_funding = sum(funding_sources.filtered(lambda f: f.funding_origin == 'international').mapped('amount'))
-        local_funding = sum(funding_sources.filtered(lambda f: f.funding_origin == 'local').mapped('amount'))
-        
-        # Par bailleur
-        donors = {}
-        for source in funding_sources:
-            donor = source.source_id
-            if donor:
-                if donor.id not in donors:
-                    donors[donor.id] = {
-                        'donor': donor,
-                        'total': 0,
-                        'projects': set()
-                    }
-                donors[donor.id]['total'] += source.amount
-                donors[donor.id]['projects'].add(source.project_id.id)
-        
-        donor_list = sorted(donors.values(), key=lambda x: x['total'], reverse=True)
+        # Statistiques (instantané public)
+        snapshot = request.env['sama.promis.public.stats'].sudo().get_snapshot()
+        
+        # Par bailleur, origine et devise, converti en devise société par une
+        # requête groupée (évalué au rendu seulement: inutile si le fragment est en cache)
+        breakdown = lazy(FundingSource.get_public_funding_breakdown)
         
         values = {
-            'international_funding': international_funding,
-            'local_funding': local_funding,
-            'total_funding': international_funding + local_funding,
-            'donors': donor_list,
+            'international_funding': snapshot['international_funding'],
+            'local_funding': snapshot['local_funding'],
+            'total_funding': snapshot['total_funding'],
+            'breakdown': breakdown,
             'company_name': request.env.company.name or "SAMA ETAT",
+            # Le fragment 'totals' affiche les montants de l'instantané
+            'fragment_key': fragment_cache_key(('projects', 'funding', 'snapshot')),
         }
         
         return request.render('sama_promis.funding_overview_public', values)
 
-    @http.route(['/promispublic/api/timeline'], type='json', auth='public')
-    def get_timeline_data(self, **kw):
-        """API pour récupérer les données de timeline."""
+    @http.route(['/promispublic/api/timeline'], type='http', auth='public', methods=['GET'])
+    @conditional_response('projects', cache_control=API_CACHE_CONTROL)
+    @single_flight('projects')
+    def get_timeline_data(self, date_from=None, date_to=None, granularity='month',
+                          date_field='start_date', budget=None, **kw):
+        """
+        API timeline: nombre de projets par période, agrégé en base.
+        
+        Paramètres: `date_from` / `date_to` (AAAA-MM-JJ), `granularity`
+        (week, month, quarter, year), `date_field` (start_date, end_date,
+        create_date), `budget=1` pour la somme des budgets par période, et
+        les filtres habituels du portail. `fields=` restreint les clés des
+        périodes (`start`, `label`, `count`, `budget`).
+        """
         Project = request.env['sama.promis.project'].sudo()
         
-        projects = Project.search([('state', 'in', ['approved', 'in_progress', 'completed'])])
+        with_budget = budget in ('1', 'true')
+        try:
+            keys = parse_fields(kw.get('fields'), TIMELINE_BUCKET_KEYS,
+                                TIMELINE_BUCKET_KEYS if with_budget else TIMELINE_BUCKET_KEYS[:-1])
+        except ValueError:
+            return _invalid_fields_response(TIMELINE_BUCKET_KEYS)
+        
+        try:
+            buckets = Project.get_public_timeline(
+                Project._get_public_domain(**kw),
+                date_field=date_field,
+                granularity=granularity,
+                date_from=fields.Date.to_date(date_from) if date_from else None,
+                date_to=fields.Date.to_date(date_to) if date_to else None,
+                with_budget='budget' in keys,
+            )
+        except ValueError:
+            return request.make_json_response({'error': 'Paramètres de timeline invalides'}, status=400)
+        
+        return request.make_json_response({
+            'granularity': granularity,
+            'date_field': date_field,
+            'date_from': date_from,
+            'date_to': date_to,
+            'buckets': [{key: bucket[key] for key in keys} for bucket in buckets],
+        })
+
+    @http.route(['/promispublic/api/map'], type='http', auth='public', methods=['GET'])
+    @conditional_response('projects', cache_control=API_CACHE_CONTROL)
+    @single_flight('projects')
+    def get_map_data(self, region=None, **kw):
+        """
+        API carte: agrégats par région au format GeoJSON.
         
-        timeline_data = []
-        for project in projects:
-            if project.start_date:
-                timeline_data.append({
-                    'id': project.id,
-                    'name': project.name,
-                    'start': project.start_date.strftime('%Y-%m-%d'),
-                    'end': project.end_date.strftime('%Y-%m-%d') if project.end_date else None,
-                    'state': project.state,
-                })
+        Sans paramètre, une entité Point par région (centroïde) avec nombre de
+        projets, budget, répartition par état et principaux projets. Avec
+        `region=<code>`, l'entité de la région et la liste paginée de ses
+        projets (`limit`, `offset`) pour le zoom.
         
-        return timeline_data
+        `fields=` restreint les propriétés des entités régionales (sans
+        `top_projects`, la requête des principaux projets n'est pas lancée);
+        `project_fields=` celles des projets listés au zoom.
+        """
+        Project = request.env['sama.promis.project'].sudo()
+        domain = Project._get_public_domain(**kw)
+        
+        try:
+            properties = parse_fields(kw.get('fields'), MAP_REGION_PROPERTIES, MAP_REGION_PROPERTIES)
+        except ValueError:
+            return _invalid_fields_response(MAP_REGION_PROPERTIES)
+        
+        if region:
+            return self._get_region_drilldown(region, domain, properties, **kw)
+        
+        return request.make_json_response(self._get_map_geojson(domain, properties))
+
+    def _get_map_geojson(self, domain, properties=MAP_REGION_PROPERTIES):
+        """FeatureCollection des agrégats régionaux."""
+        aggregates = request.env['sama.promis.project'].sudo().get_public_map_regions(
+            domain, top_limit=3 if 'top_projects' in properties else 0,
+        )
+        return {
+            'type': 'FeatureCollection',
+            'features': [_region_feature(entry, properties) for entry in aggregates['regions']],
+            'unlocated_count': aggregates['unlocated_count'],
+        }
 
-    @http.route(['/promispublic/api/map'], type='json', auth='public')
-    def get_map_data(self, **kw):
-        """API pour récupérer les données de carte."""
+    def _get_region_drilldown(self, code, domain, properties=MAP_REGION_PROPERTIES, **kw):
+        """Entité d'une région et page de ses projets."""
         Project = request.env['sama.promis.project'].sudo()
+        region = request.env['sama.promis.region'].sudo().search([('code', '=', code)], limit=1)
+        if not region:
+            return request.make_json_response({'error': 'Région inconnue'}, status=404)
         
-        projects = Project.search([('state', 'in', ['approved', 'in_progress', 'completed'])])
+        try:
+            limit = min(max(int(kw.get('limit', 20)), 1), API_MAX_PAGE_SIZE)
+            offset = max(int(kw.get('offset', 0)), 0)
+        except (ValueError, TypeError):
+            limit, offset = 20, 0
         
-        map_data = []
-        for project in projects:
-            if project.region:
-                map_data.append({
-                    'id': project.id,
-                    'name': project.name,
-                    'region': project.region,
-                    'budget': project.total_budget,
-                    'state': project.state,
-                })
+        try:
+            keys = parse_fields(kw.get('project_fields'), PROJECT_PROJECTION.spec, MAP_PROJECT_DEFAULT)
+        except ValueError:
+            return _invalid_fields_response(PROJECT_PROJECTION.spec)
+        
+        domain = domain + [('region_id', '=', region.id)]
+        aggregates = Project.get_public_map_regions(domain, top_limit=0)['regions']
+        feature = _region_feature(aggregates[0] if aggregates else {
+            'region': region, 'project_count': 0, 'total_budget': 0.0, 'states': {}, 'top_projects': [],
+        }, properties)
+        
+        rows = Project.search_read(
+            domain,
+            PROJECT_PROJECTION.read_fields(keys),
+            limit=limit + 1,
+            offset=offset,
+            order='total_budget desc, id desc',
+        )
+        feature['properties']['projects'] = PROJECT_PROJECTION.project(Project, rows[:limit], keys)
+        feature['properties']['has_more'] = len(rows) > limit
         
-        return map_data
+        return request.make_json_response({'type': 'FeatureCollection', 'features': [feature]})
 
-    @http.route(['/promispublic/api/charts'], type='json', auth='public')
+    @http.route(['/promispublic/api/charts'], type='http', auth='public', methods=['GET'])
+    @conditional_response('projects', cache_control=API_CACHE_CONTROL)
+    @single_flight('projects')
     def get_charts_data(self, chart_type='project_types', **kw):
         """API pour récupérer les données formatées pour Chart.js."""
         Project = request.env['sama.promis.project'].sudo()
-        FundingSource = request.env['sama.promis.project.funding.source'].sudo()
-        
-        projects = Project.search([('state', 'in', ['approved', 'in_progress', 'completed'])])
+        # Le front-end transmet le type de graphique via `?type=`
+        chart_type = kw.get('type') or chart_type
+        data = {'labels': [], 'values': []}
         
         if chart_type == 'project_types':
             # Distribution par type de projet
-            type_counts = {}
-            for ptype, label in Project._fields['project_type'].selection:
-                count = len(projects.filtered(lambda p: p.project_type == ptype))
-                if count > 0:
-                    type_counts[label] = count
+            by_type = Project.get_public_statistics()['by_type']
+            type_counts = [(entry['label'], entry['count']) for entry in by_type.values() if entry['count'] > 0]
             
-            return {
-                'labels': list(type_counts.keys()),
-                'values': list(type_counts.values())
+            data = {
+                'labels': [t[0] for t in type_counts],
+                'values': [t[1] for t in type_counts]
             }
         
         elif chart_type == 'budget_by_donor':
-            # Budget par bailleur
-            donor_budgets = {}
-            for project in projects:
-                if project.donor_id:
-                    donor_name = project.donor_id.name
-                    if donor_name not in donor_budgets:
-                        donor_budgets[donor_name] = 0
-                    donor_budgets[donor_name] += project.total_budget
-            
-            # Top 5 bailleurs
-            sorted_donors = sorted(donor_budgets.items(), key=lambda x: x[1], reverse=True)[:5]
+            # Top 5 bailleurs par budget
+            top_donors = Project.get_public_statistics(donor_limit=5)['by_donor']
             
-            return {
-                'labels': [d[0] for d in sorted_donors],
-                'values': [d[1] for d in sorted_donors]
+            data = {
+                'labels': [d['donor'].name for d in top_donors],
+                'values': [d['total_budget'] for d in top_donors]
             }
         
         elif chart_type == 'timeline':
             # Projets par mois
-            from collections import defaultdict
-            monthly_counts = defaultdict(int)
-            
-            for project in projects:
-                if project.create_date:
-                    month_key = project.create_date.strftime('%Y-%m')
-                    monthly_counts[month_key] += 1
-            
-            sorted_months = sorted(monthly_counts.items())
+            sorted_months = Project.get_public_monthly_counts()
             
-            return {
+            data = {
                 'labels': [m[0] for m in sorted_months],
                 'values': [m[1] for m in sorted_months]
             }
         
-        return {'labels': [], 'values': []}
\ No newline at end of file
+        return request.make_json_response(data)
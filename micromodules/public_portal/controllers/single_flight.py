@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS Public Portal - Coalescence des Requêtes
+====================================================
+
+Lors d'un pic de trafic anonyme, les requêtes identiques et simultanées
+d'une API publique coûteuse attendent un unique calcul et en partagent le
+résultat, conservé ensuite `SINGLE_FLIGHT_TTL` secondes.
+
+La clé est l'ETag de la requête (URL, paramètres, langue, site, versions
+des données): une modification des données produit une nouvelle clé.
+
+La coordination passe par un verrou de fichier (`flock`) et un fichier
+résultat par clé, dans un répertoire local partagé par les threads et les
+processus (mode prefork) d'un même serveur.
+"""
+
+import functools
+import json
+import logging
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de coalescence
+    fcntl = None
+
+from odoo.http import request
+
+from .http_cache import public_etag
+
+_logger = logging.getLogger(__name__)
+
+# Durée de réutilisation d'un résultat calculé (secondes)
+SINGLE_FLIGHT_TTL = 5
+
+# Attente maximale du calcul en cours avant de calculer soi-même (secondes)
+SINGLE_FLIGHT_WAIT = 15
+
+# Les fichiers plus anciens sont supprimés lors des écritures (secondes)
+SINGLE_FLIGHT_PURGE_AGE = 3600
+
+# En-têtes de la réponse conservés avec le résultat
+SINGLE_FLIGHT_HEADERS = ('Content-Type', 'Content-Disposition', 'Content-Language')
+
+
+def _flight_directory(dbname):
+    directory = os.path.join(tempfile.gettempdir(), 'sama_promis_single_flight', dbname)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _read_flight(path, ttl):
+    """Résultat partagé encore valide, ou None."""
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+        with open(path, 'rb') as result_file:
+            meta, body = result_file.read().split(b'\n', 1)
+    except (OSError, ValueError):
+        return None
+    meta = json.loads(meta)
+    return request.make_response(body, headers=meta['headers'], status=meta['status'])
+
+
+def _write_flight(path, response):
+    """Publie le résultat de façon atomique (fichier temporaire puis renommage)."""
+    meta = json.dumps({
+        'status': response.status_code,
+        'headers': [(name, response.headers[name]) for name in SINGLE_FLIGHT_HEADERS if name in response.headers],
+    })
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as result_file:
+        result_file.write(meta.encode('utf-8') + b'\n' + response.get_data())
+    os.replace(tmp_path, path)
+    _purge_flights(directory)
+
+
+def _purge_flights(directory):
+    """Supprime les résultats et verrous abandonnés."""
+    limit = time.time() - SINGLE_FLIGHT_PURGE_AGE
+    for entry in os.scandir(directory):
+        try:
+            if entry.stat().st_mtime < limit:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def _acquire(lock_file, timeout):
+    """Verrou exclusif sur `lock_file`, en attendant au plus `timeout` secondes."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+
+def single_flight(*datasets, ttl=SINGLE_FLIGHT_TTL):
+    """
+    Décorateur de route publique: une seule exécution par requête identique.
+
+    À placer sous `conditional_response`. Seules les requêtes GET des
+    visiteurs anonymes sont coalescées, et seules les réponses 200 non
+    streamées sont partagées. Les pages HTML ne doivent pas l'utiliser:
+    elles contiennent le jeton CSRF de la session du visiteur.
+
+    Args:
+        datasets: Jeux de données dont dépend la réponse
+        ttl (int): Durée de réutilisation du résultat (secondes)
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, *args, **kw):
+            if fcntl is None or request.session.uid or request.httprequest.method != 'GET':
+                return handler(self, *args, **kw)
+
+            path = os.path.join(_flight_directory(request.env.cr.dbname), public_etag(datasets))
+            response = _read_flight(path, ttl)
+            if response is not None:
+                return response
+
+            with open(path + '.lock', 'a') as lock_file:
+                locked = _acquire(lock_file, SINGLE_FLIGHT_WAIT)
+                try:
+                    # Le calcul attendu vient peut-être de se terminer
+                    response = _read_flight(path, ttl) if locked else None
+                    if response is not None:
+                        return response
+
+                    response = handler(self, *args, **kw)
+                    if locked and response.status_code == 200 and not response.is_streamed:
+                        try:
+                            _write_flight(path, response)
+                        except OSError:
+                            _logger.warning("Impossible de partager la réponse de %s", request.httprequest.path,
+                                            exc_info=True)
+                    return response
+                finally:
+                    if locked:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return wrapper
+    return decorator
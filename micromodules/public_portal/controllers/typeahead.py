@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS Public Portal - Index de Suggestions
+================================================
+
+Index de préfixes en mémoire (par worker) pour l'autocomplétion de la
+recherche publique: noms et références de projets, bailleurs, régions.
+
+L'index est construit à la première demande puis reconstruit lorsque la
+version du jeu de données "projects" change. Cette version n'est relue
+qu'après `VERSION_CHECK_INTERVAL` secondes: les suggestions sont le plus
+souvent servies sans aucun accès à la base.
+"""
+
+import bisect
+import threading
+import time
+import unicodedata
+
+from odoo.addons.sama_promis.models.public_stats import read_public_data_versions
+
+# Délai (secondes) entre deux lectures de la version des projets
+VERSION_CHECK_INTERVAL = 10
+
+# Nombre maximum de suggestions renvoyées
+MAX_SUGGESTIONS = 8
+
+# Ordre d'affichage des types de suggestion à pertinence égale
+SUGGESTION_KINDS = ('project', 'reference', 'donor', 'region')
+
+
+def normalize(text):
+    """Forme de comparaison: minuscules, sans accents ni espaces superflus."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.lower().split())
+
+
+class PrefixIndex:
+    """
+    Tableau trié de clés normalisées, interrogé par recherche dichotomique.
+
+    Chaque libellé est indexé à partir de chacun de ses mots, de sorte que
+    "riz" propose "Irrigation des rizières".
+    """
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries (iterable): Triplets (type, libellé, id de projet ou None)
+        """
+        keys = []
+        for kind, label, project_id in set(entries):
+            words = normalize(label).split(' ')
+            for position in range(len(words)):
+                keys.append((' '.join(words[position:]), position, kind, label, project_id))
+        keys.sort(key=lambda key: key[0])
+        self._keys = keys
+        self._prefixes = [key[0] for key in keys]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def suggest(self, prefix, limit=MAX_SUGGESTIONS):
+        """
+        Suggestions dont un mot commence par `prefix`.
+
+        Les correspondances en début de libellé passent en premier.
+
+        Returns:
+            list: Dictionnaires {kind, label, project_id}
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        start = bisect.bisect_left(self._prefixes, prefix)
+        matches = {}
+        for key, position, kind, label, project_id in self._keys[start:]:
+            if not key.startswith(prefix):
+                break
+            rank = (position > 0, SUGGESTION_KINDS.index(kind), len(label))
+            match = (kind, label, project_id)
+            if match not in matches or rank < matches[match]:
+                matches[match] = rank
+
+        ordered = sorted(matches, key=lambda match: (matches[match], match[1]))
+        return [
+            {'kind': kind, 'label': label, 'project_id': project_id}
+            for kind, label, project_id in ordered[:limit]
+        ]
+
+
+class TypeaheadRegistry:
+    """Index de suggestions par base de données, propre à chaque worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {base: (version, index, date de vérification)}
+        self._indexes = {}
+
+    def get_index(self, env):
+        """
+        Index à jour pour la base de `env`, reconstruit si besoin.
+
+        Args:
+            env: Environnement (sudo) de la requête
+        """
+        dbname = env.cr.dbname
+        cached = self._indexes.get(dbname)
+        now = time.monotonic()
+        if cached and now - cached[2] < VERSION_CHECK_INTERVAL:
+            return cached[1]
+
+        version = read_public_data_versions(env.cr, ['projects']).get('projects', 0)
+        with self._lock:
+            cached = self._indexes.get(dbname)
+            if cached and cached[0] == version:
+                index = cached[1]
+            else:
+                index = self._build_index(env)
+            self._indexes[dbname] = (version, index, now)
+        return index
+
+    def _build_index(self, env):
+        """Charge les libellés publics en une seule lecture."""
+        Project = env['sama.promis.project']
+        entries = []
+        for row in Project.search_read(Project._get_public_domain(), ['name', 'reference', 'donor_id', 'region']):
+            entries.append(('project', row['name'], row['id']))
+            if row['reference']:
+                entries.append(('reference', row['reference'], row['id']))
+            if row['donor_id']:
+                entries.append(('donor', row['donor_id'][1], None))
+            if row['region']:
+                entries.append(('region', row['region'], None))
+        return PrefixIndex(entry for entry in entries if entry[1])
+
+
+typeahead_registry = TypeaheadRegistry()
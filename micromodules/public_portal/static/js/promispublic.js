@@ -282,6 +282,31 @@ function unfollowProject(projectId) {
     });
 }
 
+// Marquer toutes les notifications comme lues
+function markNotificationsRead() {
+    fetch('/promispublic/citizen/notifications/mark_read', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCsrfToken()
+        },
+        body: JSON.stringify({jsonrpc: '2.0', method: 'call', params: {}})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.result && data.result.success) {
+            document.querySelectorAll('#notifications .alert').forEach(alert => {
+                alert.classList.remove('font-weight-bold');
+            });
+            document.querySelectorAll('#notifications-tab .badge').forEach(badge => badge.remove());
+        }
+    })
+    .catch(error => {
+        console.error('Erreur:', error);
+        showNotification('Erreur lors du marquage des notifications', 'error');
+    });
+}
+
 // Mettre à jour le bouton de suivi
 function updateFollowButton(projectId, isFollowing) {
     const button = document.querySelector(`[data-project-id="${projectId}"]`);
@@ -427,4 +452,5 @@ function formatCurrency(amount) {
 window.samaPromis = samaPromis;
 window.followProject = followProject;
 window.unfollowProject = unfollowProject;
+window.markNotificationsRead = markNotificationsRead;
 window.showNotification = showNotification;
\ No newline at end of file
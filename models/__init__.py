@@ -9,6 +9,10 @@ Modèles principaux pour SAMA PROMIS.
 from . import sama_promis_project
 from . import project_funding_source
 from . import sama_promis_tag
+from . import region
+from . import project_similarity
+from . import project_follower
+from . import citizen_notification
 from . import res_partner
 from . import contract_template
 from . import contract
@@ -20,3 +24,7 @@ from . import procurement_plan
 from . import procurement_plan_line
 from . import compliance_profile
 from . import compliance_task
+from . import public_stats
+from . import open_data
+from . import route_timing
+from . import document_upload
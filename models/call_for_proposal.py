@@ -7,7 +7,8 @@ from datetime import datetime, timedelta
 class SamaPromisCallProposal(models.Model):
     _name = 'sama.promis.call.proposal'
     _description = 'Appel à Propositions SAMA PROMIS'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'sama.promis.public.data.mixin']
+    _public_datasets = ('calls',)
 
     name = fields.Char(string="Référence", required=True, tracking=True)
     title = fields.Char(string="Titre de l'Appel", required=True, tracking=True)
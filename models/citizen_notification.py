@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS - Notifications Citoyennes
+======================================
+
+Boîte de notifications de chaque partenaire sur la page "SAMA PROMIS ET
+MOI": changements d'état des projets suivis, paiements approuvés et
+nouvelles échéances de conformité.
+
+Les notifications sont distribuées aux suiveurs au moment de l'écriture,
+en une requête `INSERT ... SELECT` par lot d'événements; le portail lit
+ensuite des pages par l'index (partenaire, date) et compte les non lues
+par un index partiel.
+"""
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+
+NOTIFICATION_TYPES = [
+    ('project_state', 'Changement d\'État du Projet'),
+    ('payment', 'Paiement'),
+    ('compliance_deadline', 'Échéance de Conformité'),
+]
+
+# Style d'affichage (classe Bootstrap) et icône de chaque type
+NOTIFICATION_STYLES = {
+    'project_state': ('info', 'fa-flag'),
+    'payment': ('success', 'fa-money-bill'),
+    'compliance_deadline': ('warning', 'fa-calendar-check'),
+}
+
+# Notifications par page de la boîte
+NOTIFICATION_PAGE_SIZE = 20
+
+
+class SamaPromisCitizenNotification(models.Model):
+    """Notification d'un partenaire au sujet d'un projet suivi."""
+
+    _name = 'sama.promis.citizen.notification'
+    _description = 'Notification Citoyenne SAMA PROMIS'
+    _order = 'create_date desc, id desc'
+    _rec_name = 'title'
+
+    partner_id = fields.Many2one(
+        'res.partner',
+        string='Destinataire',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    project_id = fields.Many2one(
+        'sama.promis.project',
+        string='Projet',
+        ondelete='cascade',
+        readonly=True
+    )
+
+    notification_type = fields.Selection(
+        NOTIFICATION_TYPES,
+        string='Type',
+        required=True,
+        readonly=True
+    )
+
+    title = fields.Char(string='Titre', required=True, readonly=True)
+    message = fields.Text(string='Message', readonly=True)
+
+    res_model = fields.Char(string='Modèle Source', readonly=True)
+    res_id = fields.Many2oneReference(string='Enregistrement Source', model_field='res_model', readonly=True)
+
+    is_read = fields.Boolean(string='Lue', default=False, required=True, readonly=True)
+
+    def init(self):
+        # Pages de la boîte d'un partenaire, de la plus récente à la plus ancienne
+        create_index(self.env.cr, 'sama_promis_citizen_notification_partner_date_idx', self._table,
+                     ['partner_id', 'create_date DESC', 'id DESC'])
+        # Compteur des non lues
+        create_index(self.env.cr, 'sama_promis_citizen_notification_unread_idx', self._table,
+                     ['partner_id'], where='NOT is_read')
+
+    @api.model
+    def _fan_out(self, events):
+        """
+        Distribue des événements de projet à tous les suiveurs (une requête SQL).
+
+        Args:
+            events (list): {project_id, notification_type, title, message,
+                res_model, res_id}
+
+        Returns:
+            int: Nombre de notifications créées
+        """
+        events = [event for event in events if event.get('project_id')]
+        if not events:
+            return 0
+        rows = SQL(", ").join(
+            SQL("(%s, %s, %s, %s, %s, %s)", event['project_id'], event['notification_type'], event['title'],
+                event.get('message') or '', event.get('res_model'), event.get('res_id') or 0)
+            for event in events
+        )
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %(table)s (partner_id, project_id, notification_type, title, message, res_model, res_id,
+                                   is_read, create_uid, write_uid, create_date, write_date)
+            SELECT follower.partner_id, event.project_id, event.notification_type, event.title, event.message,
+                   event.res_model, event.res_id, false, %(uid)s, %(uid)s,
+                   now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+              FROM (VALUES %(rows)s) AS event(project_id, notification_type, title, message, res_model, res_id)
+              JOIN %(follower_table)s follower ON follower.project_id = event.project_id
+            """,
+            table=SQL.identifier(self._table),
+            follower_table=SQL.identifier(self.env['sama.promis.project.follower']._table),
+            rows=rows,
+            uid=self.env.uid,
+        ))
+        return self.env.cr.rowcount
+
+    @api.model
+    def get_inbox(self, partner_id, page=1, page_size=NOTIFICATION_PAGE_SIZE):
+        """
+        Page de la boîte d'un partenaire.
+
+        Returns:
+            dict: {notifications: [{id, type, kind, icon, title, message, date,
+                read, url}], unread_count, page, has_more}
+        """
+        page = max(page, 1)
+        rows = self.sudo().search_read(
+            [('partner_id', '=', partner_id)],
+            ['notification_type', 'title', 'message', 'project_id', 'create_date', 'is_read'],
+            offset=(page - 1) * page_size,
+            limit=page_size + 1,
+        )
+        notifications = []
+        for row in rows[:page_size]:
+            level, icon = NOTIFICATION_STYLES[row['notification_type']]
+            notifications.append({
+                'id': row['id'],
+                'type': level,
+                'kind': row['notification_type'],
+                'icon': icon,
+                'title': row['title'],
+                'message': row['message'] or '',
+                'date': row['create_date'],
+                'read': row['is_read'],
+                'url': '/promispublic/project/%s' % row['project_id'][0] if row['project_id'] else None,
+            })
+        return {
+            'notifications': notifications,
+            'unread_count': self.get_unread_count(partner_id),
+            'page': page,
+            'has_more': len(rows) > page_size,
+        }
+
+    @api.model
+    def get_unread_count(self, partner_id):
+        """Nombre de notifications non lues (index partiel)."""
+        # Condition écrite comme celle de l'index: le domaine ORM y ajouterait `IS NULL`
+        self.env.cr.execute(SQL(
+            "SELECT count(*) FROM %s WHERE partner_id = %s AND NOT is_read",
+            SQL.identifier(self._table), partner_id,
+        ))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def mark_read(self, partner_id, notification_ids=None):
+        """
+        Marque comme lues des notifications d'un partenaire (une requête SQL).
+
+        Args:
+            partner_id (int): Destinataire
+            notification_ids (list): Notifications à marquer (par défaut: toutes)
+
+        Returns:
+            int: Nombre de notifications marquées
+        """
+        query = SQL(
+            "UPDATE %s SET is_read = true, write_date = now() AT TIME ZONE 'UTC' "
+            "WHERE partner_id = %s AND NOT is_read",
+            SQL.identifier(self._table), partner_id,
+        )
+        if notification_ids is not None:
+            if not notification_ids:
+                return 0
+            query = SQL("%s AND id IN %s", query, tuple(notification_ids))
+        self.env.cr.execute(query)
+        marked = self.env.cr.rowcount
+        self.invalidate_model(['is_read', 'write_date'])
+        return marked
@@ -10,9 +10,11 @@ class SamaPromisComplianceTask(models.Model):
     
     _name = 'sama.promis.compliance.task'
     _description = 'Tâche de Conformité'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'sama.promis.workflow.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'sama.promis.workflow.mixin',
+                'sama.promis.public.data.mixin']
     _order = 'deadline, sequence, id'
     _rec_name = 'name'
+    _public_datasets = ('compliance',)
     
     # Core Fields
     name = fields.Char(
@@ -198,6 +200,33 @@ class SamaPromisComplianceTask(models.Model):
          'La date de complétion réelle ne peut pas être dans le futur!')
     ]
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Notifie les suiveurs du projet des nouvelles échéances."""
+        tasks = super().create(vals_list)
+        tasks._notify_followers_deadline()
+        return tasks
+    
+    def write(self, vals):
+        """Notifie les suiveurs du projet lorsqu'une échéance est reportée."""
+        rescheduled = self.filtered(lambda t: t.deadline != fields.Date.to_date(vals['deadline'])) \
+            if vals.get('deadline') else self.browse()
+        result = super().write(vals)
+        rescheduled._notify_followers_deadline()
+        return result
+    
+    def _notify_followers_deadline(self):
+        """Distribue l'échéance des tâches aux citoyens qui suivent leur projet."""
+        self.env['sama.promis.citizen.notification'].sudo()._fan_out([{
+            'project_id': task.project_id.id,
+            'notification_type': 'compliance_deadline',
+            'title': f'Échéance de conformité: {task.name}',
+            'message': f'Le projet "{task.project_id.name}" a une échéance de conformité '
+                       f'le {task.deadline.strftime("%d/%m/%Y")}: {task.name}.',
+            'res_model': self._name,
+            'res_id': task.id,
+        } for task in self if task.project_id and task.deadline])
+    
     @api.constrains('project_id', 'contract_id')
     def _check_project_or_contract(self):
         """Must have either project_id or contract_id (at least one)."""
@@ -8,7 +8,8 @@ import json
 class SamaPromisContract(models.Model):
     _name = 'sama.promis.contract'
     _description = 'Contrat SAMA PROMIS'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'sama.promis.public.data.mixin']
+    _public_datasets = ('contracts',)
 
     name = fields.Char(string="Référence du Contrat", required=True, tracking=True)
     project_id = fields.Many2one('sama.promis.project', string="Projet",
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS - Téléversement des Documents de Conformité
+=======================================================
+
+Réception des documents joints aux tâches de conformité depuis le portail
+des demandeurs, sans jamais charger le fichier entier en mémoire:
+
+- le contenu est recopié par blocs dans un fichier partiel du filestore,
+  puis déplacé à son emplacement définitif (`<sha1[:2]>/<sha1>`);
+- une session (`sama.promis.document.upload`) mémorise le nombre d'octets
+  reçus: un envoi interrompu reprend au dernier bloc enregistré;
+- un contenu déjà présent dans le filestore (même empreinte SHA-1, celle
+  de `ir.attachment.checksum`) n'est pas écrit une seconde fois: la
+  nouvelle pièce jointe, propre à la tâche, partage le fichier existant.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+import uuid
+from datetime import timedelta
+
+from odoo import models, fields, api, _, Command
+from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Taille maximale d'un document (octets)
+UPLOAD_MAX_SIZE = 200 * 1024 * 1024
+
+# Taille maximale d'un bloc d'un envoi fractionné (octets)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Taille des lectures lors des copies et du calcul des empreintes (octets)
+UPLOAD_COPY_BLOCK = 64 * 1024
+
+# Durée de conservation des sessions inachevées (heures)
+UPLOAD_SESSION_TTL_HOURS = 24
+
+# Répertoire des fichiers partiels, dans le filestore de la base
+UPLOAD_PART_DIR = 'sama_promis_uploads'
+
+
+def copy_stream(stream, target, limit, hasher=None):
+    """
+    Recopie un flux par blocs dans un fichier ouvert, en calculant l'empreinte au passage.
+
+    Args:
+        stream: Flux source (méthode `read`)
+        target: Fichier de destination ouvert en écriture binaire
+        limit (int): Nombre maximal d'octets acceptés
+        hasher: Objet `hashlib` mis à jour avec chaque bloc (optionnel)
+
+    Returns:
+        int: Nombre d'octets recopiés
+
+    Raises:
+        ValidationError: Si le flux dépasse `limit`
+    """
+    copied = 0
+    while True:
+        block = stream.read(min(UPLOAD_COPY_BLOCK, limit - copied + 1))
+        if not block:
+            return copied
+        copied += len(block)
+        if copied > limit:
+            raise ValidationError(_('Le document dépasse la taille maximale autorisée (%s Mo).')
+                                  % (UPLOAD_MAX_SIZE // (1024 * 1024)))
+        if hasher is not None:
+            hasher.update(block)
+        target.write(block)
+
+
+class SamaPromisDocumentUpload(models.Model):
+    """Session de téléversement (reprenable) d'un document de conformité."""
+
+    _name = 'sama.promis.document.upload'
+    _description = 'Téléversement de Document SAMA PROMIS'
+    _order = 'create_date desc, id desc'
+    _rec_name = 'filename'
+
+    token = fields.Char(
+        string='Jeton',
+        required=True,
+        readonly=True,
+        copy=False,
+        default=lambda self: uuid.uuid4().hex
+    )
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Utilisateur',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    task_id = fields.Many2one(
+        'sama.promis.compliance.task',
+        string='Tâche de Conformité',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    filename = fields.Char(string='Nom du Fichier', required=True, readonly=True)
+    mimetype = fields.Char(string='Type MIME', readonly=True)
+
+    file_size = fields.Integer(string='Taille Annoncée (octets)', required=True, readonly=True)
+    received_size = fields.Integer(string='Octets Reçus', default=0, readonly=True)
+    checksum = fields.Char(string='Empreinte Annoncée (SHA-1)', size=40, readonly=True)
+
+    state = fields.Selection([
+        ('uploading', 'En Cours'),
+        ('done', 'Terminé'),
+    ], string='État', default='uploading', required=True, readonly=True)
+
+    attachment_id = fields.Many2one(
+        'ir.attachment',
+        string='Pièce Jointe',
+        ondelete='set null',
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('token_unique', 'UNIQUE(token)', 'Ce jeton de téléversement existe déjà.'),
+        ('file_size_positive', 'CHECK(file_size > 0)', 'La taille du document doit être positive.'),
+    ]
+
+    # ========================================
+    # FILESTORE
+    # ========================================
+
+    @api.model
+    def _part_path(self, token):
+        """Chemin du fichier partiel d'une session (créé au besoin)."""
+        directory = os.path.join(self.env['ir.attachment']._filestore(), UPLOAD_PART_DIR)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, '%s.part' % token)
+
+    @api.model
+    def _store_part(self, task, filename, mimetype, path, checksum, file_size):
+        """
+        Joint à une tâche le fichier partiel `path` (contenu d'empreinte `checksum`).
+
+        Crée toujours une pièce jointe propre à la tâche; seul le contenu est
+        dédupliqué: si le filestore contient déjà ce fichier, la pièce jointe
+        le partage et le fichier partiel est supprimé, sinon il y est déplacé
+        sans être relu.
+
+        Returns:
+            ir.attachment: Pièce jointe liée à la tâche
+        """
+        Attachment = self.env['ir.attachment'].sudo()
+        values = {
+            'name': filename,
+            'res_model': 'sama.promis.compliance.task',
+            'res_id': task.id,
+            'type': 'binary',
+            'mimetype': mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        }
+        if Attachment._storage() == 'file':
+            # Même emplacement que `ir.attachment._get_path`: les contenus identiques y sont partagés
+            store_fname = '%s/%s' % (checksum[:2], checksum)
+            full_path = Attachment._full_path(store_fname)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if os.path.exists(full_path):
+                os.unlink(path)
+            else:
+                os.replace(path, full_path)
+            # Si la transaction est annulée, le ramasse-miettes du filestore supprimera le fichier
+            Attachment._mark_for_gc(store_fname)
+            values.update(store_fname=store_fname, file_size=file_size, checksum=checksum)
+        else:
+            # Stockage en base: le contenu doit de toute façon transiter par la mémoire
+            with open(path, 'rb') as part:
+                values['raw'] = part.read()
+            os.unlink(path)
+        attachment = Attachment.create(values)
+        task.sudo().write({'document_ids': [Command.link(attachment.id)]})
+        return attachment
+
+    # ========================================
+    # ENVOI EN UNE FOIS
+    # ========================================
+
+    @api.model
+    def upload_stream(self, task, filename, stream, mimetype=None):
+        """
+        Joint à une tâche un document reçu en une seule requête (formulaire).
+
+        Le flux est recopié par blocs dans le filestore et son empreinte
+        calculée pendant la copie.
+
+        Returns:
+            ir.attachment: Pièce jointe liée à la tâche
+        """
+        path = self._part_path(uuid.uuid4().hex)
+        hasher = hashlib.sha1()
+        try:
+            with open(path, 'wb') as part:
+                file_size = copy_stream(stream, part, UPLOAD_MAX_SIZE, hasher)
+            if not file_size:
+                raise ValidationError(_('Le document est vide.'))
+            return self._store_part(task, filename, mimetype, path, hasher.hexdigest(), file_size)
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    # ========================================
+    # ENVOI FRACTIONNÉ ET REPRENABLE
+    # ========================================
+
+    @api.model
+    def start_upload(self, task, filename, file_size, checksum=None, mimetype=None):
+        """
+        Ouvre une session de téléversement fractionné.
+
+        L'empreinte annoncée ne sert qu'à vérifier le fichier reçu: le
+        contenu est toujours transféré, le serveur n'ayant aucune preuve que
+        le client détient un document déjà stocké.
+
+        Args:
+            task (sama.promis.compliance.task): Tâche destinataire
+            filename (str): Nom du fichier
+            file_size (int): Taille totale annoncée (octets)
+            checksum (str): Empreinte SHA-1 annoncée (optionnelle)
+            mimetype (str): Type MIME annoncé (optionnel)
+
+        Returns:
+            sama.promis.document.upload: Session
+        """
+        if file_size <= 0:
+            raise ValidationError(_('Le document est vide.'))
+        if file_size > UPLOAD_MAX_SIZE:
+            raise ValidationError(_('Le document dépasse la taille maximale autorisée (%s Mo).')
+                                  % (UPLOAD_MAX_SIZE // (1024 * 1024)))
+        checksum = (checksum or '').lower() or False
+        return self.sudo().create({
+            'user_id': self.env.uid,
+            'task_id': task.id,
+            'filename': filename,
+            'mimetype': mimetype,
+            'file_size': file_size,
+            'checksum': checksum,
+        })
+
+    def write_chunk(self, offset, stream, length):
+        """
+        Enregistre un bloc d'une session à la position `offset`.
+
+        Les blocs d'une même session sont sérialisés par un verrou de ligne;
+        un bloc qui ne commence pas au nombre d'octets déjà reçus est refusé
+        (le client reprend alors à `received_size`). Le dernier bloc termine
+        la session et joint le document à la tâche; si l'empreinte annoncée
+        ne correspond pas, la session repart de zéro.
+
+        Args:
+            offset (int): Position du bloc dans le fichier
+            stream: Corps de la requête
+            length (int): Taille du bloc (octets)
+
+        Returns:
+            bool: False si le bloc est refusé (position inattendue, bloc
+                incomplet ou empreinte erronée)
+        """
+        self.ensure_one()
+        if length <= 0 or length > UPLOAD_CHUNK_SIZE:
+            raise ValidationError(_('Taille de bloc invalide (maximum %s Mo).') % (UPLOAD_CHUNK_SIZE // (1024 * 1024)))
+        self.env.cr.execute(SQL(
+            "SELECT received_size, state FROM %s WHERE id = %s FOR UPDATE",
+            SQL.identifier(self._table), self.id,
+        ))
+        received_size, state = self.env.cr.fetchone()
+        self.invalidate_recordset(['received_size', 'state'])
+        if state != 'uploading' or offset != received_size:
+            return False
+        if offset + length > self.file_size:
+            raise ValidationError(_('Le bloc dépasse la taille annoncée du document.'))
+
+        path = self._part_path(self.token)
+        if offset and (not os.path.exists(path) or os.path.getsize(path) < offset):
+            # Fichier partiel perdu (transaction annulée après son déplacement): tout reprendre
+            self.sudo().write({'received_size': 0})
+            return False
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as part:
+            part.seek(offset)
+            written = copy_stream(stream, part, length)
+            # Un essai précédent interrompu a pu écrire au-delà de ce qui a été validé
+            part.truncate()
+        if written != length:
+            # Bloc tronqué (connexion interrompue): le client le renverra
+            return False
+
+        self.sudo().write({'received_size': offset + written})
+        if self.received_size == self.file_size:
+            return self._finish()
+        return True
+
+    def _finish(self):
+        """
+        Vérifie l'empreinte du fichier reçu et le joint à la tâche.
+
+        Returns:
+            bool: False si l'empreinte diffère de celle annoncée (la session
+                est alors remise à zéro)
+        """
+        self.ensure_one()
+        path = self._part_path(self.token)
+        hasher = hashlib.sha1()
+        with open(path, 'rb') as part:
+            for block in iter(lambda: part.read(UPLOAD_COPY_BLOCK), b''):
+                hasher.update(block)
+        checksum = hasher.hexdigest()
+        if self.checksum and self.checksum != checksum:
+            _logger.info("Téléversement %s: empreinte inattendue, envoi à reprendre", self.token)
+            os.unlink(path)
+            self.sudo().write({'received_size': 0})
+            return False
+        attachment = self._store_part(self.task_id, self.filename, self.mimetype, path, checksum, self.file_size)
+        self.sudo().write({'state': 'done', 'attachment_id': attachment.id})
+        return True
+
+    def get_status(self):
+        """État d'une session, tel que renvoyé au client."""
+        self.ensure_one()
+        return {
+            'upload_id': self.token,
+            'offset': self.received_size,
+            'size': self.file_size,
+            'chunk_size': UPLOAD_CHUNK_SIZE,
+            'done': self.state == 'done',
+            'attachment_id': self.attachment_id.id or None,
+        }
+
+    # ========================================
+    # MAINTENANCE
+    # ========================================
+
+    @api.model
+    def cron_purge_upload_sessions(self):
+        """Point d'entrée du cron: supprime les sessions anciennes et leurs fichiers partiels."""
+        limit = fields.Datetime.now() - timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+        sessions = self.sudo().search([('write_date', '<', limit)])
+        for session in sessions.filtered(lambda s: s.state == 'uploading'):
+            path = self._part_path(session.token)
+            if os.path.exists(path):
+                os.unlink(path)
+        sessions.unlink()
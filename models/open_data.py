@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS - Fichiers Open Data
+================================
+
+Exports complets des données publiques (projets, financements, plans de
+passation, appels à propositions), régénérés par cron lorsque les
+données changent et conservés compressés dans le filestore.
+
+Les intégrateurs téléchargent ces fichiers statiques au lieu de relancer
+l'export dynamique; un manifeste liste tailles, nombres de lignes et
+sommes de contrôle SHA-256.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+from odoo import models, fields, api
+
+from .public_stats import read_public_data_versions
+from .sama_promis_project import PUBLIC_PROCUREMENT_STATES
+
+# Formats produits pour chaque jeu de données
+OPEN_DATA_FORMATS = [
+    ('csv', 'CSV'),
+    ('ndjson', 'NDJSON'),
+]
+
+# Appels à propositions publiés (en cours ou passés)
+OPEN_DATA_CALL_STATES = ['published', 'evaluation', 'closed']
+
+# Jeux de données: modèle, versions dont dépend le fichier, colonnes (champ, en-tête)
+OPEN_DATA_DATASETS = {
+    'projects': {
+        'model': 'sama.promis.project',
+        'versions': ('projects',),
+        'columns': [
+            ('reference', 'reference'), ('name', 'name'), ('project_type', 'type'), ('state', 'state'),
+            ('total_budget', 'budget'), ('currency_id', 'currency'), ('donor_id', 'donor'),
+            ('region', 'region'), ('start_date', 'start_date'), ('end_date', 'end_date'),
+        ],
+    },
+    'funding': {
+        'model': 'sama.promis.project.funding.source',
+        'versions': ('funding', 'projects'),
+        'columns': [
+            ('project_id', 'project'), ('partner_id', 'donor'), ('funding_type', 'type'),
+            ('funding_origin', 'origin'), ('state', 'state'), ('amount', 'amount'),
+            ('currency_id', 'currency'), ('commitment_date', 'commitment_date'),
+            ('received_date', 'received_date'),
+        ],
+    },
+    'procurement': {
+        'model': 'sama.promis.procurement.plan',
+        'versions': ('procurement', 'projects'),
+        'columns': [
+            ('reference', 'reference'), ('name', 'name'), ('project_id', 'project'),
+            ('plan_type', 'type'), ('state', 'state'), ('fiscal_year', 'fiscal_year'),
+            ('total_estimated_cost', 'estimated_cost'), ('currency_id', 'currency'),
+            ('plan_start_date', 'start_date'), ('plan_end_date', 'end_date'),
+        ],
+    },
+    'calls': {
+        'model': 'sama.promis.call.proposal',
+        'versions': ('calls',),
+        'columns': [
+            ('name', 'reference'), ('title', 'title'), ('state', 'state'), ('donor_id', 'donor'),
+            ('total_budget', 'budget'), ('currency_id', 'currency'),
+            ('publication_date', 'publication_date'), ('submission_deadline', 'submission_deadline'),
+        ],
+    },
+}
+
+# Nombre d'enregistrements lus par lot lors de la génération
+OPEN_DATA_BATCH_SIZE = 1000
+
+# Sous-dossier du filestore recevant les fichiers en cours de génération
+OPEN_DATA_TMP_DIR = 'open_data_tmp'
+
+
+class _HashingFile(object):
+    """Fichier en écriture qui calcule taille, SHA-1 et SHA-256 du contenu écrit."""
+
+    def __init__(self, target):
+        self.target = target
+        self.size = 0
+        self.sha1 = hashlib.sha1()
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.target.write(data)
+        self.size += len(data)
+        self.sha1.update(data)
+        self.sha256.update(data)
+        return len(data)
+
+    def flush(self):
+        self.target.flush()
+
+
+# Pseudo-jeu de données désignant les fichiers Open Data eux-mêmes (manifeste)
+PUBLIC_OPEN_DATA = 'open_data'
+
+
+def read_open_data_version(cr):
+    """
+    Version des fichiers Open Data générés (une requête SQL).
+
+    Les fichiers ne changent qu'au passage du cron de génération, pas au
+    commit des données sources: le manifeste est identifié par les sommes
+    de contrôle et dates de génération des fichiers qu'il décrit.
+
+    Args:
+        cr: Curseur de base de données
+
+    Returns:
+        str: Empreinte MD5 des fichiers disponibles
+    """
+    cr.execute("""
+        SELECT md5(COALESCE(string_agg(
+                   concat_ws(':', dataset, file_format, checksum, source_version, generated_at),
+                   ',' ORDER BY dataset, file_format), ''))
+          FROM sama_promis_open_data
+         WHERE attachment_id IS NOT NULL
+    """)
+    return cr.fetchone()[0]
+
+
+def _export_value(value):
+    """Valeur exportée: nom des relations, dates ISO, vide pour False."""
+    if isinstance(value, (list, tuple)):
+        return value[1] if value else ''
+    if value is False or value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class SamaPromisOpenData(models.Model):
+    """Fichier Open Data pré-généré (un par jeu de données et par format)."""
+
+    _name = 'sama.promis.open.data'
+    _description = 'Fichier Open Data SAMA PROMIS'
+    _order = 'dataset, file_format'
+    _rec_name = 'filename'
+
+    dataset = fields.Selection(
+        [(dataset, dataset) for dataset in OPEN_DATA_DATASETS],
+        string='Jeu de Données',
+        required=True,
+        readonly=True
+    )
+
+    file_format = fields.Selection(
+        OPEN_DATA_FORMATS,
+        string='Format',
+        required=True,
+        readonly=True
+    )
+
+    filename = fields.Char(
+        string='Fichier',
+        readonly=True
+    )
+
+    attachment_id = fields.Many2one(
+        'ir.attachment',
+        string='Pièce Jointe',
+        readonly=True,
+        ondelete='set null'
+    )
+
+    source_version = fields.Char(
+        string='Version Source',
+        readonly=True,
+        help="Versions des jeux de données au moment de la génération"
+    )
+
+    row_count = fields.Integer(string='Lignes', readonly=True)
+    file_size = fields.Integer(string='Taille (octets)', readonly=True)
+    checksum = fields.Char(string='SHA-256', readonly=True)
+    generated_at = fields.Datetime(string='Généré le', readonly=True)
+
+    _sql_constraints = [
+        ('dataset_format_unique', 'UNIQUE(dataset, file_format)', 'Un seul fichier par jeu de données et par format.')
+    ]
+
+    @api.model
+    def _get_dataset_domain(self, dataset):
+        """Domaine des enregistrements publiés d'un jeu de données."""
+        if dataset == 'projects':
+            return self.env['sama.promis.project']._get_public_domain()
+        if dataset == 'funding':
+            return self.env['sama.promis.project.funding.source']._get_public_funding_domain()
+        if dataset == 'procurement':
+            return [('state', 'in', PUBLIC_PROCUREMENT_STATES)]
+        if dataset == 'calls':
+            return [('state', 'in', OPEN_DATA_CALL_STATES)]
+        raise ValueError("Unknown open data dataset: %s" % dataset)
+
+    @api.model
+    def _iter_dataset_rows(self, dataset):
+        """Parcourt les lignes exportées d'un jeu de données par lots (ordre des ids)."""
+        spec = OPEN_DATA_DATASETS[dataset]
+        Model = self.env[spec['model']].sudo()
+        domain = self._get_dataset_domain(dataset)
+        field_names = [field_name for field_name, _header in spec['columns']]
+        last_id = 0
+        while True:
+            rows = Model.search_read(domain + [('id', '>', last_id)], field_names, order='id',
+                                     limit=OPEN_DATA_BATCH_SIZE)
+            if not rows:
+                return
+            last_id = rows[-1]['id']
+            for row in rows:
+                yield {'id': row['id'], **{
+                    header: _export_value(row[field_name]) for field_name, header in spec['columns']
+                }}
+            self.env.invalidate_all()
+
+    @api.model
+    def _build_dataset_files(self, dataset):
+        """
+        Produit les fichiers compressés d'un jeu de données en une seule lecture.
+
+        Chaque fichier est écrit au fil de l'eau dans un fichier temporaire
+        (dans le filestore si les pièces jointes y sont stockées): la mémoire
+        utilisée ne dépend pas de la taille du jeu de données. L'appelant
+        doit déplacer ou supprimer les fichiers renvoyés.
+
+        Returns:
+            tuple: ({format: {path, size, sha1, sha256}}, nombre de lignes)
+        """
+        directory = None
+        if self.env['ir.attachment']._storage() == 'file':
+            directory = os.path.join(self.env['ir.attachment']._filestore(), OPEN_DATA_TMP_DIR)
+            os.makedirs(directory, exist_ok=True)
+        headers = ['id'] + [header for _field, header in OPEN_DATA_DATASETS[dataset]['columns']]
+        files, targets, streams = {}, {}, {}
+        try:
+            for file_format, _label in OPEN_DATA_FORMATS:
+                fd, path = tempfile.mkstemp(prefix='%s.' % dataset, suffix='.%s.gz' % file_format, dir=directory)
+                files[file_format] = path
+                targets[file_format] = _HashingFile(os.fdopen(fd, 'wb'))
+                # mtime=0 et pas de nom: contenu identique pour des données identiques
+                streams[file_format] = io.TextIOWrapper(
+                    gzip.GzipFile(filename='', fileobj=targets[file_format], mode='wb', mtime=0),
+                    encoding='utf-8', newline='')
+            writer = csv.DictWriter(streams['csv'], fieldnames=headers)
+            writer.writeheader()
+            row_count = 0
+            for row in self._iter_dataset_rows(dataset):
+                writer.writerow(row)
+                streams['ndjson'].write(json.dumps(row, ensure_ascii=False) + '\n')
+                row_count += 1
+            for file_format in files:
+                streams.pop(file_format).close()
+                targets[file_format].target.close()
+        except Exception:
+            for file_format, path in files.items():
+                if file_format in targets:
+                    targets[file_format].target.close()
+                os.unlink(path)
+            raise
+        return {file_format: {
+            'path': path,
+            'size': targets[file_format].size,
+            'sha1': targets[file_format].sha1.hexdigest(),
+            'sha256': targets[file_format].sha256.hexdigest(),
+        } for file_format, path in files.items()}, row_count
+
+    @api.model
+    def _create_dump_attachment(self, filename, built):
+        """
+        Pièce jointe publique d'un fichier produit par `_build_dataset_files`.
+
+        En stockage fichier, le fichier temporaire est déplacé à son
+        emplacement définitif (`<sha1[:2]>/<sha1>`) sans être relu.
+        """
+        Attachment = self.env['ir.attachment'].sudo()
+        values = {
+            'name': filename,
+            'mimetype': 'application/gzip',
+            'res_model': self._name,
+            'public': True,
+        }
+        if Attachment._storage() == 'file':
+            # Même emplacement que `ir.attachment._get_path`: les contenus identiques y sont partagés
+            store_fname = '%s/%s' % (built['sha1'][:2], built['sha1'])
+            full_path = Attachment._full_path(store_fname)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if os.path.exists(full_path):
+                os.unlink(built['path'])
+            else:
+                os.replace(built['path'], full_path)
+            # Si la transaction est annulée, le ramasse-miettes du filestore supprimera le fichier
+            Attachment._mark_for_gc(store_fname)
+            values.update(store_fname=store_fname, file_size=built['size'], checksum=built['sha1'])
+        else:
+            # Stockage en base: le contenu doit de toute façon transiter par la mémoire
+            with open(built['path'], 'rb') as dump:
+                values['raw'] = dump.read()
+            os.unlink(built['path'])
+        return Attachment.create(values)
+
+    @api.model
+    def generate(self, datasets=None, force=False):
+        """
+        Régénère les fichiers dont les données sources ont changé.
+
+        Args:
+            datasets (list): Jeux de données à considérer (par défaut: tous)
+            force (bool): Régénérer même les fichiers à jour
+
+        Returns:
+            list: Jeux de données régénérés
+        """
+        versions = read_public_data_versions(self.env.cr)
+        files = {(record.dataset, record.file_format): record for record in self.sudo().search([])}
+
+        generated = []
+        for dataset in datasets or OPEN_DATA_DATASETS:
+            source_version = ','.join(
+                '%s:%s' % (name, versions.get(name, 0)) for name in OPEN_DATA_DATASETS[dataset]['versions']
+            )
+            current = [files.get((dataset, file_format)) for file_format, _label in OPEN_DATA_FORMATS]
+            if not force and all(record and record.source_version == source_version for record in current):
+                continue
+
+            built_files, row_count = self._build_dataset_files(dataset)
+            try:
+                for file_format, built in built_files.items():
+                    filename = '%s.%s.gz' % (dataset, file_format)
+                    attachment = self._create_dump_attachment(filename, built)
+                    vals = {
+                        'filename': filename,
+                        'attachment_id': attachment.id,
+                        'source_version': source_version,
+                        'row_count': row_count,
+                        'file_size': built['size'],
+                        'checksum': built['sha256'],
+                        'generated_at': fields.Datetime.now(),
+                    }
+                    record = files.get((dataset, file_format))
+                    if record:
+                        previous = record.attachment_id
+                        record.write(vals)
+                        previous.unlink()
+                    else:
+                        self.sudo().create(dict(vals, dataset=dataset, file_format=file_format))
+            finally:
+                # Fichiers temporaires non déplacés (erreur en cours de route)
+                for built in built_files.values():
+                    if os.path.exists(built['path']):
+                        os.unlink(built['path'])
+            generated.append(dataset)
+        return generated
+
+    @api.model
+    def cron_generate_open_data(self):
+        """Point d'entrée du cron de génération des fichiers Open Data."""
+        self.generate()
+
+    @api.model
+    def get_manifest(self):
+        """
+        Manifeste des fichiers disponibles.
+
+        Returns:
+            list: {dataset, format, filename, url, size, rows, sha256, version, generated_at}
+        """
+        return [{
+            'dataset': record.dataset,
+            'format': record.file_format,
+            'filename': record.filename,
+            'url': '/promispublic/opendata/%s?v=%s' % (record.filename, record.checksum[:12]),
+            'size': record.file_size,
+            'rows': record.row_count,
+            'sha256': record.checksum,
+            'version': record.source_version,
+            'generated_at': fields.Datetime.to_string(record.generated_at),
+        } for record in self.sudo().search([('attachment_id', '!=', False)])]
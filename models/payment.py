@@ -3,11 +3,21 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
 
+# Payment states published on the portal (and notified to project followers)
+PUBLISHED_PAYMENT_STATES = ('approved', 'paid')
+
+# Verb of the follower notification for each published state
+PUBLISHED_PAYMENT_VERBS = {'approved': 'approuvé', 'paid': 'versé'}
+
+# Fields the cached citizen statistics depend on
+CITIZEN_STATS_FIELDS = {'project_id', 'amount', 'state'}
+
 class SamaPromisPaymentRequest(models.Model):
     _name = 'sama.promis.payment.request'
     _description = 'Payment Request'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'sama.promis.public.data.mixin']
     _order = 'request_date desc'
+    _public_datasets = ('payments',)
     
     # Basic Information
     name = fields.Char('Reference', readonly=True, default=lambda self: _('New'))
@@ -46,7 +56,44 @@ class SamaPromisPaymentRequest(models.Model):
         for vals in vals_list:
             if vals.get('name', _('New')) == _('New'):
                 vals['name'] = self.env['ir.sequence'].next_by_code('sama.promis.payment.request')
-        return super().create(vals_list)
+        payments = super().create(vals_list)
+        payments.filtered(lambda p: p.state in PUBLISHED_PAYMENT_STATES)._notify_project_followers()
+        payments._invalidate_citizen_stats()
+        return payments
+    
+    def write(self, vals):
+        published = self.browse()
+        if vals.get('state') in PUBLISHED_PAYMENT_STATES:
+            published = self.filtered(lambda p: p.state not in PUBLISHED_PAYMENT_STATES)
+        stats_changed = CITIZEN_STATS_FIELDS & set(vals)
+        if stats_changed:
+            self._invalidate_citizen_stats()
+        result = super().write(vals)
+        if stats_changed:
+            self._invalidate_citizen_stats()
+        published._notify_project_followers()
+        return result
+    
+    def unlink(self):
+        self._invalidate_citizen_stats()
+        return super().unlink()
+    
+    def _invalidate_citizen_stats(self):
+        """Drop the cached citizen statistics of the payees."""
+        self.env['res.partner']._invalidate_promis_citizen_stats(self.partner_id.ids)
+    
+    def _notify_project_followers(self):
+        """Notify citizens following the project of a newly approved or paid payment."""
+        self.env['sama.promis.citizen.notification'].sudo()._fan_out([{
+            'project_id': payment.project_id.id,
+            'notification_type': 'payment',
+            'title': f'Nouveau paiement: {payment.project_id.name}',
+            'message': f'Un paiement de {payment.amount:,.0f} {payment.currency_id.name or ""} '
+                       f'a été {PUBLISHED_PAYMENT_VERBS.get(payment.state, "approuvé")} '
+                       f'pour le projet "{payment.project_id.name}".',
+            'res_model': self._name,
+            'res_id': payment.id,
+        } for payment in self])
     
     def action_submit(self):
         self.write({'state': 'submitted'})
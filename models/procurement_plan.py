@@ -10,9 +10,11 @@ class SamaPromisProcurementPlan(models.Model):
     
     _name = 'sama.promis.procurement.plan'
     _description = 'Plan de Passation de Marché'
-    _inherit = ['mail.thread', 'mail.activity.mixin', 'sama.promis.workflow.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'sama.promis.workflow.mixin',
+                'sama.promis.public.data.mixin']
     _order = 'create_date desc'
     _rec_name = 'name'
+    _public_datasets = ('procurement',)
     
     # Core Fields
     name = fields.Char(
@@ -222,8 +222,9 @@ class ProjectProject(models.Model):
 class SamaPromisProjectEvent(models.Model):
     _name = 'sama.promis.project.event'
     _description = 'Événement de Projet SAMA PROMIS'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'sama.promis.public.data.mixin']
     _order = 'start_date desc'
+    _public_datasets = ('events',)
 
     name = fields.Char(string="Nom de l'Événement", required=True, tracking=True)
     project_id = fields.Many2one('project.project', string="Projet", 
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS - Suivi Citoyen des Projets
+=======================================
+
+Relation entre un partenaire (citoyen) et les projets publics qu'il suit
+depuis la page "SAMA PROMIS ET MOI".
+
+L'index unique (partenaire, projet) sert les recherches "mes projets
+suivis"; le nombre de suiveurs est tenu à jour sur le projet
+(`follower_count`, indexé) pour le classement par popularité.
+"""
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+class SamaPromisProjectFollower(models.Model):
+    """Projet suivi par un partenaire."""
+
+    _name = 'sama.promis.project.follower'
+    _description = 'Suivi de Projet SAMA PROMIS'
+    _order = 'create_date desc, id desc'
+
+    partner_id = fields.Many2one(
+        'res.partner',
+        string='Partenaire',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    project_id = fields.Many2one(
+        'sama.promis.project',
+        string='Projet',
+        required=True,
+        ondelete='cascade',
+        index=True,
+        readonly=True
+    )
+
+    # L'index de la contrainte (partner_id en tête) sert aussi les recherches par partenaire
+    _sql_constraints = [
+        ('partner_project_unique', 'UNIQUE(partner_id, project_id)', 'Ce projet est déjà suivi.')
+    ]
+
+    @api.model
+    def _shift_follower_counts(self, project_ids, delta):
+        """Ajoute `delta` au compteur de suiveurs des projets (une requête SQL)."""
+        if not project_ids:
+            return
+        Project = self.env['sama.promis.project']
+        # Pas de write ORM: ni audit ni nouvelle version du projet pour un suivi
+        self.env.cr.execute(SQL(
+            "UPDATE %s SET follower_count = GREATEST(follower_count + %s, 0) WHERE id IN %s",
+            SQL.identifier(Project._table), delta, tuple(project_ids),
+        ))
+        Project.invalidate_model(['follower_count'])
+        # Seul le classement par popularité de la page citoyenne dépend des compteurs
+        Project._mark_public_data_changed(('followers',))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._shift_follower_counts(records.project_id.ids, 1)
+        self.env['res.partner']._invalidate_promis_citizen_stats(records.partner_id.ids)
+        return records
+
+    def unlink(self):
+        project_ids = self.project_id.ids
+        self.env['res.partner']._invalidate_promis_citizen_stats(self.partner_id.ids)
+        result = super().unlink()
+        self._shift_follower_counts(project_ids, -1)
+        return result
+
+    @api.model
+    def follow(self, partner_id, project_ids):
+        """
+        Fait suivre des projets à un partenaire (sans effet s'ils sont déjà suivis).
+
+        Args:
+            partner_id (int): Partenaire
+            project_ids (list): Projets à suivre
+
+        Returns:
+            list: Projets effectivement ajoutés
+        """
+        if not project_ids:
+            return []
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %(table)s (partner_id, project_id, create_uid, write_uid, create_date, write_date)
+            SELECT %(partner_id)s, project_id, %(uid)s, %(uid)s,
+                   now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC'
+              FROM unnest(%(project_ids)s) AS project_id
+            ON CONFLICT (partner_id, project_id) DO NOTHING
+            RETURNING project_id
+            """,
+            table=SQL.identifier(self._table),
+            partner_id=partner_id,
+            uid=self.env.uid,
+            project_ids=list(project_ids),
+        ))
+        added = [project_id for project_id, in self.env.cr.fetchall()]
+        self._shift_follower_counts(added, 1)
+        if added:
+            self.env['res.partner']._invalidate_promis_citizen_stats([partner_id])
+        return added
+
+    @api.model
+    def unfollow(self, partner_id, project_ids):
+        """
+        Arrête le suivi de projets par un partenaire.
+
+        Returns:
+            list: Projets effectivement retirés
+        """
+        if not project_ids:
+            return []
+        self.env.cr.execute(SQL(
+            "DELETE FROM %s WHERE partner_id = %s AND project_id IN %s RETURNING project_id",
+            SQL.identifier(self._table), partner_id, tuple(project_ids),
+        ))
+        removed = [project_id for project_id, in self.env.cr.fetchall()]
+        self.invalidate_model()
+        self._shift_follower_counts(removed, -1)
+        if removed:
+            self.env['res.partner']._invalidate_promis_citizen_stats([partner_id])
+        return removed
+
+    @api.model
+    def get_followed_projects(self, partner_id, limit=None):
+        """
+        Projets publics suivis par un partenaire, du plus récemment suivi au plus ancien.
+
+        Args:
+            partner_id (int): Partenaire
+            limit (int): Nombre maximal de projets
+
+        Returns:
+            recordset: `sama.promis.project`
+        """
+        Project = self.env['sama.promis.project'].sudo()
+        follows = self.sudo().search([
+            ('partner_id', '=', partner_id),
+            ('project_id', 'any', Project._get_public_domain()),
+        ], limit=limit)
+        return follows.project_id
+
+    @api.model
+    def get_followed_count(self, partner_id):
+        """Nombre de projets publics suivis par un partenaire."""
+        Project = self.env['sama.promis.project'].sudo()
+        return self.sudo().search_count([
+            ('partner_id', '=', partner_id),
+            ('project_id', 'any', Project._get_public_domain()),
+        ])
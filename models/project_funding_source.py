@@ -2,6 +2,7 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
 
 
 class SamaPromisProjectFundingSource(models.Model):
@@ -9,8 +10,9 @@ class SamaPromisProjectFundingSource(models.Model):
     
     _name = 'sama.promis.project.funding.source'
     _description = 'Source de Financement de Projet'
-    _inherit = ['mail.thread']
+    _inherit = ['mail.thread', 'sama.promis.public.data.mixin']
     _order = 'sequence, id'
+    _public_datasets = ('funding',)
     
     # Basic Information
     name = fields.Char(
@@ -205,3 +207,147 @@ class SamaPromisProjectFundingSource(models.Model):
         for project in projects:
             project._compute_funding_totals()
         return result
+
+    # Public funding aggregation
+
+    @api.model
+    def _get_public_funding_domain(self):
+        """Funding sources shown on the public portal: non-cancelled sources of public projects."""
+        Project = self.env['sama.promis.project']
+        return [
+            ('project_id', 'any', Project._get_public_domain()),
+            ('state', '!=', 'cancelled'),
+        ]
+
+    @api.model
+    def _currency_rate_sql(self, currency, rate_date, company):
+        """
+        SQL expression of the rate of `currency` at `rate_date`, as res.currency does:
+        latest rate on or before the date (company rate first), otherwise the
+        oldest known rate, otherwise 1.
+        """
+        return SQL(
+            """COALESCE(
+                (SELECT r.rate FROM res_currency_rate r
+                  WHERE r.currency_id = %(currency)s AND r.name <= %(date)s
+                    AND (r.company_id = %(company)s OR r.company_id IS NULL)
+                  ORDER BY r.company_id IS NULL, r.name DESC LIMIT 1),
+                (SELECT r.rate FROM res_currency_rate r
+                  WHERE r.currency_id = %(currency)s
+                    AND (r.company_id = %(company)s OR r.company_id IS NULL)
+                  ORDER BY r.company_id IS NULL, r.name ASC LIMIT 1),
+                1.0
+            )""",
+            currency=currency, date=rate_date, company=company.id,
+        )
+
+    @api.model
+    def get_public_funding_breakdown(self, domain=None, currency=None):
+        """
+        Aggregate funding per donor, per origin and per currency in one grouped query.
+
+        Each source is converted at the rate of its received date (else its
+        commitment date, else today) into the target currency, so sources
+        in different currencies can be added up.
+
+        Args:
+            domain (list): Funding sources to aggregate (default: public funding)
+            currency (res.currency): Target currency (default: company currency)
+
+        Returns:
+            dict: {
+                'currency': target currency,
+                'total': converted total,
+                'by_donor': [{donor, total, project_count, source_count, origins, currencies}],
+                'by_origin': {origin: {total, project_count, source_count}},
+                'by_currency': [{currency, amount, total, source_count}],
+            }
+        """
+        if domain is None:
+            domain = self._get_public_funding_domain()
+        company = self.env.company
+        currency = currency or company.currency_id
+        query = self._search(domain)
+
+        self.env.cr.execute(SQL(
+            """
+            WITH sources AS (
+                SELECT partner_id, funding_origin, currency_id, project_id, amount,
+                       COALESCE(received_date, commitment_date, CURRENT_DATE) AS rate_date
+                  FROM %(table)s
+                 WHERE id IN %(ids)s
+            ), rates AS (
+                SELECT dated.currency_id, dated.rate_date,
+                       %(target_rate)s / %(source_rate)s AS factor
+                  FROM (SELECT DISTINCT currency_id, rate_date FROM sources) dated
+            )
+            SELECT GROUPING(s.partner_id), GROUPING(s.funding_origin), GROUPING(s.currency_id),
+                   s.partner_id, s.funding_origin, s.currency_id,
+                   COUNT(DISTINCT s.project_id), COUNT(*),
+                   SUM(s.amount), SUM(s.amount * r.factor)
+              FROM sources s
+              JOIN rates r ON r.currency_id = s.currency_id AND r.rate_date = s.rate_date
+             GROUP BY GROUPING SETS (
+                (s.partner_id, s.funding_origin, s.currency_id),
+                (s.partner_id),
+                (s.funding_origin),
+                (s.currency_id),
+                ()
+             )
+            """,
+            table=SQL.identifier(self._table),
+            ids=query.subselect(),
+            target_rate=self._currency_rate_sql(currency.id, SQL('dated.rate_date'), company),
+            source_rate=self._currency_rate_sql(SQL('dated.currency_id'), SQL('dated.rate_date'), company),
+        ))
+        rows = self.env.cr.fetchall()
+
+        Partner = self.env['res.partner']
+        Currency = self.env['res.currency']
+        origin_labels = dict(self._fields['funding_origin']._description_selection(self.env))
+        result = {
+            'currency': currency,
+            'total': 0.0,
+            'by_donor': [],
+            'by_origin': {},
+            'by_currency': [],
+        }
+        donors = {}
+        for no_donor, no_origin, no_currency, partner_id, origin, currency_id, \
+                project_count, source_count, amount, total in rows:
+            total = currency.round(total or 0.0)
+            if no_donor and no_origin and no_currency:
+                result['total'] = total
+            elif no_donor and no_currency:
+                result['by_origin'][origin] = {
+                    'label': origin_labels.get(origin, origin or ''),
+                    'total': total,
+                    'project_count': project_count,
+                    'source_count': source_count,
+                }
+            elif no_donor and no_origin:
+                result['by_currency'].append({
+                    'currency': Currency.browse(currency_id),
+                    'amount': amount or 0.0,
+                    'total': total,
+                    'source_count': source_count,
+                })
+            else:
+                donor = donors.setdefault(partner_id, {
+                    'donor': Partner.browse(partner_id),
+                    'total': 0.0,
+                    'project_count': 0,
+                    'source_count': 0,
+                    'origins': {},
+                    'currencies': {},
+                })
+                if no_origin:
+                    donor.update(total=total, project_count=project_count, source_count=source_count)
+                else:
+                    donor['origins'][origin] = donor['origins'].get(origin, 0.0) + total
+                    currency_record = Currency.browse(currency_id)
+                    donor['currencies'][currency_record] = donor['currencies'].get(currency_record, 0.0) + (amount or 0.0)
+
+        result['by_donor'] = sorted(donors.values(), key=lambda donor: donor['total'], reverse=True)
+        result['by_currency'].sort(key=lambda entry: entry['total'], reverse=True)
+        return result
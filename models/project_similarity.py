@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS - Index des Projets Similaires
+==========================================
+
+Voisins les plus proches de chaque projet public, précalculés hors ligne
+à partir du type, de la région, du bailleur, des étiquettes et du texte.
+
+Les projets modifiés sont marqués (`similarity_dirty`); le cron ne
+recalcule que leurs voisins et ceux des projets dont le classement est
+affecté, en ne lisant que les projets partageant un critère avec eux.
+Le portail lit les voisins par une simple recherche indexée.
+"""
+
+import re
+import unicodedata
+
+from odoo import models, fields, api
+from odoo.osv import expression
+from odoo.tools import SQL, html2plaintext
+
+
+# Nombre de voisins conservés par projet
+SIMILARITY_TOP_K = 6
+
+# Champs du projet qui influencent la similarité (ou la publication)
+SIMILARITY_FIELDS = {'project_type', 'region', 'region_id', 'donor_id', 'tag_ids', 'name', 'objectives', 'state'}
+
+# Poids de chaque critère (somme = 1)
+SIMILARITY_WEIGHTS = {
+    'type': 0.3,
+    'region': 0.2,
+    'donor': 0.15,
+    'tags': 0.2,
+    'text': 0.15,
+}
+
+# Mots trop fréquents pour distinguer deux projets
+SIMILARITY_STOPWORDS = {
+    'avec', 'dans', 'des', 'les', 'pour', 'par', 'sur', 'une', 'aux', 'du', 'de', 'la', 'le', 'et',
+    'projet', 'programme', 'appui', 'renforcement', 'amelioration', 'developpement',
+}
+
+
+def similarity_words(*texts):
+    """Mots significatifs (normalisés, sans accents) d'un ou plusieurs textes."""
+    text = unicodedata.normalize('NFKD', ' '.join(text or '' for text in texts))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    return {
+        word for word in re.findall(r'\w+', text)
+        if len(word) > 3 and word not in SIMILARITY_STOPWORDS and not word.isdigit()
+    }
+
+
+def _jaccard(left, right):
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def similarity_score(left, right):
+    """
+    Score de similarité symétrique entre deux projets, entre 0 et 1.
+
+    Args:
+        left, right (dict): Caractéristiques issues de `_load_features`
+    """
+    score = 0.0
+    if left['type'] and left['type'] == right['type']:
+        score += SIMILARITY_WEIGHTS['type']
+    if left['region'] and left['region'] == right['region']:
+        score += SIMILARITY_WEIGHTS['region']
+    if left['donor'] and left['donor'] == right['donor']:
+        score += SIMILARITY_WEIGHTS['donor']
+    score += SIMILARITY_WEIGHTS['tags'] * _jaccard(left['tags'], right['tags'])
+    score += SIMILARITY_WEIGHTS['text'] * _jaccard(left['words'], right['words'])
+    return round(score, 4)
+
+
+class SamaPromisProjectSimilarity(models.Model):
+    """Voisin précalculé d'un projet public."""
+
+    _name = 'sama.promis.project.similarity'
+    _description = 'Projet Similaire SAMA PROMIS'
+    _order = 'project_id, rank'
+
+    project_id = fields.Many2one(
+        'sama.promis.project',
+        string='Projet',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    similar_id = fields.Many2one(
+        'sama.promis.project',
+        string='Projet Similaire',
+        required=True,
+        ondelete='cascade',
+        readonly=True
+    )
+
+    score = fields.Float(
+        string='Score',
+        digits=(5, 4),
+        readonly=True
+    )
+
+    rank = fields.Integer(
+        string='Rang',
+        readonly=True,
+        help="Position du voisin (1 = le plus proche)"
+    )
+
+    _sql_constraints = [
+        ('project_rank_unique', 'UNIQUE(project_id, rank)', 'Un seul voisin par rang et par projet.')
+    ]
+
+    @api.model
+    def _load_features(self, domain=None):
+        """
+        Caractéristiques des projets publics, en une lecture.
+
+        Args:
+            domain (list): Restriction des projets lus (par défaut: tous les projets publics)
+
+        Returns:
+            dict: {id de projet: {type, region, donor, tags, words}}
+        """
+        Project = self.env['sama.promis.project'].sudo()
+        rows = Project.search_read(
+            Project._get_public_domain() + (domain or []),
+            ['project_type', 'region_id', 'donor_id', 'tag_ids', 'name', 'objectives'],
+        )
+        return {
+            row['id']: {
+                'type': row['project_type'],
+                'region': row['region_id'] and row['region_id'][0],
+                'donor': row['donor_id'] and row['donor_id'][0],
+                'tags': set(row['tag_ids']),
+                'words': similarity_words(row['name'], html2plaintext(row['objectives'] or '')),
+            }
+            for row in rows
+        }
+
+    @api.model
+    def _candidate_domain(self, features):
+        """
+        Domaine des projets pouvant obtenir un score non nul avec l'un des projets donnés.
+
+        Un score non nul suppose un critère commun: type, région, bailleur,
+        étiquette ou mot (recherché dans le document plein texte indexé).
+
+        Args:
+            features (dict): Caractéristiques issues de `_load_features`
+
+        Returns:
+            list: Domaine (sans la restriction aux projets publics)
+        """
+        Project = self.env['sama.promis.project'].sudo()
+        values = {key: set() for key in ('type', 'region', 'donor', 'tags', 'words')}
+        for feature in features.values():
+            for key in ('type', 'region', 'donor'):
+                if feature[key]:
+                    values[key].add(feature[key])
+            values['tags'] |= feature['tags']
+            values['words'] |= feature['words']
+
+        domains = [
+            [(field_name, 'in', list(values[key]))]
+            for key, field_name in (('type', 'project_type'), ('region', 'region_id'),
+                                    ('donor', 'donor_id'), ('tags', 'tag_ids'))
+            if values[key]
+        ]
+        if values['words']:
+            query = Project._search([])
+            query.add_where(SQL(
+                "%s @@ %s",
+                SQL.identifier(Project._table, 'search_vector'),
+                Project._get_public_any_word_tsquery(values['words']),
+            ))
+            domains.append([('id', 'in', query)])
+        return expression.OR(domains) if domains else expression.FALSE_DOMAIN
+
+    @api.model
+    def _rank_neighbours(self, project_id, features, top_k=SIMILARITY_TOP_K):
+        """Les `top_k` voisins d'un projet: liste de (score, id) décroissante."""
+        reference = features[project_id]
+        scores = [
+            (similarity_score(reference, other), other_id)
+            for other_id, other in features.items()
+            if other_id != project_id
+        ]
+        scores = [entry for entry in scores if entry[0] > 0]
+        scores.sort(key=lambda entry: (-entry[0], -entry[1]))
+        return scores[:top_k]
+
+    @api.model
+    def refresh(self, full=False, top_k=SIMILARITY_TOP_K):
+        """
+        Recalcule les voisins des projets marqués et de ceux qu'ils affectent.
+
+        Un projet non marqué est recalculé si un projet modifié figurait
+        dans ses voisins, ou s'il dépasse désormais son dernier voisin.
+        Hors recalcul complet, seules sont lues les caractéristiques des
+        projets marqués, puis celles des projets partageant un critère avec
+        eux ou avec les projets à recalculer (`_candidate_domain`).
+
+        Args:
+            full (bool): Recalculer l'index complet
+            top_k (int): Nombre de voisins par projet
+
+        Returns:
+            int: Nombre de projets dont les voisins ont été recalculés
+        """
+        Project = self.env['sama.promis.project'].sudo()
+        dirty_ids = set(Project.with_context(active_test=False).search([('similarity_dirty', '=', True)]).ids)
+        if not dirty_ids and not full:
+            return 0
+
+        if full:
+            features = self._load_features()
+            self.env.cr.execute(SQL("SELECT DISTINCT project_id FROM %s", SQL.identifier(self._table)))
+            obsolete = {project_id for project_id, in self.env.cr.fetchall()} - set(features)
+            targets = set(features)
+        else:
+            dirty_features = self._load_features([('id', 'in', list(dirty_ids))])
+            # Projets dépubliés ou supprimés: leurs propres voisins disparaissent
+            obsolete = dirty_ids - set(dirty_features)
+
+            # Projets non marqués susceptibles de classer un projet modifié parmi leurs voisins
+            features = dict(dirty_features)
+            if dirty_features:
+                features.update(self._load_features(
+                    self._candidate_domain(dirty_features) + [('id', 'not in', list(dirty_features))]
+                ))
+            current = {}
+            self.env.cr.execute(SQL(
+                "SELECT project_id, similar_id, score FROM %s WHERE project_id IN %s OR similar_id IN %s",
+                SQL.identifier(self._table), tuple(features) or (0,), tuple(dirty_ids),
+            ))
+            for project_id, similar_id, score in self.env.cr.fetchall():
+                current.setdefault(project_id, []).append((score, similar_id))
+
+            targets = set(dirty_features)
+            for project_id, neighbours in current.items():
+                if project_id not in dirty_ids and {similar_id for _score, similar_id in neighbours} & dirty_ids:
+                    targets.add(project_id)
+            for project_id in set(features) - targets:
+                neighbours = current.get(project_id, [])
+                threshold = min(neighbours)[0] if len(neighbours) >= top_k else 0.0
+                for dirty_id in dirty_features:
+                    if similarity_score(features[project_id], features[dirty_id]) > threshold:
+                        targets.add(project_id)
+                        break
+            # Projets à recalculer hors du premier lot (voisins d'un projet modifié)
+            missing = targets - set(features)
+            if missing:
+                features.update(self._load_features([('id', 'in', list(missing))]))
+                targets &= set(features)
+            # Classement de chaque projet recalculé parmi ses seuls candidats possibles
+            if targets:
+                features.update(self._load_features(
+                    self._candidate_domain({project_id: features[project_id] for project_id in targets})
+                    + [('id', 'not in', list(features))]
+                ))
+
+        to_clear = list(targets | obsolete)
+        if to_clear:
+            self.env.cr.execute(SQL(
+                "DELETE FROM %s WHERE project_id IN %s",
+                SQL.identifier(self._table), tuple(to_clear),
+            ))
+            self.invalidate_model()
+
+        vals_list = []
+        for project_id in targets:
+            for rank, (score, similar_id) in enumerate(self._rank_neighbours(project_id, features, top_k), 1):
+                vals_list.append({
+                    'project_id': project_id,
+                    'similar_id': similar_id,
+                    'score': score,
+                    'rank': rank,
+                })
+        self.sudo().create(vals_list)
+
+        if dirty_ids:
+            # Pas de write ORM: le projet ne doit être ni audité ni republié
+            self.env.cr.execute(SQL(
+                "UPDATE %s SET similarity_dirty = false WHERE id IN %s",
+                SQL.identifier(Project._table), tuple(dirty_ids),
+            ))
+            Project.invalidate_model(['similarity_dirty'])
+        if to_clear:
+            # Bloc "Projets similaires" des fiches en cache (ETag, t-cache)
+            Project._mark_public_data_changed(('similarity',))
+        return len(targets)
+
+    @api.model
+    def cron_refresh_similarity(self):
+        """Point d'entrée du cron de mise à jour de l'index."""
+        self.refresh()
+
+    @api.model
+    def get_neighbours(self, project_ids, limit=4, exclude_ids=()):
+        """
+        Projets publics les plus proches d'un ou plusieurs projets.
+
+        Args:
+            project_ids (list): Projets de référence
+            limit (int): Nombre de projets renvoyés
+            exclude_ids (iterable): Projets à écarter (en plus des références)
+
+        Returns:
+            recordset: Projets du plus proche au moins proche
+        """
+        Project = self.env['sama.promis.project'].sudo()
+        excluded = list(set(project_ids) | set(exclude_ids))
+        groups = self.sudo()._read_group(
+            [
+                ('project_id', 'in', list(project_ids)),
+                ('similar_id', 'not in', excluded),
+                ('similar_id', 'any', Project._get_public_domain()),
+            ],
+            ['similar_id'],
+            ['score:max'],
+            order='score:max desc',
+            limit=limit,
+        )
+        return Project.browse([similar.id for similar, _score in groups])
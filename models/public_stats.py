@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS - Statistiques Publiques Matérialisées
+==================================================
+
+Instantané des indicateurs globaux du portail public, découpé en tranches
+recalculées par cron lorsque les données sources changent.
+
+Chaque jeu de données publié possède un compteur de modifications
+(séquence PostgreSQL) qui sert à la fois au marquage des tranches et aux
+ETag des réponses du portail public.
+"""
+
+from odoo import models, fields, api
+from datetime import timedelta
+
+
+# Jeux de données publiés sur le portail, chacun versionné par une séquence
+PUBLIC_DATASETS = [
+    'projects',
+    'funding',
+    'procurement',
+    'compliance',
+    'calls',
+    'events',
+    'contracts',
+    'payments',
+    # Compteurs de suiveurs (classement par popularité de la page citoyenne)
+    'followers',
+    # Index des projets similaires (recalculé par cron)
+    'similarity',
+]
+
+
+def public_dataset_sequence(dataset):
+    """Nom de la séquence PostgreSQL d'un jeu de données."""
+    return 'sama_promis_public_stats_%s_seq' % dataset
+
+
+def read_public_data_versions(cr, datasets=None):
+    """
+    Lit le compteur de modifications de jeux de données (une requête SQL).
+
+    Utilisable sans passer par l'ORM (validation d'ETag du portail).
+
+    Args:
+        cr: Curseur de base de données
+        datasets (list): Jeux de données à lire (par défaut: tous)
+
+    Returns:
+        dict: {jeu de données: version}
+    """
+    datasets = [dataset for dataset in (datasets or PUBLIC_DATASETS) if dataset in PUBLIC_DATASETS]
+    if not datasets:
+        return {}
+    query = " UNION ALL ".join(
+        "SELECT %%s, COALESCE(pg_sequence_last_value('%s'), 0)" % public_dataset_sequence(dataset)
+        for dataset in datasets
+    )
+    cr.execute(query, datasets)
+    return dict(cr.fetchall())
+
+
+# Pseudo-jeu de données désignant l'instantané lui-même (réponses servies depuis l'instantané)
+PUBLIC_SNAPSHOT = 'snapshot'
+
+
+def read_public_snapshot_version(cr):
+    """
+    Version de l'instantané public, telle que vue par la transaction courante.
+
+    Les compteurs des jeux de données changent au commit des modifications,
+    l'instantané seulement après le passage du cron: une réponse servie
+    depuis l'instantané est identifiée par les versions qu'il reflète
+    réellement et par la date de son dernier calcul.
+
+    Args:
+        cr: Curseur de base de données
+
+    Returns:
+        str: Ex. "57@1706700000"
+    """
+    cr.execute("""
+        SELECT COALESCE(sum(source_version), 0),
+               COALESCE(extract(epoch FROM max(refreshed_at))::bigint, 0)
+          FROM sama_promis_public_stats
+    """)
+    return '%s@%s' % cr.fetchone()
+
+
+# Tranches de l'instantané public
+PUBLIC_STATS_SLICES = [
+    ('projects', 'Projets'),
+    ('funding', 'Financements'),
+    ('procurement', 'Passation de Marchés'),
+    ('compliance', 'Conformité'),
+    ('calls', 'Appels à Propositions'),
+]
+
+# Champs alimentés par chaque tranche
+PUBLIC_STATS_SLICE_FIELDS = {
+    'projects': ['total_projects', 'active_projects', 'completed_projects', 'total_budget', 'spent_budget',
+                 'project_breakdown'],
+    'funding': ['international_funding', 'local_funding'],
+    'procurement': ['active_procurements'],
+    'compliance': ['total_compliance_tasks', 'completed_compliance_tasks', 'compliance_rate'],
+    'calls': ['open_calls'],
+}
+
+
+# Canal du bus (public) sur lequel sont diffusées les variations des compteurs
+PUBLIC_STATS_CHANNEL = 'sama_promis_public_stats'
+PUBLIC_STATS_NOTIFICATION = 'sama_promis/public_stats'
+
+# Compteurs diffusés en direct aux tableaux de bord ouverts
+PUBLIC_STATS_LIVE_FIELDS = [
+    'total_projects', 'active_projects', 'completed_projects', 'total_budget', 'spent_budget',
+    'international_funding', 'local_funding', 'active_procurements', 'compliance_rate', 'open_calls',
+]
+
+
+class SamaPromisPublicStats(models.Model):
+    """Instantané matérialisé des statistiques du portail public."""
+
+    _name = 'sama.promis.public.stats'
+    _description = 'Statistiques Publiques SAMA PROMIS'
+    _order = 'slice'
+    _rec_name = 'slice'
+
+    slice = fields.Selection(
+        PUBLIC_STATS_SLICES,
+        string='Tranche',
+        required=True,
+        readonly=True,
+        help="Ensemble de données couvert par cette ligne"
+    )
+
+    source_version = fields.Integer(
+        string='Version Source',
+        readonly=True,
+        help="Compteur de modifications de la tranche au moment du calcul"
+    )
+
+    dirty = fields.Boolean(
+        string='À Recalculer',
+        compute='_compute_dirty',
+        help="Des données sources ont changé depuis le dernier calcul"
+    )
+
+    refreshed_at = fields.Datetime(
+        string='Calculé le',
+        readonly=True
+    )
+
+    currency_id = fields.Many2one(
+        'res.currency',
+        string='Devise',
+        default=lambda self: self.env.company.currency_id
+    )
+
+    # Tranche "projects"
+    total_projects = fields.Integer(string='Projets Publics', readonly=True)
+    active_projects = fields.Integer(string='Projets en Cours', readonly=True)
+    completed_projects = fields.Integer(string='Projets Terminés', readonly=True)
+    total_budget = fields.Monetary(string='Budget Total', currency_field='currency_id', readonly=True)
+    spent_budget = fields.Monetary(string='Budget Dépensé', currency_field='currency_id', readonly=True)
+    project_breakdown = fields.Json(
+        string='Répartition des Projets',
+        readonly=True,
+        help="Nombre de projets par état et par type"
+    )
+
+    # Tranche "funding"
+    international_funding = fields.Monetary(
+        string='Financement International', currency_field='currency_id', readonly=True
+    )
+    local_funding = fields.Monetary(
+        string='Financement Local', currency_field='currency_id', readonly=True
+    )
+
+    # Tranche "procurement"
+    active_procurements = fields.Integer(string='Passations en Exécution', readonly=True)
+
+    # Tranche "compliance"
+    total_compliance_tasks = fields.Integer(string='Tâches de Conformité', readonly=True)
+    completed_compliance_tasks = fields.Integer(string='Tâches Terminées', readonly=True)
+    compliance_rate = fields.Float(string='Taux de Conformité (%)', readonly=True)
+
+    # Tranche "calls"
+    open_calls = fields.Integer(string='Appels Ouverts', readonly=True)
+
+    _sql_constraints = [
+        ('slice_unique', 'UNIQUE(slice)', 'Chaque tranche ne peut exister qu\'une seule fois.')
+    ]
+
+    # Une tranche propre est tout de même recalculée au-delà de ce délai
+    _max_age = timedelta(hours=1)
+
+    def init(self):
+        """Crée un compteur de modifications (séquence PostgreSQL) par jeu de données.
+
+        `nextval` n'est pas transactionnel: les écritures concurrentes
+        incrémentent le compteur sans verrouiller de ligne.
+        """
+        for dataset in PUBLIC_DATASETS:
+            self.env.cr.execute(
+                "CREATE SEQUENCE IF NOT EXISTS %s" % public_dataset_sequence(dataset)
+            )
+
+    @api.model
+    def get_data_versions(self, datasets=None):
+        """
+        Lit le compteur de modifications des jeux de données publiés.
+
+        Returns:
+            dict: {jeu de données: version}
+        """
+        return read_public_data_versions(self.env.cr, datasets)
+
+    @api.model
+    def _bump_datasets(self, datasets):
+        """Signale la modification de jeux de données en incrémentant leur compteur."""
+        for dataset in datasets:
+            if dataset in PUBLIC_DATASETS:
+                self.env.cr.execute("SELECT nextval('%s')" % public_dataset_sequence(dataset))
+
+    def _compute_dirty(self):
+        """Compare la version calculée au compteur courant de la tranche."""
+        versions = self.get_data_versions() if self else {}
+        for record in self:
+            record.dirty = versions.get(record.slice, 0) > record.source_version
+
+    @api.model
+    def _compute_slice_values(self, slice_name):
+        """
+        Calcule les valeurs d'une tranche par agrégation SQL.
+
+        Returns:
+            dict: Valeurs des champs de la tranche
+        """
+        Project = self.env['sama.promis.project'].sudo()
+
+        if slice_name == 'projects':
+            stats = Project.get_public_statistics(donor_limit=0)
+            return {
+                'total_projects': stats['total_projects'],
+                'active_projects': stats['active_projects'],
+                'completed_projects': stats['completed_projects'],
+                'total_budget': stats['total_budget'],
+                'spent_budget': stats['spent_budget'],
+                'project_breakdown': {
+                    key: {
+                        value: {'label': entry['label'], 'count': entry['count']}
+                        for value, entry in stats[key].items()
+                    }
+                    for key in ('by_state', 'by_type')
+                },
+            }
+
+        if slice_name == 'funding':
+            # Montants convertis en devise société à la date de chaque source
+            by_origin = self.env['sama.promis.project.funding.source'].sudo() \
+                .get_public_funding_breakdown()['by_origin']
+            return {
+                'international_funding': by_origin.get('international', {}).get('total', 0.0),
+                'local_funding': by_origin.get('local', {}).get('total', 0.0),
+            }
+
+        if slice_name == 'procurement':
+            return {
+                'active_procurements': self.env['sama.promis.procurement.plan'].sudo().search_count([
+                    ('state', '=', 'in_execution')
+                ]),
+            }
+
+        if slice_name == 'compliance':
+            counts = dict(self.env['sama.promis.compliance.task'].sudo()._read_group(
+                [], ['state'], ['__count']
+            ))
+            total = sum(counts.values())
+            completed = counts.get('completed', 0)
+            return {
+                'total_compliance_tasks': total,
+                'completed_compliance_tasks': completed,
+                'compliance_rate': (completed / total * 100) if total > 0 else 0.0,
+            }
+
+        if slice_name == 'calls':
+            return {
+                'open_calls': self.env['sama.promis.call.proposal'].sudo().search_count([
+                    ('state', '=', 'published')
+                ]),
+            }
+
+        return {}
+
+    @api.model
+    def refresh_slices(self, slices=None, force=False):
+        """
+        Recalcule les tranches marquées (ou toutes si `force`).
+
+        Args:
+            slices (list): Tranches à considérer (par défaut: toutes)
+            force (bool): Recalculer même les tranches propres
+
+        Returns:
+            list: Tranches effectivement recalculées
+        """
+        slices = slices or [slice_name for slice_name, _label in PUBLIC_STATS_SLICES]
+        # Versions lues avant le calcul: une modification concurrente laisse la tranche marquée
+        versions = self.get_data_versions(slices)
+        rows = {row.slice: row for row in self.sudo().search([('slice', 'in', slices)])}
+        stale_before = fields.Datetime.now() - self._max_age
+
+        refreshed = []
+        changes = {}
+        for slice_name in slices:
+            row = rows.get(slice_name)
+            version = versions.get(slice_name, 0)
+            if row and not force and row.source_version >= version and row.refreshed_at \
+                    and row.refreshed_at >= stale_before:
+                continue
+
+            vals = self._compute_slice_values(slice_name)
+            for field_name in PUBLIC_STATS_SLICE_FIELDS.get(slice_name, []):
+                if field_name in PUBLIC_STATS_LIVE_FIELDS:
+                    previous = row[field_name] if row else 0
+                    if vals.get(field_name, 0) != previous:
+                        changes[field_name] = (previous, vals.get(field_name, 0))
+            vals.update({
+                'source_version': version,
+                'refreshed_at': fields.Datetime.now(),
+            })
+            if row:
+                row.write(vals)
+            else:
+                vals['slice'] = slice_name
+                self.sudo().create(vals)
+            refreshed.append(slice_name)
+
+        if changes:
+            self._broadcast_changes(changes)
+        return refreshed
+
+    @api.model
+    def _broadcast_changes(self, changes):
+        """
+        Diffuse les compteurs modifiés sur le canal public du bus (envoi au commit).
+
+        Un seul message par rafraîchissement, quel que soit le nombre de
+        tableaux de bord ouverts.
+
+        Args:
+            changes (dict): {champ: (ancienne valeur, nouvelle valeur)}
+        """
+        self.env['bus.bus'].sudo()._sendone(PUBLIC_STATS_CHANNEL, PUBLIC_STATS_NOTIFICATION, {
+            'values': {field_name: new for field_name, (_old, new) in changes.items()},
+            'deltas': {field_name: new - old for field_name, (old, new) in changes.items()},
+        })
+
+    @api.model
+    def get_snapshot(self):
+        """
+        Retourne l'instantané public sans recalcul (hors première initialisation).
+
+        Returns:
+            dict: Indicateurs globaux du portail public
+        """
+        rows = self.sudo().search([])
+        missing = set(dict(PUBLIC_STATS_SLICES)) - set(rows.mapped('slice'))
+        if missing:
+            self.refresh_slices(sorted(missing), force=True)
+            rows = self.sudo().search([])
+
+        snapshot = {}
+        for row in rows:
+            for field_name in PUBLIC_STATS_SLICE_FIELDS.get(row.slice, []):
+                snapshot[field_name] = row[field_name]
+
+        snapshot['total_funding'] = snapshot.get('international_funding', 0.0) + snapshot.get('local_funding', 0.0)
+        snapshot['last_update'] = max(rows.mapped('refreshed_at')) if rows else False
+        return snapshot
+
+    @api.model
+    def cron_refresh_public_stats(self):
+        """Cron job: recalcule les tranches marquées ou trop anciennes."""
+        self.refresh_slices()
+        return True
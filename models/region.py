@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS - Référentiel des Régions
+=====================================
+
+Régions normalisées avec leur centroïde, utilisées pour rattacher la
+région saisie librement sur les projets et agréger la carte publique.
+"""
+
+import unicodedata
+
+from odoo import models, fields, api
+
+
+def normalize_region_name(name):
+    """Clé de rapprochement: minuscules, sans accents, tirets ni espaces superflus."""
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return ' '.join(name.lower().replace('-', ' ').replace('_', ' ').split())
+
+
+class SamaPromisRegion(models.Model):
+    """Région administrative de référence."""
+
+    _name = 'sama.promis.region'
+    _description = 'Région SAMA PROMIS'
+    _inherit = ['sama.promis.public.data.mixin']
+    _order = 'name'
+    _public_datasets = ('projects',)
+
+    name = fields.Char(
+        string='Nom',
+        required=True,
+        help="Nom officiel de la région"
+    )
+
+    code = fields.Char(
+        string='Code',
+        required=True,
+        help="Code court de la région (identifiant des entités GeoJSON)"
+    )
+
+    aliases = fields.Char(
+        string='Variantes',
+        help="Autres orthographes reconnues, séparées par des virgules"
+    )
+
+    latitude = fields.Float(
+        string='Latitude',
+        digits=(10, 6),
+        help="Latitude du centroïde"
+    )
+
+    longitude = fields.Float(
+        string='Longitude',
+        digits=(10, 6),
+        help="Longitude du centroïde"
+    )
+
+    active = fields.Boolean(
+        string='Actif',
+        default=True
+    )
+
+    project_count = fields.Integer(
+        string='Nombre de Projets',
+        compute='_compute_project_count'
+    )
+
+    _sql_constraints = [
+        ('code_unique', 'UNIQUE(code)', 'Le code de la région doit être unique.')
+    ]
+
+    def _compute_project_count(self):
+        """Nombre de projets rattachés à chaque région."""
+        counts = dict(self.env['sama.promis.project']._read_group(
+            [('region_id', 'in', self.ids)], ['region_id'], ['__count']
+        ))
+        for region in self:
+            region.project_count = counts.get(region, 0)
+
+    @api.model
+    def _get_lookup(self):
+        """
+        Table de rapprochement des régions actives.
+
+        Returns:
+            dict: {clé normalisée (nom, code ou variante): région}
+        """
+        lookup = {}
+        for region in self.search([]):
+            keys = [region.name, region.code] + (region.aliases or '').split(',')
+            for key in keys:
+                key = normalize_region_name(key)
+                if key:
+                    lookup.setdefault(key, region)
+        return lookup
+
+    @api.model
+    def match(self, name, lookup=None):
+        """
+        Région correspondant à un libellé saisi librement.
+
+        Args:
+            name (str): Libellé de région
+            lookup (dict): Table de `_get_lookup` (évite de la recharger)
+
+        Returns:
+            recordset: Région trouvée ou recordset vide
+        """
+        if lookup is None:
+            lookup = self._get_lookup()
+        return lookup.get(normalize_region_name(name), self.browse())
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Surcharge de create pour rattacher les projets existants."""
+        regions = super().create(vals_list)
+        regions._recompute_project_regions()
+        return regions
+
+    def write(self, vals):
+        """Surcharge de write pour rattacher à nouveau les projets."""
+        result = super().write(vals)
+        if {'name', 'code', 'aliases', 'active'} & set(vals):
+            self._recompute_project_regions()
+        return result
+
+    def _recompute_project_regions(self):
+        """Recalcule la région normalisée des projets dont la région est renseignée."""
+        Project = self.env['sama.promis.project'].sudo()
+        projects = Project.with_context(active_test=False).search([('region', '!=', False)])
+        self.env.add_to_compute(Project._fields['region_id'], projects)
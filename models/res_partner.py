@@ -9,6 +9,60 @@ Extension du modèle res.partner pour SAMA PROMIS.
 from odoo import models, fields, api
 import base64
 import io
+import threading
+import time
+
+
+# Tableau de bord du portail requérant (/my/promis)
+PORTAL_PREVIEW_LIMIT = 6
+PORTAL_RECENT_LIMIT = 3
+PORTAL_DEADLINE_LIMIT = 5
+PORTAL_ACTIVE_CONTRACT_STATES = ('signed', 'active')
+PORTAL_PENDING_TASK_STATES = ('pending', 'in_progress')
+PORTAL_CLOSED_TASK_STATES = ('completed', 'cancelled')
+PORTAL_PENDING_PAYMENT_STATES = ('submitted', 'approved')
+
+# Statistiques de la page citoyenne (/promispublic/citizen/api/stats)
+CITIZEN_STATS_TTL = 30
+CITIZEN_STATS_MAX_ENTRIES = 10000
+
+
+class CitizenStatsCache:
+    """
+    Statistiques citoyennes par partenaire, en mémoire de chaque worker.
+
+    Une entrée expire après `CITIZEN_STATS_TTL` secondes et est supprimée
+    explicitement quand les projets, paiements ou suivis du partenaire
+    changent. L'invalidation ne touche que le worker qui a fait la
+    modification: dans les autres, l'entrée vit au plus jusqu'à son
+    expiration.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {(base, partenaire): (expiration, statistiques)}
+        self._entries = {}
+
+    def get(self, dbname, partner_id):
+        entry = self._entries.get((dbname, partner_id))
+        if entry and entry[0] > time.monotonic():
+            return dict(entry[1])
+        return None
+
+    def set(self, dbname, partner_id, stats):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= CITIZEN_STATS_MAX_ENTRIES:
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+            self._entries[(dbname, partner_id)] = (now + CITIZEN_STATS_TTL, dict(stats))
+
+    def invalidate(self, dbname, partner_ids):
+        with self._lock:
+            for partner_id in partner_ids:
+                self._entries.pop((dbname, partner_id), None)
+
+
+citizen_stats_cache = CitizenStatsCache()
 
 
 class ResPartner(models.Model):
@@ -426,6 +480,181 @@ class ResPartner(models.Model):
         elif self.partner_type == 'academic':
             self.is_academic = True
 
+    def _get_promis_project_domain(self):
+        """Projets dont le partenaire est bénéficiaire, bailleur ou partenaire de mise en œuvre."""
+        self.ensure_one()
+        return [
+            '|', '|',
+            ('partner_id', '=', self.id),
+            ('implementing_partner_ids', 'in', [self.id]),
+            ('donor_id', '=', self.id)
+        ]
+
+    def get_promis_citizen_stats(self):
+        """
+        Statistiques de la page citoyenne, servies depuis le cache du worker.
+
+        Returns:
+            dict: {my_projects, active_projects, completed_projects,
+                total_budget, total_received, following_count}
+        """
+        self.ensure_one()
+        dbname = self.env.cr.dbname
+        stats = citizen_stats_cache.get(dbname, self.id)
+        if stats is None:
+            stats = self._compute_promis_citizen_stats()
+            citizen_stats_cache.set(dbname, self.id, stats)
+        return stats
+
+    def _compute_promis_citizen_stats(self):
+        """Statistiques de la page citoyenne, agrégées en base."""
+        self.ensure_one()
+        env = self.env
+        projects = {
+            state: (count, budget or 0.0)
+            for state, count, budget in env['sama.promis.project'].sudo()._read_group(
+                ['|', ('partner_id', '=', self.id), ('implementing_partner_ids', 'in', [self.id])],
+                ['state'], ['__count', 'total_budget:sum'],
+            )
+        }
+        [[total_received]] = env['sama.promis.payment.request'].sudo()._read_group(
+            [('partner_id', '=', self.id), ('state', '=', 'paid')], [], ['amount:sum'],
+        )
+        return {
+            'my_projects': sum(count for count, _budget in projects.values()),
+            'active_projects': projects.get('in_progress', (0, 0.0))[0],
+            'completed_projects': projects.get('completed', (0, 0.0))[0],
+            'total_budget': sum(budget for _count, budget in projects.values()),
+            'total_received': total_received or 0.0,
+            'following_count': env['sama.promis.project.follower'].sudo().get_followed_count(self.id),
+        }
+
+    @api.model
+    def _invalidate_promis_citizen_stats(self, partner_ids):
+        """
+        Retire du cache les statistiques citoyennes de partenaires.
+
+        L'invalidation est refaite à la fin de la transaction: ni une lecture
+        concurrente faite avant le commit, ni une lecture de données ensuite
+        annulées ne restent en cache.
+        """
+        partner_ids = set(partner_ids) - {False}
+        if not partner_ids:
+            return
+        cr = self.env.cr
+        dbname = cr.dbname
+        citizen_stats_cache.invalidate(dbname, partner_ids)
+
+        pending = cr.postcommit.data.get('sama_promis.citizen_stats')
+        if pending is None:
+            pending = cr.postcommit.data['sama_promis.citizen_stats'] = set()
+
+            def _invalidate_citizen_stats():
+                citizen_stats_cache.invalidate(dbname, pending)
+
+            cr.postcommit.add(_invalidate_citizen_stats)
+            cr.postrollback.add(_invalidate_citizen_stats)
+
+        pending.update(partner_ids)
+
+    def get_promis_portal_stats(self, user):
+        """
+        Indicateurs du portail requérant, agrégés en base (une requête groupée par modèle).
+
+        Args:
+            user: Utilisateur du portail (responsable des tâches de conformité)
+
+        Returns:
+            dict: {total_projects, active_projects, total_contracts, active_contracts,
+                pending_tasks, overdue_tasks, total_received, pending_payments}
+        """
+        self.ensure_one()
+        env = self.env
+        projects = dict(env['sama.promis.project'].sudo()._read_group(
+            self._get_promis_project_domain(), ['state'], ['__count'],
+        ))
+        contracts = dict(env['sama.promis.contract'].sudo()._read_group(
+            [('partner_id', '=', self.id)], ['state'], ['__count'],
+        ))
+        tasks = dict(env['sama.promis.compliance.task'].sudo()._read_group(
+            [('responsible_id', '=', user.id)], ['state'], ['__count'],
+        ))
+        payments = dict(env['sama.promis.payment.request'].sudo()._read_group(
+            [('partner_id', '=', self.id)], ['state'], ['amount:sum'],
+        ))
+        return {
+            'total_projects': sum(projects.values()),
+            'active_projects': projects.get('in_progress', 0),
+            'total_contracts': sum(contracts.values()),
+            'active_contracts': sum(contracts.get(state, 0) for state in PORTAL_ACTIVE_CONTRACT_STATES),
+            'pending_tasks': sum(tasks.get(state, 0) for state in PORTAL_PENDING_TASK_STATES),
+            'overdue_tasks': tasks.get('overdue', 0),
+            'total_received': payments.get('paid', 0.0),
+            'pending_payments': sum(payments.get(state, 0.0) for state in PORTAL_PENDING_PAYMENT_STATES),
+        }
+
+    def get_promis_portal_dashboard(self, user):
+        """
+        Données du tableau de bord `/my/promis`.
+
+        Le nombre de requêtes ne dépend pas de l'historique du partenaire:
+        indicateurs groupés, puis lectures triées et limitées (aperçus,
+        activité récente, prochaines échéances).
+
+        Args:
+            user: Utilisateur du portail
+
+        Returns:
+            dict: {stats, projects, contracts, compliance_tasks, payments,
+                recent_activity, upcoming_deadlines}
+        """
+        self.ensure_one()
+        env = self.env
+        projects = env['sama.promis.project'].sudo().search(
+            self._get_promis_project_domain(), order='create_date desc, id desc', limit=PORTAL_PREVIEW_LIMIT,
+        )
+        contracts = env['sama.promis.contract'].sudo().search(
+            [('partner_id', '=', self.id)], order='create_date desc, id desc', limit=PORTAL_PREVIEW_LIMIT,
+        )
+        ComplianceTask = env['sama.promis.compliance.task'].sudo()
+        compliance_tasks = ComplianceTask.search(
+            [('responsible_id', '=', user.id)], limit=PORTAL_PREVIEW_LIMIT,
+        )
+        payments = env['sama.promis.payment.request'].sudo().search(
+            [('partner_id', '=', self.id)], order='request_date desc, id desc', limit=PORTAL_PREVIEW_LIMIT,
+        )
+        upcoming_deadlines = ComplianceTask.search([
+            ('responsible_id', '=', user.id),
+            ('state', 'not in', PORTAL_CLOSED_TASK_STATES),
+            ('deadline', '>=', fields.Date.today()),
+        ], order='deadline, id', limit=PORTAL_DEADLINE_LIMIT)
+
+        # Les aperçus sont déjà triés du plus récent au plus ancien
+        recent_activity = [{
+            'type': 'project',
+            'title': f'Projet: {project.name}',
+            'date': project.create_date,
+            'icon': 'fa-project-diagram',
+            'url': '/my/promis/projects',
+        } for project in projects[:PORTAL_RECENT_LIMIT]] + [{
+            'type': 'payment',
+            'title': f'Paiement: {payment.amount} {payment.currency_id.name or "FCFA"}',
+            'date': fields.Datetime.to_datetime(payment.request_date),
+            'icon': 'fa-money-bill',
+            'url': '/my/promis/payments',
+        } for payment in payments[:PORTAL_RECENT_LIMIT]]
+        recent_activity.sort(key=lambda activity: activity['date'], reverse=True)
+
+        return {
+            'stats': self.get_promis_portal_stats(user),
+            'projects': projects,
+            'contracts': contracts,
+            'compliance_tasks': compliance_tasks,
+            'payments': payments,
+            'recent_activity': recent_activity,
+            'upcoming_deadlines': upcoming_deadlines,
+        }
+
     def action_view_projects(self):
         """Voir les projets du partenaire."""
         domain = [
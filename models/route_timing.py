@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS - Mesures des Routes du Portail
+===========================================
+
+Histogramme horaire, par route, des mesures relevées par l'instrumentation
+(optionnelle) des contrôleurs du portail: nombre de requêtes SQL, temps SQL,
+temps Python, taille des réponses et répartition des durées.
+
+Les mesures sont cumulées en mémoire par chaque processus puis fusionnées
+par lots (`_merge_samples`); les lignes plus anciennes que la période de
+rétention sont purgées par cron.
+"""
+
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+# Bornes supérieures (ms) des classes de durée de l'histogramme
+ROUTE_TIMING_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Champ de comptage de chaque classe, puis des durées au-delà de la dernière borne
+ROUTE_TIMING_BUCKET_FIELDS = ['duration_le_%d' % bound for bound in ROUTE_TIMING_BUCKETS] + [
+    'duration_gt_%d' % ROUTE_TIMING_BUCKETS[-1]
+]
+
+# Compteurs cumulés lors de la fusion des mesures
+ROUTE_TIMING_SUM_FIELDS = [
+    'request_count', 'query_count', 'duration', 'sql_time', 'python_time', 'response_bytes',
+] + ROUTE_TIMING_BUCKET_FIELDS
+
+# Durée de conservation des mesures (jours)
+ROUTE_TIMING_RETENTION_DAYS = 14
+
+
+def route_timing_bucket(duration):
+    """Champ de la classe de durée d'une requête (ms)."""
+    for bound, field_name in zip(ROUTE_TIMING_BUCKETS, ROUTE_TIMING_BUCKET_FIELDS):
+        if duration <= bound:
+            return field_name
+    return ROUTE_TIMING_BUCKET_FIELDS[-1]
+
+
+class SamaPromisRouteTiming(models.Model):
+    """Mesures cumulées d'une route du portail sur une heure."""
+
+    _name = 'sama.promis.route.timing'
+    _description = 'Mesures des Routes SAMA PROMIS'
+    _order = 'period_start desc, duration desc'
+    _rec_name = 'route'
+
+    route = fields.Char(
+        string='Route',
+        required=True,
+        index=True,
+        readonly=True,
+        help="Contrôleur et méthode traitant la requête"
+    )
+
+    path = fields.Char(
+        string='URL',
+        readonly=True
+    )
+
+    period_start = fields.Datetime(
+        string='Heure',
+        required=True,
+        index=True,
+        readonly=True
+    )
+
+    request_count = fields.Integer(string='Requêtes HTTP', readonly=True)
+    query_count = fields.Integer(string='Requêtes SQL', readonly=True)
+    duration = fields.Float(string='Durée Totale (ms)', readonly=True)
+    sql_time = fields.Float(string='Temps SQL (ms)', readonly=True)
+    python_time = fields.Float(string='Temps Python (ms)', readonly=True)
+    response_bytes = fields.Float(string='Octets Rendus', digits=(16, 0), readonly=True)
+    max_duration = fields.Float(string='Durée Max. (ms)', aggregator='max', readonly=True)
+
+    duration_le_10 = fields.Integer(string='≤ 10 ms', readonly=True)
+    duration_le_25 = fields.Integer(string='≤ 25 ms', readonly=True)
+    duration_le_50 = fields.Integer(string='≤ 50 ms', readonly=True)
+    duration_le_100 = fields.Integer(string='≤ 100 ms', readonly=True)
+    duration_le_250 = fields.Integer(string='≤ 250 ms', readonly=True)
+    duration_le_500 = fields.Integer(string='≤ 500 ms', readonly=True)
+    duration_le_1000 = fields.Integer(string='≤ 1 s', readonly=True)
+    duration_le_2500 = fields.Integer(string='≤ 2,5 s', readonly=True)
+    duration_gt_2500 = fields.Integer(string='> 2,5 s', readonly=True)
+
+    _sql_constraints = [
+        ('route_period_unique', 'UNIQUE(route, period_start)', 'Une seule ligne par route et par heure.')
+    ]
+
+    @api.model
+    def _merge_samples(self, samples):
+        """
+        Ajoute des mesures cumulées aux lignes horaires (une requête SQL).
+
+        Args:
+            samples (dict): {(route, début de l'heure): {path, max_duration,
+                et chaque champ de `ROUTE_TIMING_SUM_FIELDS`}}
+        """
+        if not samples:
+            return
+        columns = SQL(", ").join(SQL.identifier(name) for name in ROUTE_TIMING_SUM_FIELDS)
+        rows = SQL(", ").join(
+            SQL(
+                "(%s, %s, %s, %s, %s, %s, %s, now() AT TIME ZONE 'UTC', now() AT TIME ZONE 'UTC')",
+                route, sample['path'], period_start,
+                SQL(", ").join(SQL("%s", sample[name]) for name in ROUTE_TIMING_SUM_FIELDS),
+                sample['max_duration'], self.env.uid, self.env.uid,
+            )
+            for (route, period_start), sample in samples.items()
+        )
+        updates = SQL(", ").join(
+            SQL("%s = timing.%s + EXCLUDED.%s", SQL.identifier(name), SQL.identifier(name), SQL.identifier(name))
+            for name in ROUTE_TIMING_SUM_FIELDS
+        )
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO %(table)s AS timing
+                (route, path, period_start, %(columns)s, max_duration, create_uid, write_uid, create_date, write_date)
+            VALUES %(rows)s
+            ON CONFLICT (route, period_start) DO UPDATE SET
+                %(updates)s,
+                max_duration = GREATEST(timing.max_duration, EXCLUDED.max_duration),
+                write_date = EXCLUDED.write_date
+            """,
+            table=SQL.identifier(self._table),
+            columns=columns,
+            rows=rows,
+            updates=updates,
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def get_slowest_routes(self, days=7, limit=20):
+        """
+        Routes les plus lentes sur la période, par 95e centile de durée.
+
+        Le centile est estimé par la borne supérieure de sa classe
+        (durée maximale observée pour la dernière classe).
+
+        Args:
+            days (int): Nombre de jours analysés
+            limit (int): Nombre de routes renvoyées
+
+        Returns:
+            list: {route, path, request_count, avg_duration, p95_duration,
+                max_duration, avg_queries, avg_sql_time, avg_python_time,
+                avg_bytes}
+        """
+        since = fields.Datetime.now() - timedelta(days=days)
+        aggregates = ['path:max', 'max_duration:max'] + ['%s:sum' % name for name in ROUTE_TIMING_SUM_FIELDS]
+        report = []
+        for route, path, max_duration, *sums in self._read_group(
+            [('period_start', '>=', since)], ['route'], aggregates,
+        ):
+            totals = dict(zip(ROUTE_TIMING_SUM_FIELDS, sums))
+            count = totals['request_count']
+            if not count:
+                continue
+            p95_duration = max_duration
+            cumulated = 0
+            for bound, field_name in zip(ROUTE_TIMING_BUCKETS, ROUTE_TIMING_BUCKET_FIELDS):
+                cumulated += totals[field_name]
+                if cumulated >= 0.95 * count:
+                    p95_duration = min(bound, max_duration)
+                    break
+            report.append({
+                'route': route,
+                'path': path,
+                'request_count': count,
+                'avg_duration': totals['duration'] / count,
+                'p95_duration': p95_duration,
+                'max_duration': max_duration,
+                'avg_queries': totals['query_count'] / count,
+                'avg_sql_time': totals['sql_time'] / count,
+                'avg_python_time': totals['python_time'] / count,
+                'avg_bytes': totals['response_bytes'] / count,
+            })
+        report.sort(key=lambda entry: (entry['p95_duration'], entry['avg_duration']), reverse=True)
+        return report[:limit]
+
+    @api.model
+    def cron_purge_route_timings(self):
+        """Point d'entrée du cron: supprime les mesures hors de la période de rétention."""
+        limit = fields.Datetime.now() - timedelta(days=ROUTE_TIMING_RETENTION_DAYS)
+        self.sudo().search([('period_start', '<', limit)]).unlink()
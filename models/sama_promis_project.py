@@ -7,26 +7,56 @@ Modèle principal pour la gestion des projets avec cycles de vie complets.
 """
 
 from odoo import models, fields, api
+from odoo.tools import SQL
 from datetime import datetime, timedelta
+from .payment import PUBLISHED_PAYMENT_STATES
+from .project_similarity import SIMILARITY_FIELDS
 import uuid
 import base64
 import io
 
 
+# États des projets visibles sur le portail public
+PUBLIC_PROJECT_STATES = ['approved', 'in_progress', 'completed']
+
+# Configuration de recherche plein texte: français, insensible aux accents
+PUBLIC_SEARCH_CONFIG = 'sama_promis_fr'
+
+# Dates et périodes de l'histogramme public, avec le libellé de chaque période
+PUBLIC_TIMELINE_DATE_FIELDS = ('start_date', 'end_date', 'create_date')
+PUBLIC_TIMELINE_GRANULARITIES = {
+    'week': lambda start: '%s-S%02d' % start.isocalendar()[:2],
+    'month': lambda start: start.strftime('%Y-%m'),
+    'quarter': lambda start: '%s-T%s' % (start.year, (start.month - 1) // 3 + 1),
+    'year': lambda start: str(start.year),
+}
+
+# Plans de passation publiés sur la fiche projet
+PUBLIC_PROCUREMENT_STATES = ['validated', 'in_execution', 'completed']
+
+# Taille de page des listes liées de la fiche projet (paiements, tâches)
+PUBLIC_DETAIL_PAGE_SIZE = 20
+
+# Champs dont dépendent les statistiques citoyennes des partenaires du projet
+CITIZEN_STATS_FIELDS = {'partner_id', 'implementing_partner_ids', 'state', 'total_budget'}
+
+
 class SamaPromisProject(models.Model):
     """Modèle principal pour les projets SAMA PROMIS."""
     
     _name = 'sama.promis.project'
     _description = 'Projet SAMA PROMIS'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'sama.promis.public.data.mixin']
     _order = 'create_date desc'
     _rec_name = 'name'
+    _public_datasets = ('projects', 'funding')
 
     # Champs de base
     name = fields.Char(
         string='Nom du Projet',
         required=True,
         tracking=True,
+        index='trigram',
         help="Nom complet du projet"
     )
     
@@ -91,6 +121,13 @@ class SamaPromisProject(models.Model):
         help="Partenaire principal du projet"
     )
     
+    partner_name = fields.Char(
+        related='partner_id.name',
+        string='Nom du Partenaire',
+        store=True,
+        help="Nom du partenaire principal, indexé pour la recherche plein texte"
+    )
+    
     donor_id = fields.Many2one(
         'res.partner',
         string='Bailleur de Fonds',
@@ -222,6 +259,14 @@ class SamaPromisProject(models.Model):
 
     # Localisation
     region = fields.Char(string='Région')
+    region_id = fields.Many2one(
+        'sama.promis.region',
+        string='Région (Référentiel)',
+        compute='_compute_region_id',
+        store=True,
+        index=True,
+        help="Région normalisée déduite de la région saisie"
+    )
     department = fields.Char(string='Département')
     commune = fields.Char(string='Commune')
     target_population = fields.Integer(string='Population Cible')
@@ -326,6 +371,29 @@ class SamaPromisProject(models.Model):
         string='Étiquettes'
     )
 
+    similarity_dirty = fields.Boolean(
+        string='Similarité à Recalculer',
+        default=True,
+        copy=False,
+        index=True,
+        help="Les projets similaires seront recalculés au prochain passage du cron"
+    )
+
+    citizen_follower_ids = fields.One2many(
+        'sama.promis.project.follower',
+        'project_id',
+        string='Suiveurs Citoyens'
+    )
+
+    follower_count = fields.Integer(
+        string='Nombre de Suiveurs',
+        default=0,
+        copy=False,
+        readonly=True,
+        index=True,
+        help="Citoyens suivant le projet depuis le portail (tenu à jour par le suivi)"
+    )
+
     call_for_proposal_id = fields.Many2one(
         'sama.promis.call.proposal',
         string='Appel à Propositions'
@@ -445,7 +513,10 @@ class SamaPromisProject(models.Model):
         if 'state' in vals:
             vals['state_history'] = f"Création: {vals['state']} le {datetime.now().strftime('%d/%m/%Y %H:%M')}"
         
-        return super().create(vals)
+        project = super().create(vals)
+        project._trigger_similarity_refresh()
+        project._invalidate_citizen_stats()
+        return project
 
     def write(self, vals):
         """Surcharge de write pour l'audit."""
@@ -462,7 +533,58 @@ class SamaPromisProject(models.Model):
                 history_line = f"\n{old_state} → {new_state} le {datetime.now().strftime('%d/%m/%Y %H:%M')} par {self.env.user.name}"
                 vals['state_history'] = (self.state_history or '') + history_line
         
-        return super().write(vals)
+        # Index des projets similaires
+        if SIMILARITY_FIELDS & set(vals):
+            # Copie: le dictionnaire de l'appelant n'est pas modifié
+            vals = dict(vals, similarity_dirty=True)
+            self._trigger_similarity_refresh()
+        
+        state_changed = self.filtered(lambda p: p.state != vals['state']) if 'state' in vals else self.browse()
+        # Statistiques citoyennes: partenaires avant et après l'écriture
+        stats_changed = CITIZEN_STATS_FIELDS & set(vals)
+        if stats_changed:
+            self._invalidate_citizen_stats(followers=bool(state_changed))
+        result = super().write(vals)
+        if stats_changed:
+            self._invalidate_citizen_stats()
+        if state_changed:
+            state_changed._notify_followers_state_change()
+        return result
+
+    def unlink(self):
+        self._invalidate_citizen_stats(followers=True)
+        return super().unlink()
+
+    def _invalidate_citizen_stats(self, followers=False):
+        """
+        Invalide les statistiques citoyennes des partenaires de ces projets.
+
+        Args:
+            followers (bool): Inclure les suiveurs (le nombre de projets
+                publics suivis dépend de l'état du projet)
+        """
+        partner_ids = set(self.partner_id.ids) | set(self.implementing_partner_ids.ids)
+        if followers:
+            partner_ids.update(self.citizen_follower_ids.partner_id.ids)
+        self.env['res.partner']._invalidate_promis_citizen_stats(partner_ids)
+
+    def _notify_followers_state_change(self):
+        """Notifie les citoyens qui suivent ces projets de leur nouvel état."""
+        state_labels = dict(self._fields['state']._description_selection(self.env))
+        self.env['sama.promis.citizen.notification'].sudo()._fan_out([{
+            'project_id': project.id,
+            'notification_type': 'project_state',
+            'title': f'{project.name}: {state_labels.get(project.state, project.state)}',
+            'message': f'Le projet "{project.name}" est passé à l\'état « {state_labels.get(project.state, project.state)} ».',
+            'res_model': self._name,
+            'res_id': project.id,
+        } for project in self])
+
+    def _trigger_similarity_refresh(self):
+        """Planifie la mise à jour de l'index des projets similaires."""
+        cron = self.env.ref('sama_promis.cron_refresh_project_similarity', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
 
     def _generate_reference(self):
         """Génère une référence unique."""
@@ -560,6 +682,14 @@ class SamaPromisProject(models.Model):
             elif record.state == 'cancelled':
                 record.progress_percentage = 0
 
+    @api.depends('region')
+    def _compute_region_id(self):
+        """Rattache la région saisie au référentiel des régions."""
+        Region = self.env['sama.promis.region'].sudo()
+        lookup = Region._get_lookup()
+        for record in self:
+            record.region_id = Region.match(record.region, lookup) if record.region else False
+
     @api.depends('total_budget', 'total_budget_computed', 'spent_amount', 'use_multi_source_funding')
     def _compute_remaining_budget(self):
         """Calcule le budget restant."""
@@ -1074,4 +1204,519 @@ class SamaPromisProject(models.Model):
         projects._compute_compliance_statistics()
         projects._compute_compliance_report_status()
         
-        return True
\ No newline at end of file
+        return True
+
+    # Statistiques publiques (portail PROMISPUBLIC)
+
+    @api.model
+    def _get_public_domain(self, **filters):
+        """
+        Construit le domaine des projets publics à partir des filtres du portail.
+
+        Args:
+            **filters: Paramètres de requête (project_type, donor_id, state, region, search/q)
+
+        Returns:
+            list: Domaine de recherche
+        """
+        domain = [('state', 'in', PUBLIC_PROJECT_STATES)]
+
+        if filters.get('project_type'):
+            domain.append(('project_type', '=', filters['project_type']))
+
+        donor_id = filters.get('donor_id')
+        if donor_id:
+            try:
+                domain.append(('donor_id', '=', int(donor_id)))
+            except (ValueError, TypeError):
+                pass
+
+        if filters.get('state'):
+            domain.append(('state', '=', filters['state']))
+
+        if filters.get('region'):
+            domain.append(('region', 'ilike', filters['region']))
+
+        search = filters.get('search') or filters.get('q')
+        if search:
+            domain.extend(self._get_public_search_domain(search))
+
+        return domain
+
+    @api.model
+    def get_public_statistics(self, domain=None, donor_limit=5):
+        """
+        Calcule les statistiques du portail public par agrégation SQL groupée.
+
+        Le nombre de requêtes est constant (quatre agrégations), quel que soit
+        le nombre de projets.
+
+        Args:
+            domain (list): Domaine des projets (par défaut: tous les projets publics)
+            donor_limit (int): Nombre maximal de bailleurs retournés (0: aucun)
+
+        Returns:
+            dict: Totaux et répartitions par état, type, région, bailleur et origine des fonds
+        """
+        if domain is None:
+            domain = self._get_public_domain()
+
+        state_labels = dict(self._fields['state'].selection)
+        by_state = {
+            state: {'label': state_labels[state], 'count': 0, 'budget': 0.0}
+            for state in PUBLIC_PROJECT_STATES
+        }
+        by_type = {
+            project_type: {'label': label, 'count': 0, 'budget': 0.0}
+            for project_type, label in self._fields['project_type'].selection
+        }
+
+        # Totaux, répartition par état et par type en une seule agrégation
+        total_projects = 0
+        total_budget = 0.0
+        spent_budget = 0.0
+        groups = self._read_group(
+            domain,
+            ['state', 'project_type'],
+            ['__count', 'total_budget:sum', 'spent_amount:sum'],
+        )
+        for state, project_type, count, budget, spent in groups:
+            budget = budget or 0.0
+            total_projects += count
+            total_budget += budget
+            spent_budget += spent or 0.0
+            state_entry = by_state.setdefault(
+                state, {'label': state_labels.get(state, state), 'count': 0, 'budget': 0.0}
+            )
+            state_entry['count'] += count
+            state_entry['budget'] += budget
+            if project_type in by_type:
+                by_type[project_type]['count'] += count
+                by_type[project_type]['budget'] += budget
+
+        for entry in list(by_state.values()) + list(by_type.values()):
+            entry['percentage'] = (entry['count'] / total_projects * 100) if total_projects > 0 else 0
+
+        # Répartition par région
+        by_region = {}
+        for region, count, budget in self._read_group(
+            domain + [('region', '!=', False)],
+            ['region'],
+            ['__count', 'total_budget:sum'],
+            order='region',
+        ):
+            by_region[region] = {'count': count, 'budget': budget or 0.0}
+
+        # Principaux bailleurs par budget
+        by_donor = []
+        donor_groups = self._read_group(
+            domain + [('donor_id', '!=', False)],
+            ['donor_id'],
+            ['__count', 'total_budget:sum'],
+            order='total_budget:sum desc',
+            limit=donor_limit,
+        ) if donor_limit != 0 else []
+        for donor, count, budget in donor_groups:
+            budget = budget or 0.0
+            by_donor.append({
+                'donor': donor,
+                'project_count': count,
+                'total_budget': budget,
+                'percentage': (budget / total_budget * 100) if total_budget > 0 else 0,
+            })
+
+        # Financements par origine (sous-requête sur les projets filtrés)
+        funding_by_origin = {'international': 0.0, 'local': 0.0}
+        for origin, amount in self.env['sama.promis.project.funding.source']._read_group(
+            [('project_id', 'in', self._search(domain))],
+            ['funding_origin'],
+            ['amount:sum'],
+        ):
+            if origin in funding_by_origin:
+                funding_by_origin[origin] = amount or 0.0
+
+        return {
+            'total_projects': total_projects,
+            'active_projects': by_state.get('in_progress', {}).get('count', 0),
+            'completed_projects': by_state.get('completed', {}).get('count', 0),
+            'total_budget': total_budget,
+            'spent_budget': spent_budget,
+            'budget_utilization': (spent_budget / total_budget * 100) if total_budget > 0 else 0,
+            'by_state': by_state,
+            'by_type': by_type,
+            'by_region': by_region,
+            'by_donor': by_donor,
+            'funding_by_origin': funding_by_origin,
+        }
+
+    @api.model
+    def get_public_monthly_counts(self, domain=None):
+        """
+        Nombre de projets créés par mois, agrégé en base.
+
+        Returns:
+            list: Couples (mois 'AAAA-MM', nombre de projets) triés chronologiquement
+        """
+        return [
+            (bucket['label'], bucket['count'])
+            for bucket in self.get_public_timeline(domain, date_field='create_date', granularity='month')
+        ]
+
+    @api.model
+    def get_public_timeline(self, domain=None, date_field='start_date', granularity='month',
+                            date_from=None, date_to=None, with_budget=False):
+        """
+        Histogramme des projets par période, agrégé en base.
+
+        Args:
+            domain (list): Domaine des projets (par défaut: projets publics)
+            date_field (str): Date de référence (voir PUBLIC_TIMELINE_DATE_FIELDS)
+            granularity (str): Période (voir PUBLIC_TIMELINE_GRANULARITIES)
+            date_from (date): Début de la fenêtre (inclus)
+            date_to (date): Fin de la fenêtre (incluse)
+            with_budget (bool): Ajouter la somme des budgets de chaque période
+
+        Returns:
+            list: Périodes [{start, label, count[, budget]}] triées chronologiquement
+        """
+        if date_field not in PUBLIC_TIMELINE_DATE_FIELDS:
+            raise ValueError("Invalid timeline date field: %s" % date_field)
+        if granularity not in PUBLIC_TIMELINE_GRANULARITIES:
+            raise ValueError("Invalid timeline granularity: %s" % granularity)
+
+        if domain is None:
+            domain = self._get_public_domain()
+        domain = domain + [(date_field, '!=', False)]
+        if date_from:
+            domain.append((date_field, '>=', date_from))
+        if date_to:
+            if date_field == 'create_date':
+                domain.append((date_field, '<', date_to + timedelta(days=1)))
+            else:
+                domain.append((date_field, '<=', date_to))
+
+        groupby = '%s:%s' % (date_field, granularity)
+        aggregates = ['__count', 'total_budget:sum'] if with_budget else ['__count']
+        buckets = []
+        for start, count, *budget in self._read_group(domain, [groupby], aggregates, order=groupby):
+            bucket = {
+                'start': start.strftime('%Y-%m-%d'),
+                'label': PUBLIC_TIMELINE_GRANULARITIES[granularity](start),
+                'count': count,
+            }
+            if with_budget:
+                bucket['budget'] = budget[0] or 0.0
+            buckets.append(bucket)
+        return buckets
+
+    @api.model
+    def get_public_map_regions(self, domain=None, top_limit=3):
+        """
+        Agrégats cartographiques par région normalisée (SQL groupé).
+
+        Args:
+            domain (list): Domaine des projets (par défaut: projets publics)
+            top_limit (int): Nombre de projets mis en avant par région
+
+        Returns:
+            dict: {
+                'regions': [{region, project_count, total_budget, states, top_projects}],
+                'unlocated_count': projets sans région reconnue,
+            }
+        """
+        if domain is None:
+            domain = self._get_public_domain()
+
+        regions = {}
+        unlocated_count = 0
+        for region, state, count, budget in self._read_group(
+            domain, ['region_id', 'state'], ['__count', 'total_budget:sum']
+        ):
+            if not region:
+                unlocated_count += count
+                continue
+            entry = regions.setdefault(region, {
+                'region': region,
+                'project_count': 0,
+                'total_budget': 0.0,
+                'states': {},
+                'top_projects': [],
+            })
+            entry['project_count'] += count
+            entry['total_budget'] += budget or 0.0
+            entry['states'][state] = count
+
+        if regions and top_limit:
+            # Projets au plus gros budget de chaque région, en une requête
+            query = self._search(domain + [('region_id', '!=', False)])
+            self.env.cr.execute(SQL(
+                """
+                SELECT region_id, id, name, total_budget
+                  FROM (
+                    SELECT region_id, id, name, total_budget,
+                           row_number() OVER (
+                               PARTITION BY region_id ORDER BY total_budget DESC NULLS LAST, id DESC
+                           ) AS position
+                      FROM %(table)s
+                     WHERE id IN %(ids)s
+                  ) ranked
+                 WHERE position <= %(limit)s
+                 ORDER BY region_id, position
+                """,
+                table=SQL.identifier(self._table),
+                ids=query.subselect(),
+                limit=top_limit,
+            ))
+            by_id = {region.id: entry for region, entry in regions.items()}
+            for region_id, project_id, name, budget in self.env.cr.fetchall():
+                by_id[region_id]['top_projects'].append({
+                    'id': project_id,
+                    'name': name,
+                    'budget': budget or 0.0,
+                })
+
+        return {
+            'regions': sorted(regions.values(), key=lambda entry: entry['region'].name),
+            'unlocated_count': unlocated_count,
+        }
+
+    @api.model
+    def get_public_count_estimate(self, domain=None):
+        """
+        Estimation du nombre de projets d'un domaine par le planificateur PostgreSQL.
+
+        Évite le parcours complet de `search_count` sur les grands catalogues.
+
+        Returns:
+            int: Nombre estimé de lignes
+        """
+        if domain is None:
+            domain = self._get_public_domain()
+        query = self._search(domain)
+        self.env.cr.execute(SQL("EXPLAIN (FORMAT JSON) %s", query.select()))
+        plan = self.env.cr.fetchone()[0]
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def get_public_detail(self, payments_page=1, tasks_page=1, page_size=PUBLIC_DETAIL_PAGE_SIZE,
+                          similar_limit=4):
+        """
+        Données liées de la fiche publique d'un projet, en un nombre fixe de requêtes.
+
+        Chaque jeu est lu par un seul `search_read` limité aux champs affichés;
+        les libellés de sélection sont résolus ici pour que le template n'ait
+        plus à parcourir les enregistrements. Les paiements et les tâches de
+        conformité, qui peuvent être nombreux, sont paginés; seuls les
+        paiements publiés (approuvés ou versés) sont listés et totalisés.
+        Chaque ligne porte sa propre devise (`currency`): les montants en
+        devises différentes ne sont jamais additionnés.
+
+        Args:
+            payments_page (int): Page des paiements (à partir de 1)
+            tasks_page (int): Page des tâches de conformité (à partir de 1)
+            page_size (int): Nombre de lignes par page
+            similar_limit (int): Nombre de projets similaires
+
+        Returns:
+            dict: {
+                'similar_projects', 'funding_sources', 'procurement_plans', 'contracts': listes,
+                'payments', 'compliance_tasks': {records, total, page, page_count[, totals]},
+            }
+        """
+        self.ensure_one()
+        env = self.env
+
+        def default_currency():
+            # Lue seulement pour les lignes sans devise
+            return self.currency_id or env.company.currency_id
+
+        def read_rows(model_name, domain, field_names, **kwargs):
+            Model = env[model_name]
+            rows = Model.search_read(domain, field_names, **kwargs)
+            selections = {
+                name: dict(Model._fields[name]._description_selection(env))
+                for name in field_names if Model._fields[name].type == 'selection'
+            }
+            for row in rows:
+                for name, labels in selections.items():
+                    row[name + '_label'] = labels.get(row[name], '')
+                if 'currency_id' in row:
+                    row['currency'] = (
+                        env['res.currency'].browse(row['currency_id'][0]) if row['currency_id'] else default_currency()
+                    )
+            return rows
+
+        def paginate(model_name, domain, field_names, order, page, aggregates=()):
+            # Les montants sont totalisés par devise
+            groups = env[model_name]._read_group(
+                domain, ['currency_id'] if aggregates else [], ['__count', *aggregates],
+            )
+            total = sum(group[1] for group in groups)
+            page_count = max((total + page_size - 1) // page_size, 1)
+            page = min(max(page, 1), page_count)
+            pager = {
+                'records': read_rows(
+                    model_name, domain, field_names,
+                    order=order, limit=page_size, offset=(page - 1) * page_size,
+                ) if total else [],
+                'total': total,
+                'page': page,
+                'page_count': page_count,
+            }
+            if aggregates:
+                totals = {}
+                for currency, _count, amount in groups:
+                    currency = currency or default_currency()
+                    totals[currency] = totals.get(currency, 0.0) + (amount or 0.0)
+                pager['totals'] = [
+                    {'currency': currency, 'amount': amount}
+                    for currency, amount in sorted(totals.items(), key=lambda item: item[0].name)
+                ]
+            return pager
+
+        # Voisins précalculés (sama.promis.project.similarity), dans l'ordre de proximité
+        neighbours = env['sama.promis.project.similarity'].get_neighbours(self.ids, limit=similar_limit)
+        similar_rows = {
+            row['id']: row
+            for row in read_rows('sama.promis.project', [('id', 'in', neighbours.ids)],
+                                 ['name', 'reference', 'total_budget', 'currency_id', 'state'])
+        } if neighbours else {}
+        similar_projects = [similar_rows[project_id] for project_id in neighbours.ids if project_id in similar_rows]
+
+        project_domain = [('project_id', '=', self.id)]
+        return {
+            'similar_projects': similar_projects,
+            'funding_sources': read_rows(
+                'sama.promis.project.funding.source',
+                project_domain + [('state', '!=', 'cancelled')],
+                ['name', 'partner_id', 'amount', 'currency_id', 'funding_type', 'funding_origin'],
+                order='sequence, id',
+            ),
+            'procurement_plans': read_rows(
+                'sama.promis.procurement.plan',
+                project_domain + [('state', 'in', PUBLIC_PROCUREMENT_STATES)],
+                ['name', 'reference', 'plan_type', 'state', 'total_estimated_cost', 'currency_id',
+                 'plan_start_date', 'plan_end_date'],
+                order='plan_start_date, id',
+            ),
+            'contracts': read_rows(
+                'sama.promis.contract',
+                project_domain,
+                ['name', 'contract_type', 'state', 'amount', 'currency_id', 'start_date', 'end_date'],
+                order='start_date, id',
+            ),
+            'payments': paginate(
+                'sama.promis.payment.request',
+                project_domain + [('state', 'in', PUBLISHED_PAYMENT_STATES)],
+                ['name', 'state', 'request_date', 'payment_date', 'amount', 'currency_id'],
+                'request_date desc, id desc',
+                payments_page,
+                aggregates=('amount:sum',),
+            ),
+            'compliance_tasks': paginate(
+                'sama.promis.compliance.task',
+                project_domain,
+                ['name', 'task_type', 'state', 'deadline'],
+                'deadline, id',
+                tasks_page,
+            ),
+        }
+
+    # Recherche plein texte (portail PROMISPUBLIC)
+
+    def init(self):
+        """
+        Document de recherche plein texte des projets.
+
+        Colonne `search_vector` générée par PostgreSQL (nom, partenaire,
+        objectifs, description, par poids décroissant) et indexée en GIN.
+        La configuration `sama_promis_fr` applique la racinisation française,
+        et supprime les accents lorsque l'extension unaccent est disponible.
+        """
+        super().init()
+        cr = self.env.cr
+        cr.execute("SELECT 1 FROM pg_ts_config WHERE cfgname = %s", [PUBLIC_SEARCH_CONFIG])
+        if not cr.fetchone():
+            cr.execute(SQL(
+                "CREATE TEXT SEARCH CONFIGURATION %s (COPY = french)",
+                SQL.identifier(PUBLIC_SEARCH_CONFIG),
+            ))
+            if self.env.registry.has_unaccent:
+                cr.execute(SQL(
+                    "ALTER TEXT SEARCH CONFIGURATION %s "
+                    "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem",
+                    SQL.identifier(PUBLIC_SEARCH_CONFIG),
+                ))
+
+        cr.execute(SQL(
+            """
+            ALTER TABLE %(table)s ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector(%(config)s, coalesce(name, '')), 'A')
+                || setweight(to_tsvector(%(config)s, coalesce(partner_name, '')), 'B')
+                || setweight(to_tsvector(%(config)s, coalesce(objectives, '')), 'C')
+                || setweight(to_tsvector(%(config)s, coalesce(description, '')), 'D')
+            ) STORED
+            """,
+            table=SQL.identifier(self._table),
+            config=SQL("%s::regconfig", PUBLIC_SEARCH_CONFIG),
+        ))
+        cr.execute(SQL(
+            "CREATE INDEX IF NOT EXISTS %s ON %s USING gin (search_vector)",
+            SQL.identifier('%s_search_vector_index' % self._table),
+            SQL.identifier(self._table),
+        ))
+
+    @api.model
+    def _get_public_tsquery(self, search):
+        """Requête plein texte (syntaxe web: mots, "expression", -exclusion)."""
+        return SQL("websearch_to_tsquery(%s::regconfig, %s)", PUBLIC_SEARCH_CONFIG, search)
+
+    @api.model
+    def _get_public_any_word_tsquery(self, words):
+        """Requête plein texte satisfaite par l'un quelconque des mots (alphanumériques) donnés."""
+        return SQL("to_tsquery(%s::regconfig, %s)", PUBLIC_SEARCH_CONFIG, ' | '.join(sorted(words)))
+
+    @api.model
+    def _get_public_search_domain(self, search):
+        """
+        Domaine de recherche textuelle des projets publics.
+
+        Correspondance plein texte (index GIN) ou sous-chaîne du nom (index
+        trigramme), pour les mots saisis partiellement.
+
+        Returns:
+            list: Domaine de recherche
+        """
+        query = self._search([])
+        query.add_where(SQL(
+            "%s @@ %s",
+            SQL.identifier(self._table, 'search_vector'),
+            self._get_public_tsquery(search),
+        ))
+        return ['|', ('id', 'in', query), ('name', 'ilike', search)]
+
+    @api.model
+    def search_public_ranked(self, search, domain=None, limit=None, offset=0):
+        """
+        Recherche les projets publics triés par pertinence.
+
+        Args:
+            search (str): Termes recherchés
+            domain (list): Domaine complémentaire (par défaut: projets publics)
+            limit (int): Nombre maximum de résultats
+            offset (int): Décalage
+
+        Returns:
+            recordset: Projets du plus pertinent au moins pertinent
+        """
+        if domain is None:
+            domain = self._get_public_domain()
+        query = self._search(domain + self._get_public_search_domain(search), limit=limit, offset=offset)
+        query.order = SQL(
+            "ts_rank_cd(%s, %s) DESC, %s DESC",
+            SQL.identifier(self._table, 'search_vector'),
+            self._get_public_tsquery(search),
+            SQL.identifier(self._table, 'id'),
+        )
+        self.env.cr.execute(query.select())
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
@@ -7,4 +7,5 @@ Mixins partagés entre tous les micromodules.
 """
 
 from . import workflow_mixin
-from . import audit_mixin
\ No newline at end of file
+from . import audit_mixin
+from . import public_data_mixin
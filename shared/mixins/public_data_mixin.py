@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+SAMA PROMIS - Public Data Mixin
+===============================
+
+Mixin pour signaler les modifications de données publiées sur le portail.
+"""
+
+import logging
+
+from odoo import models, api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+class PublicDataMixin(models.AbstractModel):
+    """
+    Mixin pour les modèles dont les données alimentent le portail public.
+
+    Fournit:
+    - Incrément de la version des jeux de données publiés (tranches de
+      statistiques à recalculer, ETag du portail)
+    - Déclenchement après commit (les lecteurs ne voient jamais une
+      version à jour avec des données non encore validées)
+    - Rafraîchissement anticipé de l'instantané, dont les variations sont
+      diffusées aux tableaux de bord ouverts
+
+    Les modèles héritants déclarent les jeux de données qu'ils affectent
+    via `_public_datasets`.
+    """
+    _name = 'sama.promis.public.data.mixin'
+    _description = 'SAMA PROMIS Public Data Mixin'
+
+    # Jeux de données publics (voir PUBLIC_DATASETS) affectés par ce modèle
+    _public_datasets = ()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Surcharge de create pour signaler les données publiques."""
+        records = super().create(vals_list)
+        records._mark_public_data_changed()
+        return records
+
+    def write(self, vals):
+        """Surcharge de write pour signaler les données publiques."""
+        result = super().write(vals)
+        self._mark_public_data_changed()
+        return result
+
+    def unlink(self):
+        """Surcharge de unlink pour signaler les données publiques."""
+        self._mark_public_data_changed()
+        return super().unlink()
+
+    def _mark_public_data_changed(self, datasets=None):
+        """
+        Enregistre les jeux de données modifiés, signalés une seule fois après commit.
+
+        Args:
+            datasets (tuple): Jeux de données modifiés (par défaut: `_public_datasets`),
+                pour les écritures SQL qui ne passent pas par `write`
+        """
+        datasets = datasets or self._public_datasets
+        if not datasets:
+            return
+
+        postcommit = self.env.cr.postcommit
+        pending = postcommit.data.get('sama_promis.public_datasets')
+        if pending is None:
+            pending = postcommit.data['sama_promis.public_datasets'] = set()
+            registry = self.env.registry
+
+            @postcommit.add
+            def _signal_public_data_changes():
+                try:
+                    with registry.cursor() as cr:
+                        env = api.Environment(cr, SUPERUSER_ID, {})
+                        env['sama.promis.public.stats']._bump_datasets(sorted(pending))
+                        # Rafraîchissement anticipé: les compteurs en direct suivent la modification
+                        cron = env.ref('sama_promis.cron_refresh_public_stats', raise_if_not_found=False)
+                        if cron:
+                            cron._trigger()
+                except Exception:
+                    # Le cron de rafraîchissement complet rattrape l'écart
+                    _logger.exception("Impossible de signaler la modification des données publiques %s", sorted(pending))
+
+        pending.update(datasets)
@@ -25,6 +25,15 @@
         };
     }
 
+    /**
+     * Escape text before inserting it as HTML
+     */
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
     /**
      * Show toast notification
      */
@@ -250,6 +259,9 @@
 
             // Refresh project list
             if (typeof ProjectList !== 'undefined') {
+                // Les curseurs dépendent des filtres: repartir de la première page
+                ProjectList.currentPage = 1;
+                ProjectList.pageCursors = {};
                 ProjectList.loadProjects();
             }
         }
@@ -271,10 +283,10 @@
             const searchInput = document.getElementById('search-input');
             if (!searchInput) return;
 
-            // Debounced search
+            // Suggestions pendant la saisie (index en mémoire côté serveur)
             searchInput.addEventListener('input', debounce((e) => {
-                this.performSearch(e.target.value);
-            }, 300));
+                this.fetchSuggestions(e.target.value);
+            }, 150));
 
             // Search on enter
             searchInput.addEventListener('keypress', (e) => {
@@ -350,14 +362,32 @@
             return card;
         },
 
-        showSearchSuggestions() {
-            if (this.searchHistory.length === 0) return;
+        fetchSuggestions(query) {
+            if (!query || query.length < 2) {
+                this.showSearchSuggestions();
+                return;
+            }
+
+            fetch(`/promispublic/search/suggest?q=${encodeURIComponent(query)}`)
+                .then(response => response.json())
+                .then(data => {
+                    this.showSearchSuggestions(data.suggestions.map(suggestion => suggestion.label));
+                })
+                .catch(error => {
+                    console.error('Suggestion error:', error);
+                });
+        },
+
+        showSearchSuggestions(terms = null) {
+            terms = terms || this.searchHistory.slice(0, 5);
+            document.querySelectorAll('.search-suggestions').forEach(element => element.remove());
+            if (terms.length === 0) return;
 
             const input = document.getElementById('search-input');
             const suggestions = document.createElement('div');
             suggestions.className = 'search-suggestions';
-            suggestions.innerHTML = this.searchHistory.slice(0, 5).map(term => `
-                <div class="suggestion-item">${term}</div>
+            suggestions.innerHTML = terms.map(term => `
+                <div class="suggestion-item">${escapeHtml(term)}</div>
             `).join('');
 
             // Position suggestions below input
@@ -394,11 +424,22 @@
     // =========================================================================
 
     const StatsManager = {
+        // Fallback only: changes are pushed live over the bus
         refreshInterval: 300000, // 5 minutes
 
         init() {
+            // Global figures only: filtered dashboards render their cards untagged
+            if (!document.querySelector('[data-stat]')) return;
             this.startAutoRefresh();
             this.bindRefreshButton();
+            this.listenLiveUpdates();
+        },
+
+        listenLiveUpdates() {
+            // Dispatched by the public_stats_live service (public bus channel)
+            document.addEventListener('sama-promis:stats', (event) => {
+                this.updateStats(event.detail.values || {});
+            });
         },
 
         startAutoRefresh() {
@@ -431,8 +472,10 @@
             // Animate number changes
             Object.entries(data).forEach(([key, value]) => {
                 const element = document.querySelector(`[data-stat="${key}"]`);
-                if (element) {
-                    this.animateNumber(element, parseInt(value));
+                if (element && typeof value === 'number') {
+                    // Amounts: only animate the monetary widget value
+                    const target = element.querySelector('.oe_currency_value') || element;
+                    this.animateNumber(target, Math.round(value));
                 }
             });
         },
@@ -471,101 +514,97 @@
                 return;
             }
 
-            this.initProjectTypeChart();
-            this.initBudgetChart();
-            this.initTimelineChart();
+            // Un seul appel pour tous les graphiques
+            fetch('/promispublic/api/bundle?sections=charts')
+                .then(response => response.json())
+                .then(data => {
+                    this.initProjectTypeChart(data.charts.project_types);
+                    this.initBudgetChart(data.charts.budget_by_donor);
+                    this.initTimelineChart(data.charts.timeline);
+                })
+                .catch(error => {
+                    console.error('Charts fetch error:', error);
+                });
         },
 
-        initProjectTypeChart() {
+        initProjectTypeChart(data) {
             const canvas = document.getElementById('project-type-chart');
             if (!canvas) return;
 
-            fetch('/promispublic/api/charts?type=project_types')
-                .then(response => response.json())
-                .then(data => {
-                    this.charts.projectType = new Chart(canvas, {
-                        type: 'pie',
-                        data: {
-                            labels: data.labels,
-                            datasets: [{
-                                data: data.values,
-                                backgroundColor: [
-                                    '#1e3a8a',
-                                    '#059669',
-                                    '#f59e0b',
-                                    '#3b82f6',
-                                    '#ef4444'
-                                ]
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false,
-                            plugins: {
-                                legend: {
-                                    position: 'bottom'
-                                }
-                            }
+            this.charts.projectType = new Chart(canvas, {
+                type: 'pie',
+                data: {
+                    labels: data.labels,
+                    datasets: [{
+                        data: data.values,
+                        backgroundColor: [
+                            '#1e3a8a',
+                            '#059669',
+                            '#f59e0b',
+                            '#3b82f6',
+                            '#ef4444'
+                        ]
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    plugins: {
+                        legend: {
+                            position: 'bottom'
                         }
-                    });
-                });
+                    }
+                }
+            });
         },
 
-        initBudgetChart() {
+        initBudgetChart(data) {
             const canvas = document.getElementById('budget-chart');
             if (!canvas) return;
 
-            fetch('/promispublic/api/charts?type=budget_by_donor')
-                .then(response => response.json())
-                .then(data => {
-                    this.charts.budget = new Chart(canvas, {
-                        type: 'bar',
-                        data: {
-                            labels: data.labels,
-                            datasets: [{
-                                label: 'Budget (FCFA)',
-                                data: data.values,
-                                backgroundColor: '#1e3a8a'
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false,
-                            scales: {
-                                y: {
-                                    beginAtZero: true
-                                }
-                            }
+            this.charts.budget = new Chart(canvas, {
+                type: 'bar',
+                data: {
+                    labels: data.labels,
+                    datasets: [{
+                        label: 'Budget (FCFA)',
+                        data: data.values,
+                        backgroundColor: '#1e3a8a'
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false,
+                    scales: {
+                        y: {
+                            beginAtZero: true
                         }
-                    });
-                });
+                    }
+                }
+            });
         },
 
-        initTimelineChart() {
+        initTimelineChart(data) {
             const canvas = document.getElementById('timeline-chart');
             if (!canvas) return;
 
-            fetch('/promispublic/api/charts?type=timeline')
-                .then(response => response.json())
-                .then(data => {
-                    this.charts.timeline = new Chart(canvas, {
-                        type: 'line',
-                        data: {
-                            labels: data.labels,
-                            datasets: [{
-                                label: 'Projets',
-                                data: data.values,
-                                borderColor: '#1e3a8a',
-                                backgroundColor: 'rgba(30, 58, 138, 0.1)',
-                                tension: 0.4
-                            }]
-                        },
-                        options: {
-                            responsive: true,
-                            maintainAspectRatio: false
-                        }
-                    });
-                });
+            this.charts.timeline = new Chart(canvas, {
+                type: 'line',
+                data: {
+                    labels: data.labels,
+                    datasets: [{
+                        label: 'Projets',
+                        data: data.values,
+                        borderColor: '#1e3a8a',
+                        backgroundColor: 'rgba(30, 58, 138, 0.1)',
+                        tension: 0.4
+                    }]
+                },
+                options: {
+                    responsive: true,
+                    maintainAspectRatio: false
+                }
+            });
         }
     };
 
@@ -575,6 +614,8 @@
 
     const ProjectList = {
         currentPage: 1,
+        // Curseur de l'API pour chaque page déjà atteinte (page 1: aucun)
+        pageCursors: {},
         loading: false,
         hasMore: true,
 
@@ -631,16 +672,23 @@
             this.showLoadingSpinner();
 
             const filters = FilterManager.activeFilters;
+            const page = this.currentPage;
             const params = new URLSearchParams({
-                page: this.currentPage,
+                page: page,
                 ...filters
             });
+            if (this.pageCursors[page]) {
+                params.set('cursor', this.pageCursors[page]);
+            }
 
             fetch(`/promispublic/api/projects?${params}`)
                 .then(response => response.json())
                 .then(data => {
                     this.renderProjects(data.projects, append);
                     this.hasMore = data.has_more;
+                    if (data.next_cursor) {
+                        this.pageCursors[page + 1] = data.next_cursor;
+                    }
                     this.loading = false;
                     this.hideLoadingSpinner();
                 })
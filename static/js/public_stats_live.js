@@ -0,0 +1,26 @@
+/** @odoo-module **/
+/**
+ * SAMA PROMIS - Live public counters
+ * Subscribes the dashboard to the public bus channel on which the statistics
+ * snapshot broadcasts its changed counters, and forwards them to the page.
+ */
+
+import { registry } from "@web/core/registry";
+
+export const PUBLIC_STATS_CHANNEL = "sama_promis_public_stats";
+
+export const publicStatsLiveService = {
+    dependencies: ["bus_service"],
+
+    start(env, { bus_service }) {
+        if (!document.querySelector("[data-stat]")) {
+            return;
+        }
+        bus_service.addChannel(PUBLIC_STATS_CHANNEL);
+        bus_service.subscribe("sama_promis/public_stats", (payload) => {
+            document.dispatchEvent(new CustomEvent("sama-promis:stats", { detail: payload }));
+        });
+    },
+};
+
+registry.category("services").add("sama_promis_public_stats_live", publicStatsLiveService);
@@ -6,12 +6,19 @@ SAMA PROMIS - Tests Suite
 Suite complète de tests pour valider toutes les fonctionnalités du module.
 """
 
+from . import test_citizen_notification
 from . import test_controllers
+from . import test_document_upload
 from . import test_installation
 from . import test_micromodules
 from . import test_models
+from . import test_open_data
 from . import test_payment
 from . import test_phase2_features
 from . import test_public_portal
+from . import test_project_follower
+from . import test_project_similarity
+from . import test_public_statistics
 from . import test_qr_codes
+from . import test_route_timing
 from . import test_workflows
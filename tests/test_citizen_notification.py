@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Tests de la boîte de notifications citoyennes."""
+
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestCitizenNotification(TransactionCase):
+    """Valide la distribution aux suiveurs et la boîte `sama.promis.citizen.notification`."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.notification_model = cls.env['sama.promis.citizen.notification']
+        cls.follower_model = cls.env['sama.promis.project.follower']
+        cls.citizen = cls.env['res.partner'].create({'name': 'Citoyen Notifié'})
+        cls.other_citizen = cls.env['res.partner'].create({'name': 'Citoyen Non Suiveur'})
+        partner = cls.env['res.partner'].create({'name': 'Bénéficiaire Notifications'})
+        cls.project = cls.env['sama.promis.project'].create({
+            'name': 'Adduction d\'eau de Kédougou',
+            'project_type': 'infrastructure',
+            'partner_id': partner.id,
+            'state': 'approved',
+        })
+        cls.follower_model.follow(cls.citizen.id, [cls.project.id])
+
+    def inbox(self, partner):
+        return self.notification_model.get_inbox(partner.id)
+
+    def test_state_change_fans_out_to_followers(self):
+        self.project.write({'state': 'in_progress'})
+        inbox = self.inbox(self.citizen)
+        self.assertEqual(inbox['unread_count'], 1)
+        self.assertEqual(inbox['notifications'][0]['kind'], 'project_state')
+        self.assertEqual(inbox['notifications'][0]['url'], '/promispublic/project/%s' % self.project.id)
+        self.assertFalse(self.inbox(self.other_citizen)['notifications'])
+
+        # Écriture sans changement d'état: pas de nouvelle notification
+        self.project.write({'state': 'in_progress'})
+        self.assertEqual(self.inbox(self.citizen)['unread_count'], 1)
+
+    def test_payment_and_deadline_notifications(self):
+        payment = self.env['sama.promis.payment.request'].create({
+            'project_id': self.project.id,
+            'amount': 250000,
+        })
+        self.assertEqual(self.inbox(self.citizen)['unread_count'], 0)
+        payment.write({'state': 'approved'})
+        self.env['sama.promis.compliance.task'].create({
+            'name': 'Rapport trimestriel',
+            'project_id': self.project.id,
+            'deadline': fields.Date.today() + timedelta(days=30),
+        })
+        kinds = [notification['kind'] for notification in self.inbox(self.citizen)['notifications']]
+        self.assertCountEqual(kinds, ['payment', 'compliance_deadline'])
+
+    def test_mark_read_in_bulk(self):
+        self.project.write({'state': 'in_progress'})
+        self.project.write({'state': 'suspended'})
+        notifications = self.inbox(self.citizen)['notifications']
+        self.assertEqual(self.notification_model.mark_read(self.citizen.id, [notifications[0]['id']]), 1)
+        self.assertEqual(self.notification_model.get_unread_count(self.citizen.id), 1)
+        # Les notifications d'un autre partenaire ne sont pas modifiées
+        self.assertEqual(self.notification_model.mark_read(self.other_citizen.id), 0)
+        self.assertEqual(self.notification_model.mark_read(self.citizen.id), 1)
+        self.assertEqual(self.notification_model.get_unread_count(self.citizen.id), 0)
+        self.assertTrue(all(notification['read'] for notification in self.inbox(self.citizen)['notifications']))
+
+    def test_inbox_pagination(self):
+        for state in ('in_progress', 'suspended', 'in_progress'):
+            self.project.write({'state': state})
+        first = self.notification_model.get_inbox(self.citizen.id, page=1, page_size=2)
+        second = self.notification_model.get_inbox(self.citizen.id, page=2, page_size=2)
+        self.assertTrue(first['has_more'])
+        self.assertEqual(len(second['notifications']), 1)
+        self.assertFalse(second['has_more'])
+
+    def test_paid_payment_message_follows_state(self):
+        self.env['sama.promis.payment.request'].create({
+            'project_id': self.project.id,
+            'amount': 120000,
+            'state': 'paid',
+        })
+        message = self.inbox(self.citizen)['notifications'][0]['message']
+        self.assertIn('a été versé', message)
+        self.assertNotIn('approuvé', message)
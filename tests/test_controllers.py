@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 """HTTP controller tests for SAMA PROMIS dashboards and public portal."""
 
+import gzip
+from xml.etree import ElementTree
+
 from odoo.tests import HttpCase, tagged
 from unittest import skip
 
@@ -48,7 +51,127 @@ class TestPromisPublicController(ControllerTestMixin, HttpCase):
         if payload:
             self.assertIn('id', payload[0])
 
+    def test_promispublic_stats_api_conditional_get(self):
+        response = self.url_open('/promispublic/api/stats')
+        etag = response.headers.get('ETag')
+        self.assertTrue(etag)
+        response = self.url_open('/promispublic/api/stats', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers.get('ETag'), etag)
+
     def test_promispublic_export_json_route(self):
         response = self.url_open('/promispublic/export?format=json')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.headers.get('Content-Type'), 'application/json')
+        self.assertIsInstance(response.json(), list)
+
+    def test_promispublic_export_csv_gzip_route(self):
+        response = self.url_open('/promispublic/export?format=csv&compress=gzip&state=in_progress')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers.get('Content-Type'), 'application/gzip')
+        content = gzip.decompress(response.content).decode('utf-8')
+        self.assertTrue(content.startswith('Référence,Nom'))
+
+    def test_promispublic_projects_api_cursor_pagination(self):
+        first = self.url_open('/promispublic/api/projects?limit=1&count=exact').json()
+        self.assertIn('total', first)
+        if first['next_cursor']:
+            response = self.url_open('/promispublic/api/projects?limit=1&cursor=%s' % first['next_cursor'])
+            second = response.json()
+            self.assertLess(second['projects'][0]['id'], first['projects'][0]['id'])
+        response = self.url_open('/promispublic/api/projects?cursor=invalide')
+        self.assertEqual(response.status_code, 400)
+
+    def test_promispublic_search_suggestions(self):
+        self.env['sama.promis.project'].create({
+            'name': 'Électrification rurale',
+            'project_type': 'infrastructure',
+            'partner_id': self.env['res.partner'].create({'name': 'Partenaire Suggestion'}).id,
+            'state': 'approved',
+        })
+        response = self.url_open('/promispublic/search/suggest?q=electrif')
+        labels = [suggestion['label'] for suggestion in response.json()['suggestions']]
+        self.assertIn('Électrification rurale', labels)
+
+    def test_promispublic_funding_fragments_follow_data_version(self):
+        first = self.url_open('/promispublic/funding')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Financements par Bailleur', first.text)
+        self.env['sama.promis.public.stats']._bump_datasets(['funding'])
+        second = self.url_open('/promispublic/funding')
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(first.headers.get('ETag'), second.headers.get('ETag'))
+
+    def test_promispublic_bundle_sections(self):
+        payload = self.url_open('/promispublic/api/bundle?sections=charts,map').json()
+        self.assertEqual(set(payload), {'charts', 'map'})
+        for chart in ('project_types', 'budget_by_donor', 'timeline'):
+            self.assertIn('labels', payload['charts'][chart])
+        payload = self.url_open('/promispublic/api/bundle').json()
+        self.assertEqual(set(payload), {'stats', 'charts', 'timeline', 'map'})
+        # Mêmes agrégats que les graphiques servis séparément
+        for chart in ('project_types', 'budget_by_donor'):
+            self.assertEqual(payload['charts'][chart], self.url_open('/promispublic/api/charts?type=%s' % chart).json())
+
+    def test_promispublic_identical_api_requests_share_result(self):
+        first = self.url_open('/promispublic/api/timeline?granularity=year')
+        second = self.url_open('/promispublic/api/timeline?granularity=year')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.headers.get('Content-Type'), first.headers.get('Content-Type'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.headers.get('ETag'), first.headers.get('ETag'))
+
+    def test_promispublic_ndjson_export_served_from_open_data(self):
+        self.assertEqual(self.url_open('/promispublic/export?format=ndjson').status_code, 400)
+        self.env['sama.promis.open.data'].generate(datasets=['projects'], force=True)
+        manifest = self.url_open('/promispublic/opendata').json()['files']
+        entry = next(entry for entry in manifest if entry['filename'] == 'projects.ndjson.gz')
+        response = self.url_open('/promispublic/export?format=ndjson', allow_redirects=False)
+        self.assertIn(response.status_code, (301, 302, 303))
+        self.assertTrue(response.headers['Location'].endswith(entry['url']))
+        response = self.url_open(entry['url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.content), entry['size'])
+
+        # Le fichier Open Data n'a pas les colonnes de l'export CSV: pas de redirection
+        response = self.url_open('/promispublic/export?format=csv', allow_redirects=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.decode('utf-8-sig').startswith('Référence,Nom,Type'))
+        self.assertEqual(self.url_open('/promispublic/export?format=ndjson&state=in_progress').status_code, 400)
+        self.assertEqual(self.url_open('/promispublic/export?format=xml').status_code, 400)
+
+    def test_promispublic_iati_feed_modified_since(self):
+        project = self.env['sama.promis.project'].create({
+            'name': 'Activité IATI',
+            'project_type': 'health',
+            'partner_id': self.env['res.partner'].create({'name': 'Partenaire IATI'}).id,
+            'state': 'in_progress',
+        })
+        response = self.url_open('/promispublic/iati.xml')
+        self.assertEqual(response.status_code, 200)
+        root = ElementTree.fromstring(response.content)
+        self.assertEqual(root.tag, 'iati-activities')
+        titles = root.findall('iati-activity/title/narrative')
+        self.assertIn('Activité IATI', [title.text for title in titles])
+
+        response = self.url_open('/promispublic/iati.xml?modified_since=2999-01-01')
+        self.assertFalse(ElementTree.fromstring(response.content).findall('iati-activity'))
+        self.assertIn(project.reference, self.url_open('/promispublic/iati.xml?modified_since=2000-01-01').text)
+
+        response = self.url_open('/promispublic/iati.xml?modified_since=hier')
+        self.assertEqual(response.status_code, 400)
+
+    def test_promispublic_projects_api_sparse_fields(self):
+        payload = self.url_open('/promispublic/api/projects?limit=5&fields=id,name,budget').json()
+        for project in payload['projects']:
+            self.assertEqual(set(project), {'id', 'name', 'budget'})
+        response = self.url_open('/promispublic/api/projects?fields=id,partner_email')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.json()['allowed_fields'])
+
+        buckets = self.url_open('/promispublic/api/timeline?granularity=year&fields=start,budget').json()['buckets']
+        for bucket in buckets:
+            self.assertEqual(set(bucket), {'start', 'budget'})
+        features = self.url_open('/promispublic/api/map?fields=code,project_count').json()['features']
+        for feature in features:
+            self.assertEqual(set(feature['properties']), {'code', 'project_count'})
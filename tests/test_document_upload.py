@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Tests du téléversement fractionné et dédupliqué des documents de conformité."""
+
+import hashlib
+import io
+from datetime import timedelta
+
+from odoo import fields
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.sama_promis.models import document_upload
+from odoo.addons.sama_promis.models.document_upload import copy_stream
+
+
+@tagged('post_install', '-at_install')
+class TestDocumentUpload(TransactionCase):
+    """Valide les sessions `sama.promis.document.upload` et le partage des fichiers."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.upload_model = cls.env['sama.promis.document.upload']
+        cls.task = cls.env['sama.promis.compliance.task'].create({
+            'name': 'Rapport d\'avancement',
+            'deadline': fields.Date.today() + timedelta(days=15),
+        })
+        cls.other_task = cls.env['sama.promis.compliance.task'].create({
+            'name': 'Rapport financier',
+            'deadline': fields.Date.today() + timedelta(days=15),
+        })
+        cls.content = b'rapport scanne ' * 5000
+
+    def send(self, session, offset, data):
+        return session.write_chunk(offset, io.BytesIO(data), len(data))
+
+    def test_copy_stream_hashes_and_limits(self):
+        hasher = hashlib.sha1()
+        target = io.BytesIO()
+        self.assertEqual(copy_stream(io.BytesIO(self.content), target, len(self.content), hasher), len(self.content))
+        self.assertEqual(target.getvalue(), self.content)
+        self.assertEqual(hasher.hexdigest(), hashlib.sha1(self.content).hexdigest())
+        with self.assertRaises(ValidationError):
+            copy_stream(io.BytesIO(self.content), io.BytesIO(), len(self.content) - 1)
+
+    def test_single_request_upload_is_deduplicated(self):
+        attachment = self.upload_model.upload_stream(self.task, 'rapport.pdf', io.BytesIO(self.content))
+        self.assertEqual(attachment.checksum, hashlib.sha1(self.content).hexdigest())
+        self.assertEqual(attachment.raw, self.content)
+        self.assertIn(attachment, self.task.document_ids)
+
+        # Même contenu envoyé pour une autre tâche: pièce jointe distincte, même fichier
+        again = self.upload_model.upload_stream(self.other_task, 'copie.pdf', io.BytesIO(self.content))
+        self.assertNotEqual(again, attachment)
+        self.assertEqual((again.res_id, again.name), (self.other_task.id, 'copie.pdf'))
+        self.assertEqual(again.raw, self.content)
+        if attachment.store_fname:
+            self.assertEqual(again.store_fname, attachment.store_fname)
+        self.assertEqual(self.other_task.document_ids, again)
+
+        # La suppression de la première tâche n'affecte pas le document de la seconde
+        self.task.unlink()
+        self.assertEqual(again.raw, self.content)
+
+    def test_chunked_upload_resumes_at_received_offset(self):
+        session = self.upload_model.start_upload(self.task, 'rapport.pdf', len(self.content))
+        first, rest = self.content[:30000], self.content[30000:]
+        self.assertTrue(self.send(session, 0, first))
+
+        # Bloc envoyé à une mauvaise position (reprise après coupure): refusé
+        self.assertFalse(self.send(session, 10000, rest))
+        self.assertEqual(session.get_status()['offset'], 30000)
+        # Bloc renvoyé deux fois: le second est refusé
+        self.assertFalse(self.send(session, 0, first))
+
+        self.assertTrue(self.send(session, 30000, rest))
+        status = session.get_status()
+        self.assertTrue(status['done'])
+        self.assertEqual(session.attachment_id.raw, self.content)
+        self.assertIn(session.attachment_id, self.task.document_ids)
+
+    def test_chunked_upload_size_limits(self):
+        with self.assertRaises(ValidationError):
+            self.upload_model.start_upload(self.task, 'enorme.pdf', document_upload.UPLOAD_MAX_SIZE + 1)
+        session = self.upload_model.start_upload(self.task, 'rapport.pdf', 100)
+        with self.assertRaises(ValidationError):
+            self.send(session, 0, b'x' * 101)
+
+    def test_announced_checksum(self):
+        checksum = hashlib.sha1(self.content).hexdigest()
+        self.upload_model.upload_stream(self.task, 'rapport.pdf', io.BytesIO(self.content))
+
+        # Contenu déjà stocké: l'empreinte annoncée ne dispense pas du transfert
+        session = self.upload_model.start_upload(self.other_task, 'rapport.pdf', len(self.content), checksum)
+        self.assertFalse(session.get_status()['done'])
+        self.assertFalse(self.other_task.document_ids)
+        self.assertTrue(self.send(session, 0, self.content))
+        self.assertTrue(session.get_status()['done'])
+        self.assertEqual(session.attachment_id.res_id, self.other_task.id)
+
+        # Empreinte annoncée erronée: la session repart de zéro
+        data = b'autre contenu'
+        session = self.upload_model.start_upload(self.task, 'autre.pdf', len(data), hashlib.sha1(b'x').hexdigest())
+        self.assertFalse(self.send(session, 0, data))
+        status = session.get_status()
+        self.assertEqual(status['offset'], 0)
+        self.assertFalse(status['done'])
+
+    def test_purge_stale_sessions(self):
+        session = self.upload_model.start_upload(self.task, 'rapport.pdf', len(self.content))
+        self.send(session, 0, self.content[:1000])
+        self.env.cr.execute(
+            "UPDATE sama_promis_document_upload SET write_date = %s WHERE id = %s",
+            (fields.Datetime.now() - timedelta(days=2), session.id),
+        )
+        self.upload_model.invalidate_model(['write_date'])
+        self.upload_model.cron_purge_upload_sessions()
+        self.assertFalse(session.exists())
@@ -277,6 +277,60 @@ class TestMultiSourceFunding(TransactionCase):
         self.assertEqual(self.project.total_international_funding, 500000)
         self.assertEqual(self.project.total_local_funding, 300000)
     
+    def test_public_funding_breakdown_converts_currencies(self):
+        """Public funding aggregation should convert each source at its date and group by donor, origin and currency."""
+        company = self.env.company
+        eur = self.env.ref('base.EUR')
+        eur.active = True
+        if eur == company.currency_id:
+            eur = self.env.ref('base.USD')
+            eur.active = True
+        self.env['res.currency.rate'].create({
+            'currency_id': eur.id,
+            'name': '2024-01-01',
+            'rate': 0.5,
+            'company_id': company.id,
+        })
+        self.project.state = 'in_progress'
+        self.funding_source_model.create({
+            'name': 'WB Grant EUR',
+            'project_id': self.project.id,
+            'partner_id': self.international_donor.id,
+            'amount': 1000,
+            'currency_id': eur.id,
+            'funding_type': 'grant',
+            'received_date': '2024-06-01',
+        })
+        self.funding_source_model.create({
+            'name': 'Gov Cofinancing',
+            'project_id': self.project.id,
+            'partner_id': self.local_donor.id,
+            'amount': 300,
+            'funding_type': 'co_financing',
+        })
+        self.funding_source_model.create({
+            'name': 'Cancelled',
+            'project_id': self.project.id,
+            'partner_id': self.local_donor.id,
+            'amount': 999,
+            'funding_type': 'grant',
+            'state': 'cancelled',
+        })
+
+        domain = self.funding_source_model._get_public_funding_domain() + [('project_id', '=', self.project.id)]
+        breakdown = self.funding_source_model.get_public_funding_breakdown(domain)
+        converted = eur._convert(1000, company.currency_id, company, '2024-06-01')
+
+        self.assertEqual(breakdown['currency'], company.currency_id)
+        self.assertAlmostEqual(breakdown['total'], converted + 300, places=2)
+        self.assertEqual([line['donor'] for line in breakdown['by_donor']][0],
+                         self.international_donor if converted > 300 else self.local_donor)
+        self.assertAlmostEqual(breakdown['by_origin']['international']['total'], converted, places=2)
+        self.assertEqual(breakdown['by_origin']['local']['source_count'], 1)
+        by_currency = {line['currency']: line for line in breakdown['by_currency']}
+        self.assertEqual(by_currency[eur]['amount'], 1000)
+        self.assertEqual(by_currency[company.currency_id]['amount'], 300)
+
     def test_percentage_calculation(self):
         """Test that percentage_of_total is correctly calculated for each source."""
         source1 = self.funding_source_model.create({
@@ -744,3 +798,115 @@ class TestComplianceManagement(TransactionCase):
         
         # Verify tasks were created
         self.assertGreater(len(self.contract.compliance_task_ids), initial_count)
+
+
+@tagged('post_install', '-at_install')
+class TestRequestorPortalDashboard(TransactionCase):
+    """Valide les indicateurs agrégés du portail requérant (`/my/promis`)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Requérant Tableau de Bord'})
+        cls.user = cls.env.user
+
+    def add_project(self, state='in_progress', payment_state='paid', amount=1000):
+        project = self.env['sama.promis.project'].create({
+            'name': 'Projet du requérant',
+            'project_type': 'education',
+            'partner_id': self.partner.id,
+            'state': state,
+        })
+        payment = self.env['sama.promis.payment.request'].create({
+            'project_id': project.id,
+            'amount': amount,
+        })
+        payment.state = payment_state
+        return project
+
+    def dashboard_queries(self):
+        self.env.invalidate_all()
+        before = self.env.cr.sql_log_count
+        dashboard = self.partner.get_promis_portal_dashboard(self.user)
+        return dashboard, self.env.cr.sql_log_count - before
+
+    def test_stats_are_aggregated(self):
+        self.add_project(amount=1000)
+        self.add_project(state='approved', payment_state='submitted', amount=400)
+        self.env['sama.promis.contract'].create({
+            'name': 'CT-PORTAIL-001',
+            'project_id': self.add_project(payment_state='draft').id,
+            'partner_id': self.partner.id,
+            'contract_type': 'service',
+            'amount': 5000,
+        })
+        stats = self.partner.get_promis_portal_stats(self.user)
+        self.assertEqual(stats['total_projects'], 3)
+        self.assertEqual(stats['active_projects'], 2)
+        self.assertEqual(stats['total_contracts'], 1)
+        self.assertEqual(stats['active_contracts'], 0)
+        self.assertEqual(stats['total_received'], 1000)
+        self.assertEqual(stats['pending_payments'], 400)
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.add_project()
+        dashboard, queries = self.dashboard_queries()
+        self.assertEqual(len(dashboard['projects']), 1)
+        for _index in range(8):
+            self.add_project()
+        dashboard, more_queries = self.dashboard_queries()
+        self.assertEqual(len(dashboard['projects']), 6)
+        self.assertEqual(len(dashboard['recent_activity']), 6)
+        self.assertEqual(more_queries, queries)
+
+
+@tagged('post_install', '-at_install')
+class TestCitizenStatsCache(TransactionCase):
+    """Valide le cache par partenaire des statistiques citoyennes."""
+
+    def setUp(self):
+        super().setUp()
+        self.partner = self.env['res.partner'].create({'name': 'Citoyen Statistiques'})
+        self.project = self.env['sama.promis.project'].create({
+            'name': 'Projet du citoyen',
+            'project_type': 'education',
+            'partner_id': self.partner.id,
+            'state': 'in_progress',
+            'total_budget': 1000,
+        })
+
+    def stats_queries(self):
+        before = self.env.cr.sql_log_count
+        stats = self.partner.get_promis_citizen_stats()
+        return stats, self.env.cr.sql_log_count - before
+
+    def test_cached_stats_hit_memory(self):
+        stats, _queries = self.stats_queries()
+        self.assertEqual(stats['my_projects'], 1)
+        self.assertEqual(stats['active_projects'], 1)
+        self.assertEqual(stats['total_budget'], 1000)
+        cached, queries = self.stats_queries()
+        self.assertEqual(cached, stats)
+        self.assertEqual(queries, 0)
+
+    def test_project_and_payment_changes_invalidate(self):
+        self.partner.get_promis_citizen_stats()
+        self.project.write({'state': 'completed'})
+        stats = self.partner.get_promis_citizen_stats()
+        self.assertEqual((stats['active_projects'], stats['completed_projects']), (0, 1))
+
+        payment = self.env['sama.promis.payment.request'].create({
+            'project_id': self.project.id,
+            'amount': 300,
+        })
+        self.assertEqual(self.partner.get_promis_citizen_stats()['total_received'], 0)
+        payment.write({'state': 'paid'})
+        self.assertEqual(self.partner.get_promis_citizen_stats()['total_received'], 300)
+
+    def test_follow_invalidates(self):
+        self.assertEqual(self.partner.get_promis_citizen_stats()['following_count'], 0)
+        Follower = self.env['sama.promis.project.follower']
+        Follower.follow(self.partner.id, [self.project.id])
+        self.assertEqual(self.partner.get_promis_citizen_stats()['following_count'], 1)
+        Follower.unfollow(self.partner.id, [self.project.id])
+        self.assertEqual(self.partner.get_promis_citizen_stats()['following_count'], 0)
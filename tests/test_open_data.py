@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Tests des fichiers Open Data pré-générés."""
+
+import base64
+import csv
+import gzip
+import hashlib
+import io
+import json
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.sama_promis.models.open_data import read_open_data_version
+
+
+@tagged('post_install', '-at_install')
+class TestOpenData(TransactionCase):
+    """Valide la génération et le manifeste de `sama.promis.open.data`."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.open_data_model = cls.env['sama.promis.open.data']
+        partner = cls.env['res.partner'].create({'name': 'Bénéficiaire Open Data'})
+        cls.project = cls.env['sama.promis.project'].create({
+            'name': 'Projet Open Data',
+            'project_type': 'health',
+            'partner_id': partner.id,
+            'total_budget': 1234,
+            'state': 'in_progress',
+        })
+        cls.draft = cls.env['sama.promis.project'].create({
+            'name': 'Projet Brouillon Open Data',
+            'project_type': 'health',
+            'partner_id': partner.id,
+            'state': 'draft',
+        })
+        cls.open_data_model.generate(force=True)
+
+    def read_dump(self, dataset, file_format):
+        dump = self.open_data_model.search([('dataset', '=', dataset), ('file_format', '=', file_format)])
+        content = base64.b64decode(dump.attachment_id.datas)
+        return dump, content, gzip.decompress(content).decode('utf-8')
+
+    def test_dumps_contain_public_records_only(self):
+        """Les fichiers CSV et NDJSON doivent contenir les mêmes projets publics."""
+        dump, content, text = self.read_dump('projects', 'csv')
+        rows = {int(row['id']): row for row in csv.DictReader(io.StringIO(text))}
+        self.assertIn(self.project.id, rows)
+        self.assertNotIn(self.draft.id, rows)
+        self.assertEqual(rows[self.project.id]['name'], 'Projet Open Data')
+        self.assertEqual(dump.row_count, len(rows))
+        self.assertEqual(dump.checksum, hashlib.sha256(content).hexdigest())
+        self.assertEqual(dump.file_size, len(content))
+
+        _dump, _content, text = self.read_dump('projects', 'ndjson')
+        records = {record['id']: record for record in map(json.loads, text.splitlines())}
+        self.assertEqual(set(records), set(rows))
+        self.assertEqual(records[self.project.id]['budget'], 1234)
+
+    def test_generation_skips_unchanged_datasets(self):
+        """Seuls les jeux de données modifiés doivent être régénérés."""
+        self.assertEqual(self.open_data_model.generate(), [])
+        self.env['sama.promis.public.stats']._bump_datasets(['calls'])
+        self.assertEqual(self.open_data_model.generate(), ['calls'])
+
+    def test_manifest_lists_every_file(self):
+        """Le manifeste doit décrire chaque fichier avec son URL versionnée."""
+        manifest = self.open_data_model.get_manifest()
+        self.assertEqual(len(manifest), 8)
+        entry = next(entry for entry in manifest if entry['filename'] == 'projects.csv.gz')
+        self.assertTrue(entry['url'].endswith('?v=%s' % entry['sha256'][:12]))
+
+    def test_version_follows_generation_not_source_changes(self):
+        """La version du manifeste ne change qu'à la régénération des fichiers."""
+        version = read_open_data_version(self.env.cr)
+        self.env['sama.promis.public.stats']._bump_datasets(['projects'])
+        self.assertEqual(read_open_data_version(self.env.cr), version)
+
+        self.project.total_budget = 4321
+        self.env.flush_all()
+        self.assertEqual(read_open_data_version(self.env.cr), version)
+        self.open_data_model.generate(datasets=['projects'])
+        self.assertNotEqual(read_open_data_version(self.env.cr), version)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Tests du suivi citoyen des projets."""
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestProjectFollower(TransactionCase):
+    """Valide `sama.promis.project.follower` et le compteur `follower_count`."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.follower_model = cls.env['sama.promis.project.follower']
+        cls.citizen = cls.env['res.partner'].create({'name': 'Citoyen Suiveur'})
+        cls.other_citizen = cls.env['res.partner'].create({'name': 'Autre Citoyen'})
+        partner = cls.env['res.partner'].create({'name': 'Bénéficiaire Suivi'})
+
+        def make(name, state='in_progress'):
+            return cls.env['sama.promis.project'].create({
+                'name': name,
+                'project_type': 'health',
+                'partner_id': partner.id,
+                'state': state,
+            })
+
+        cls.clinic = make('Centre de santé de Podor')
+        cls.pharmacy = make('Pharmacie régionale de Matam')
+        cls.draft = make('Projet brouillon suivi', state='draft')
+
+    def test_follow_is_idempotent_and_counted(self):
+        added = self.follower_model.follow(self.citizen.id, [self.clinic.id, self.pharmacy.id])
+        self.assertCountEqual(added, [self.clinic.id, self.pharmacy.id])
+        self.assertFalse(self.follower_model.follow(self.citizen.id, [self.clinic.id]))
+        self.follower_model.follow(self.other_citizen.id, [self.clinic.id])
+
+        self.assertEqual(self.clinic.follower_count, 2)
+        self.assertEqual(self.pharmacy.follower_count, 1)
+        self.assertEqual(self.follower_model.get_followed_count(self.citizen.id), 2)
+
+    def test_unfollow_decrements_counter(self):
+        self.follower_model.follow(self.citizen.id, [self.clinic.id])
+        self.assertEqual(self.follower_model.unfollow(self.citizen.id, [self.clinic.id, self.pharmacy.id]),
+                         [self.clinic.id])
+        self.assertEqual(self.clinic.follower_count, 0)
+        self.assertFalse(self.follower_model.unfollow(self.citizen.id, [self.clinic.id]))
+        self.assertEqual(self.clinic.follower_count, 0)
+
+    def test_orm_create_and_unlink_keep_counter(self):
+        follow = self.follower_model.create({'partner_id': self.citizen.id, 'project_id': self.pharmacy.id})
+        self.assertEqual(self.pharmacy.follower_count, 1)
+        follow.unlink()
+        self.assertEqual(self.pharmacy.follower_count, 0)
+
+    def test_followed_projects_are_public_only(self):
+        self.follower_model.follow(self.citizen.id, [self.clinic.id, self.draft.id])
+        self.follower_model.follow(self.citizen.id, [self.pharmacy.id])
+        followed = self.follower_model.get_followed_projects(self.citizen.id)
+        self.assertEqual(set(followed.ids), {self.clinic.id, self.pharmacy.id})
+        self.assertEqual(self.follower_model.get_followed_count(self.citizen.id), 2)
+        self.assertEqual(len(self.follower_model.get_followed_projects(self.citizen.id, limit=1)), 1)
+
+    def test_popularity_ranking_uses_counter(self):
+        self.follower_model.follow(self.citizen.id, [self.pharmacy.id])
+        self.follower_model.follow(self.other_citizen.id, [self.pharmacy.id, self.clinic.id])
+        ranked = self.env['sama.promis.project'].search(
+            [('id', 'in', (self.clinic | self.pharmacy).ids)], order='follower_count desc'
+        )
+        self.assertEqual(ranked.ids, [self.pharmacy.id, self.clinic.id])
+
+    def test_follow_marks_followers_dataset(self):
+        # Seul le jeu des suiveurs change de version: les pages et fichiers des projets restent valides
+        self.env.cr.postcommit.clear()
+        self.follower_model.follow(self.citizen.id, [self.clinic.id])
+        self.assertEqual(self.env.cr.postcommit.data.get('sama_promis.public_datasets'), {'followers'})
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Tests de l'index des projets similaires."""
+
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestProjectSimilarity(TransactionCase):
+    """Valide le calcul et la mise à jour incrémentale de `sama.promis.project.similarity`."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.similarity_model = cls.env['sama.promis.project.similarity']
+        partner = cls.env['res.partner'].create({'name': 'Bénéficiaire Similarité'})
+        cls.donor = cls.env['res.partner'].create({'name': 'Bailleur Similarité', 'is_donor': True})
+        cls.tag = cls.env['sama.promis.tag'].create({'name': 'Irrigation'})
+
+        def make(name, project_type, region, donor=False, tags=False):
+            return cls.env['sama.promis.project'].create({
+                'name': name,
+                'project_type': project_type,
+                'partner_id': partner.id,
+                'donor_id': donor and donor.id,
+                'region': region,
+                'tag_ids': [(6, 0, tags.ids)] if tags else [],
+                'state': 'in_progress',
+            })
+
+        cls.reference = make('Irrigation des rizières du delta', 'agriculture', 'Saint-Louis', cls.donor, cls.tag)
+        cls.close = make('Irrigation des périmètres rizicoles', 'agriculture', 'Saint-Louis', cls.donor, cls.tag)
+        cls.medium = make('Semences maraîchères', 'agriculture', 'Thiès')
+        cls.unrelated = make('Construction de salles de classe', 'education', 'Kolda')
+        cls.projects = cls.reference | cls.close | cls.medium | cls.unrelated
+        cls.similarity_model.refresh(full=True)
+
+    def neighbours(self, project):
+        rows = self.similarity_model.search([('project_id', '=', project.id)])
+        return rows.similar_id & self.projects
+
+    def test_neighbours_ranked_by_similarity(self):
+        """Les voisins doivent être classés du plus proche au moins proche, sans le projet lui-même."""
+        neighbours = self.neighbours(self.reference)
+        self.assertEqual(neighbours[:2], self.close | self.medium)
+        self.assertNotIn(self.reference, neighbours)
+        self.assertNotIn(self.unrelated, neighbours)
+        self.assertFalse(self.projects.filtered('similarity_dirty'))
+
+    def test_changed_project_updates_its_neighbours(self):
+        """Une modification ne doit recalculer que les projets concernés."""
+        self.unrelated.write({'project_type': 'agriculture', 'region': 'Saint-Louis', 'tag_ids': [(6, 0, self.tag.ids)]})
+        self.assertTrue(self.unrelated.similarity_dirty)
+        self.assertTrue(self.similarity_model.refresh())
+        self.assertIn(self.unrelated, self.neighbours(self.reference))
+        self.assertFalse(self.unrelated.similarity_dirty)
+        self.assertEqual(self.similarity_model.refresh(), 0)
+
+    def test_unpublished_project_leaves_index(self):
+        """Un projet retiré du portail ne doit plus être proposé ni avoir de voisins."""
+        self.close.state = 'suspended'
+        self.similarity_model.refresh()
+        self.assertNotIn(self.close, self.neighbours(self.reference))
+        self.assertFalse(self.similarity_model.search([('project_id', '=', self.close.id)]))
+
+    def test_get_neighbours_excludes_references(self):
+        """La lecture groupée des voisins doit écarter les projets de référence."""
+        neighbours = self.similarity_model.get_neighbours((self.reference | self.close).ids, limit=10)
+        self.assertIn(self.medium, neighbours)
+        self.assertFalse(neighbours & (self.reference | self.close))
+
+    def test_incremental_refresh_reads_only_candidates(self):
+        """Un recalcul incrémental ne doit lire que les projets partageant un critère."""
+        outsider = self.env['sama.promis.project'].create({
+            'name': 'Dispensaire urbain',
+            'project_type': 'health',
+            'partner_id': self.reference.partner_id.id,
+            'region': 'Kédougou',
+            'state': 'in_progress',
+        })
+        self.similarity_model.refresh()
+        vals = {'region': 'Thiès'}
+        self.medium.write(vals)
+        self.assertEqual(vals, {'region': 'Thiès'})
+
+        Similarity = type(self.similarity_model)
+        loaded = []
+        load_features = Similarity._load_features
+
+        def spy(model, domain=None):
+            features = load_features(model, domain)
+            loaded.extend(features)
+            return features
+
+        with patch.object(Similarity, '_load_features', spy):
+            self.similarity_model.refresh()
+        self.assertIn(self.medium.id, loaded)
+        self.assertIn(self.reference.id, loaded)
+        self.assertNotIn(outsider.id, loaded)
+
+    def test_refresh_marks_similarity_dataset(self):
+        """Un recalcul qui réécrit des voisins doit changer la version des fiches en cache."""
+        self.similarity_model.refresh()
+        self.medium.write({'region': 'Thiès'})
+        self.env.cr.postcommit.clear()
+        self.similarity_model.refresh()
+        self.assertEqual(self.env.cr.postcommit.data.get('sama_promis.public_datasets'), {'similarity'})
+
+        # Rien à recalculer: aucune nouvelle version
+        self.env.cr.postcommit.clear()
+        self.similarity_model.refresh()
+        self.assertIsNone(self.env.cr.postcommit.data.get('sama_promis.public_datasets'))
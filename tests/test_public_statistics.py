@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""Tests des services de statistiques du portail public."""
+
+from datetime import date
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.sama_promis.models.public_stats import PUBLIC_DATASETS, read_public_snapshot_version
+
+
+@tagged('post_install', '-at_install')
+class TestPublicStatistics(TransactionCase):
+    """Valide les agrégations publiques de `sama.promis.project`."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.project_model = cls.env['sama.promis.project']
+        partner = cls.env['res.partner'].create({'name': 'Bénéficiaire Stats'})
+        cls.donor_a = cls.env['res.partner'].create({'name': 'Bailleur A', 'is_donor': True})
+        cls.donor_b = cls.env['res.partner'].create({'name': 'Bailleur B', 'is_donor': True})
+
+        def make(name, state, project_type, budget, region, donor):
+            return cls.project_model.create({
+                'name': name,
+                'project_type': project_type,
+                'partner_id': partner.id,
+                'donor_id': donor.id,
+                'total_budget': budget,
+                'region': region,
+                'state': state,
+            })
+
+        cls.projects = (
+            make('Stats 1', 'approved', 'education', 1000, 'Dakar', cls.donor_a)
+            | make('Stats 2', 'in_progress', 'education', 2000, 'Dakar', cls.donor_a)
+            | make('Stats 3', 'in_progress', 'health', 4000, 'Thiès', cls.donor_b)
+            | make('Stats 4', 'completed', 'health', 3000, 'Thiès', cls.donor_b)
+            | make('Stats Brouillon', 'draft', 'health', 9000, 'Thiès', cls.donor_b)
+        )
+        cls.domain = cls.project_model._get_public_domain() + [('id', 'in', cls.projects.ids)]
+
+    def test_public_domain_excludes_non_public_states(self):
+        """Le domaine public ne doit retenir que les états publiés."""
+        self.assertEqual(self.project_model.search_count(self.domain), 4)
+
+    def test_totals_and_breakdowns(self):
+        """Les totaux et répartitions doivent correspondre aux projets publics."""
+        stats = self.project_model.get_public_statistics(self.domain)
+        self.assertEqual(stats['total_projects'], 4)
+        self.assertEqual(stats['active_projects'], 2)
+        self.assertEqual(stats['completed_projects'], 1)
+        self.assertEqual(stats['total_budget'], 10000)
+        self.assertEqual(stats['by_state']['in_progress']['count'], 2)
+        self.assertEqual(stats['by_type']['education']['count'], 2)
+        self.assertEqual(stats['by_type']['health']['budget'], 7000)
+        self.assertEqual(stats['by_type']['agriculture']['count'], 0)
+        self.assertEqual(stats['by_region']['Dakar'], {'count': 2, 'budget': 3000})
+        self.assertEqual(stats['by_region']['Thiès']['count'], 2)
+
+    def test_donors_sorted_by_budget(self):
+        """Les bailleurs doivent être triés par budget décroissant et limités."""
+        stats = self.project_model.get_public_statistics(self.domain, donor_limit=1)
+        self.assertEqual(len(stats['by_donor']), 1)
+        self.assertEqual(stats['by_donor'][0]['donor'], self.donor_b)
+        self.assertEqual(stats['by_donor'][0]['total_budget'], 7000)
+        self.assertAlmostEqual(stats['by_donor'][0]['percentage'], 70.0)
+
+    def test_filters_are_applied(self):
+        """Les filtres du portail doivent restreindre les agrégations."""
+        domain = self.project_model._get_public_domain(region='Dakar') + [('id', 'in', self.projects.ids)]
+        stats = self.project_model.get_public_statistics(domain)
+        self.assertEqual(stats['total_projects'], 2)
+        self.assertEqual(list(stats['by_region']), ['Dakar'])
+
+    def test_monthly_counts(self):
+        """Les créations mensuelles doivent être agrégées en base."""
+        months = dict(self.project_model.get_public_monthly_counts(self.domain))
+        self.assertEqual(sum(months.values()), 4)
+
+    def test_full_text_search_ranked(self):
+        """La recherche plein texte doit raciniser et classer par pertinence."""
+        partner = self.env['res.partner'].create({'name': 'Partenaire Recherche'})
+        in_name = self.project_model.create({
+            'name': 'Irrigation des rizières',
+            'project_type': 'agriculture',
+            'partner_id': partner.id,
+            'state': 'approved',
+        })
+        in_description = self.project_model.create({
+            'name': 'Appui aux coopératives',
+            'description': '<p>Travaux d\'irrigation et de drainage</p>',
+            'project_type': 'agriculture',
+            'partner_id': partner.id,
+            'state': 'approved',
+        })
+        self.env.flush_all()
+
+        domain = self.project_model._get_public_domain() + [('id', 'in', (in_name | in_description).ids)]
+        results = self.project_model.search_public_ranked('irrigations', domain)
+        self.assertEqual(results, in_name | in_description)
+        self.assertEqual(results[0], in_name)
+
+        filtered = self.project_model.search(
+            self.project_model._get_public_domain(q='drainage') + [('id', 'in', (in_name | in_description).ids)]
+        )
+        self.assertEqual(filtered, in_description)
+
+    def test_timeline_buckets(self):
+        """L'histogramme doit regrouper en base par période, dans la fenêtre demandée."""
+        self.projects[0].start_date = date(2023, 2, 10)
+        self.projects[1].start_date = date(2023, 11, 5)
+        self.projects[2].start_date = date(2024, 3, 1)
+
+        buckets = self.project_model.get_public_timeline(self.domain, granularity='year', with_budget=True)
+        self.assertEqual(
+            [(b['label'], b['count'], b['budget']) for b in buckets],
+            [('2023', 2, 3000), ('2024', 1, 4000)]
+        )
+
+        buckets = self.project_model.get_public_timeline(
+            self.domain, granularity='quarter', date_from=date(2023, 6, 1), date_to=date(2023, 12, 31)
+        )
+        self.assertEqual([(b['label'], b['count']) for b in buckets], [('2023-T4', 1)])
+
+        with self.assertRaises(ValueError):
+            self.project_model.get_public_timeline(self.domain, granularity='day')
+
+    def test_region_reference_matching(self):
+        """La région saisie doit être rattachée au référentiel sans tenir compte des accents."""
+        thies = self.env.ref('sama_promis.region_th')
+        self.assertEqual(self.projects[2].region_id, thies)
+        self.projects[2].region = ' THIES '
+        self.assertEqual(self.projects[2].region_id, thies)
+        self.projects[2].region = 'Région inconnue'
+        self.assertFalse(self.projects[2].region_id)
+
+    def test_map_regions_aggregated(self):
+        """La carte doit agréger nombre, budget, états et principaux projets par région."""
+        result = self.project_model.get_public_map_regions(self.domain, top_limit=1)
+        by_code = {entry['region'].code: entry for entry in result['regions']}
+        self.assertEqual(set(by_code), {'DK', 'TH'})
+        self.assertEqual(by_code['DK']['project_count'], 2)
+        self.assertEqual(by_code['DK']['total_budget'], 3000)
+        self.assertEqual(by_code['DK']['states'], {'approved': 1, 'in_progress': 1})
+        self.assertEqual([p['id'] for p in by_code['TH']['top_projects']], [self.projects[2].id])
+        self.assertEqual(result['unlocated_count'], 0)
+
+    def test_count_estimate(self):
+        """L'estimation du planificateur doit renvoyer un entier positif."""
+        estimate = self.project_model.get_public_count_estimate(self.domain)
+        self.assertIsInstance(estimate, int)
+        self.assertGreaterEqual(estimate, 0)
+
+    def test_detail_loader_paginates_related_sets(self):
+        """La fiche projet doit charger ses jeux liés en requêtes bornées et paginer les longues listes."""
+        project = self.projects[1]
+        self.env['sama.promis.payment.request'].create([
+            {'project_id': project.id, 'amount': 100, 'request_date': date(2024, 1, day), 'state': 'approved'}
+            for day in range(1, 6)
+        ])
+        # Demandes non publiées: ni listées ni totalisées
+        self.env['sama.promis.payment.request'].create([
+            {'project_id': project.id, 'amount': 1000, 'request_date': date(2024, 1, 10), 'state': state}
+            for state in ('draft', 'submitted', 'rejected')
+        ])
+        self.env['sama.promis.compliance.task'].create([
+            {'name': 'Rapport %s' % day, 'project_id': project.id, 'deadline': date(2024, 2, day)}
+            for day in range(1, 4)
+        ])
+        project.invalidate_recordset()
+        self.env['sama.promis.project.similarity'].refresh(full=True)
+
+        detail = project.get_public_detail(payments_page=3, tasks_page=9, page_size=2)
+        payments = detail['payments']
+        self.assertEqual((payments['total'], payments['page'], payments['page_count']), (5, 3, 3))
+        self.assertEqual(payments['totals'], [{'currency': self.env.company.currency_id, 'amount': 500}])
+        self.assertEqual([p['request_date'] for p in payments['records']], [date(2024, 1, 1)])
+        self.assertEqual(payments['records'][0]['state_label'], 'Approved')
+
+        tasks = detail['compliance_tasks']
+        self.assertEqual((tasks['total'], tasks['page']), (3, 2))
+        self.assertEqual([t['name'] for t in tasks['records']], ['Rapport 3'])
+
+        similar_ids = [row['id'] for row in detail['similar_projects']]
+        self.assertIn(self.projects[0].id, similar_ids)
+        self.assertNotIn(project.id, similar_ids)
+
+        # Nombre de requêtes indépendant du volume de lignes liées
+        self.env.invalidate_all()
+        with self.assertQueryCount(__system__=23):
+            project.get_public_detail(page_size=2)
+
+    def test_detail_amounts_keep_their_currency(self):
+        """Chaque montant de la fiche garde sa devise; les paiements sont totalisés par devise."""
+        project = self.projects[1]
+        company_currency = self.env.company.currency_id
+        foreign = self.env.ref('base.EUR')
+        if foreign == company_currency:
+            foreign = self.env.ref('base.USD')
+        foreign.active = True
+        self.env['sama.promis.project.funding.source'].create({
+            'name': 'Subvention en devise',
+            'project_id': project.id,
+            'partner_id': self.donor_a.id,
+            'amount': 1000,
+            'currency_id': foreign.id,
+            'funding_type': 'grant',
+        })
+        self.env['sama.promis.payment.request'].create([
+            {'project_id': project.id, 'amount': 100, 'state': 'paid', 'currency_id': company_currency.id},
+            {'project_id': project.id, 'amount': 40, 'state': 'paid', 'currency_id': foreign.id},
+        ])
+
+        detail = project.get_public_detail()
+        self.assertEqual([row['currency'] for row in detail['funding_sources']], [foreign])
+        self.assertEqual(
+            {row['currency']: row['amount'] for row in detail['payments']['records']},
+            {company_currency: 100, foreign: 40},
+        )
+        self.assertEqual(
+            {entry['currency']: entry['amount'] for entry in detail['payments']['totals']},
+            {company_currency: 100, foreign: 40},
+        )
+
+
+@tagged('post_install', '-at_install')
+class TestPublicStatsSnapshot(TransactionCase):
+    """Valide l'instantané matérialisé `sama.promis.public.stats`."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stats_model = cls.env['sama.promis.public.stats']
+
+    def setUp(self):
+        super().setUp()
+        # `nextval` survit à l'annulation du test précédent, pas la version des tranches:
+        # chaque test part d'un instantané à jour des compteurs courants
+        self.stats_model.refresh_slices(force=True)
+
+    def test_snapshot_contains_global_indicators(self):
+        """L'instantané doit exposer tous les indicateurs globaux."""
+        snapshot = self.stats_model.get_snapshot()
+        for key in ('total_projects', 'total_budget', 'spent_budget', 'international_funding',
+                    'local_funding', 'compliance_rate', 'open_calls', 'active_procurements'):
+            self.assertIn(key, snapshot)
+        self.assertEqual(
+            snapshot['total_projects'],
+            self.env['sama.promis.project'].search_count([('state', 'in', ['approved', 'in_progress', 'completed'])])
+        )
+
+    def test_bumped_slice_is_dirty_until_refreshed(self):
+        """Une tranche marquée doit être recalculée puis redevenir propre."""
+        row = self.stats_model.search([('slice', '=', 'calls')])
+        self.assertFalse(row.dirty)
+
+        self.stats_model._bump_datasets(['calls'])
+        row.invalidate_recordset(['dirty'])
+        self.assertTrue(row.dirty)
+
+        self.assertEqual(self.stats_model.refresh_slices(['calls']), ['calls'])
+        row.invalidate_recordset(['dirty'])
+        self.assertFalse(row.dirty)
+
+    def test_clean_slices_are_not_recomputed(self):
+        """Un rafraîchissement sans modification ne doit rien recalculer."""
+        self.assertEqual(self.stats_model.refresh_slices(), [])
+
+    def test_refresh_broadcasts_changed_counters(self):
+        """Un rafraîchissement doit diffuser les seuls compteurs modifiés, avec leur variation."""
+        before = self.stats_model.get_snapshot()['total_projects']
+        self.env['sama.promis.project'].create({
+            'name': 'Projet Diffusé',
+            'project_type': 'education',
+            'partner_id': self.env['res.partner'].create({'name': 'Partenaire Diffusé'}).id,
+            'state': 'in_progress',
+        })
+        self.stats_model._bump_datasets(['projects'])
+        with patch.object(type(self.stats_model), '_broadcast_changes') as broadcast:
+            self.stats_model.refresh_slices(['projects'])
+        changes = broadcast.call_args.args[0]
+        self.assertEqual(changes['total_projects'], (before, before + 1))
+        self.assertNotIn('open_calls', changes)
+
+        bus_count = self.env['bus.bus'].search_count([])
+        self.stats_model._broadcast_changes(changes)
+        self.assertEqual(self.env['bus.bus'].search_count([]), bus_count + 1)
+
+    def test_source_writes_mark_slices_after_commit(self):
+        """Les écritures sur les modèles sources doivent marquer leurs tranches."""
+        project = self.env['sama.promis.project'].create({
+            'name': 'Projet Instantané',
+            'project_type': 'education',
+            'partner_id': self.env['res.partner'].create({'name': 'Partenaire Instantané'}).id,
+            'state': 'approved',
+        })
+        project.write({'region': 'Kaolack'})
+        pending = self.env.cr.postcommit.data.get('sama_promis.public_datasets')
+        self.assertEqual(pending, {'projects', 'funding'})
+
+    def test_data_versions_cover_all_datasets(self):
+        """Chaque jeu de données publié doit avoir une version lisible et incrémentable."""
+        versions = self.stats_model.get_data_versions()
+        self.assertEqual(set(versions), set(PUBLIC_DATASETS))
+
+        self.stats_model._bump_datasets(['events'])
+        bumped = self.stats_model.get_data_versions(['events', 'calls'])
+        self.assertGreater(bumped['events'], versions['events'])
+        self.assertEqual(bumped['calls'], versions['calls'])
+
+    def test_snapshot_version_follows_refresh_not_bump(self):
+        """La version de l'instantané ne change qu'au recalcul, pas au marquage."""
+        version = read_public_snapshot_version(self.env.cr)
+        self.stats_model._bump_datasets(['calls'])
+        self.assertEqual(read_public_snapshot_version(self.env.cr), version)
+
+        self.stats_model.refresh_slices(['calls'])
+        self.assertNotEqual(read_public_snapshot_version(self.env.cr), version)
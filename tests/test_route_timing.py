@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Tests de l'histogramme des mesures des routes du portail."""
+
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.sama_promis.models.route_timing import ROUTE_TIMING_SUM_FIELDS, route_timing_bucket
+
+
+def make_sample(path, durations, query_count=0, sql_time=0.0, size=0):
+    sample = dict.fromkeys(ROUTE_TIMING_SUM_FIELDS, 0)
+    sample.update(
+        path=path,
+        request_count=len(durations),
+        query_count=query_count,
+        duration=sum(durations),
+        sql_time=sql_time,
+        python_time=sum(durations) - sql_time,
+        response_bytes=size,
+        max_duration=max(durations),
+    )
+    for duration in durations:
+        sample[route_timing_bucket(duration)] += 1
+    return sample
+
+
+@tagged('post_install', '-at_install')
+class TestRouteTiming(TransactionCase):
+    """Valide la fusion des mesures et le rapport des routes les plus lentes."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.timing_model = cls.env['sama.promis.route.timing']
+        cls.hour = fields.Datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    def test_bucket_bounds(self):
+        self.assertEqual(route_timing_bucket(3), 'duration_le_10')
+        self.assertEqual(route_timing_bucket(10), 'duration_le_10')
+        self.assertEqual(route_timing_bucket(10.5), 'duration_le_25')
+        self.assertEqual(route_timing_bucket(9000), 'duration_gt_2500')
+
+    def test_merge_accumulates_same_hour(self):
+        key = ('PromisPublicController.get_map_data', self.hour)
+        self.timing_model._merge_samples({key: make_sample('/promispublic/api/map', [20, 40], 6, 12.0, 1000)})
+        self.timing_model._merge_samples({key: make_sample('/promispublic/api/map', [300], 9, 100.0, 500)})
+
+        timing = self.timing_model.search([('route', '=', key[0])])
+        self.assertEqual(len(timing), 1)
+        self.assertEqual(timing.request_count, 3)
+        self.assertEqual(timing.query_count, 15)
+        self.assertAlmostEqual(timing.duration, 360)
+        self.assertAlmostEqual(timing.sql_time, 112)
+        self.assertAlmostEqual(timing.max_duration, 300)
+        self.assertEqual(timing.response_bytes, 1500)
+        self.assertEqual((timing.duration_le_25, timing.duration_le_50, timing.duration_le_500), (1, 1, 1))
+
+    def test_slowest_routes_ranked_by_p95(self):
+        self.timing_model._merge_samples({
+            ('PromisPublicController.promispublic_home', self.hour):
+                make_sample('/promispublic', [30] * 19 + [2000]),
+            ('PromisPublicController.get_stats', self.hour):
+                make_sample('/promispublic/api/stats', [5] * 20),
+            ('PromisPublicController.get_stats', self.hour - timedelta(days=30)):
+                make_sample('/promispublic/api/stats', [5000]),
+        })
+        report = self.timing_model.get_slowest_routes(days=7)
+        routes = [entry['route'] for entry in report]
+        self.assertLess(routes.index('PromisPublicController.promispublic_home'),
+                        routes.index('PromisPublicController.get_stats'))
+        home = report[routes.index('PromisPublicController.promispublic_home')]
+        self.assertEqual(home['request_count'], 20)
+        self.assertEqual(home['p95_duration'], 50)
+        self.assertAlmostEqual(home['max_duration'], 2000)
+        stats = report[routes.index('PromisPublicController.get_stats')]
+        self.assertEqual(stats['p95_duration'], 5)
+
+    def test_purge_keeps_recent_hours(self):
+        self.timing_model._merge_samples({
+            ('CitizenPortalController.citizen_home', self.hour): make_sample('/promispublic/citizen', [10]),
+            ('CitizenPortalController.citizen_home', self.hour - timedelta(days=60)):
+                make_sample('/promispublic/citizen', [10]),
+        })
+        self.timing_model.cron_purge_route_timings()
+        timings = self.timing_model.search([('route', '=', 'CitizenPortalController.citizen_home')])
+        self.assertEqual(timings.mapped('period_start'), [self.hour])